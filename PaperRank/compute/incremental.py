@@ -0,0 +1,206 @@
+from ..util import config
+
+from scipy import sparse
+from time import time
+import logging
+import numpy as np
+
+
+# Number of unchanged rows sampled to rescale the previous PaperRanks
+SCALE_SAMPLE_SIZE = 1000
+
+
+class IncrementalPaperRank:
+    def __init__(self, M: sparse.csr_matrix, N: int, previous: np.array,
+                 changed: np.array=None, callback: callable=None):
+        """Initialization logic for the IncrementalPaperRank submodule, which
+        updates the PaperRanks of a previous run after a (small) change of
+        the citation graph, by pushing the residual of the previous
+        PaperRanks instead of recomputing them.
+
+        PaperRanks x are the normalized solution y / sum(y) of the linear
+        system (I - beta * M) y = e / N. Starting from the rescaled previous
+        PaperRanks y, the residual r = e / N - (I - beta * M) y is pushed
+        (Gauss-Southwell style) from every paper where it exceeds a
+        threshold: y += r, and r is propagated to the papers it cites.
+
+        NOTE: With `changed`, the residual is first only computed for the
+              changed papers and the papers they cite. Once it is below the
+              bound, the residual of every paper is computed (one product
+              with M) and pushed until it is below the bound, so that the
+              error of the previous run does not accumulate over updates.
+
+        Arguments:
+            M {sparse.csr_matrix} -- Stochastic (Markov transition) matrix.
+            N {int} -- Number of elements for which PaperRank is computed.
+            previous {np.array} -- Previous PaperRanks, with indexes
+                                   corresponding to M (see
+                                   `util.buildInitialScores`).
+
+        Keyword Arguments:
+            changed {np.array} -- Indexes of the papers whose citations
+                                  changed (including new papers). If
+                                  provided, the residual is only computed
+                                  for these papers and the papers they cite
+                                  until it converges, and then checked for
+                                  every paper; otherwise, it is computed for
+                                  every paper (default: {None}).
+            callback {callable} -- Function called with the iteration number
+                                   and difference (or residual) after every
+                                   iteration (default: {None}).
+        """
+
+        # Configuration variables
+        self.beta = config.compute['beta']
+        self.epsilon = config.compute['epsilon']
+        self.max_iterations = config.compute['max_iterations']
+
+        # Storing input parameters
+        self.M = M.tocsr()
+        self.N = N
+        self.previous = previous.astype(self.M.dtype)
+        self.changed = changed
+        self.callback = callback
+
+        logging.info('Initialized IncrementalPaperRank module with {0} IDs'
+                     .format(self.N))
+
+    def __initialResidual(self, M_csc: sparse.csc_matrix) \
+            -> (np.array, np.array):
+        """Function to rescale the previous PaperRanks to the linear system,
+        and compute their residual.
+
+        Arguments:
+            M_csc {sparse.csc_matrix} -- Transition matrix, by column.
+
+        Returns:
+            (np.array, np.array) -- Rescaled PaperRanks and residual.
+        """
+
+        x = self.previous
+
+        if self.changed is None:
+            # x = beta * M * x + c * e / N, where c is the redistributed
+            # (teleported and leaked) PaperRank; y = x / c
+            column_sums = np.bincount(self.M.indices, weights=self.M.data,
+                                      minlength=self.N)
+            c = 1 - self.beta * np.sum(column_sums * x, dtype=np.float64)
+            y = x / c
+
+            return y, self.__residual(y)
+
+        # Papers whose row of the linear system changed; the changed papers,
+        # and the papers they cite (whose column weights changed)
+        changed = np.unique(self.changed)
+        rows = np.union1d(changed, M_csc[:, changed].indices)
+
+        # Rescaling so that the residual of an (unchanged) sample of the
+        # other papers is 0, from the median of their scaling factor
+        unchanged = np.setdiff1d(
+            np.linspace(0, self.N - 1, SCALE_SAMPLE_SIZE).astype(np.int64),
+            rows)
+        if unchanged.size > 0:
+            redistributed = x[unchanged] - self.beta * \
+                self.M[unchanged].dot(x)
+            c = np.median(redistributed * self.N)
+        else:
+            c = 1.0
+        y = x / c
+
+        r = np.zeros(self.N, dtype=np.float64)
+        r[rows] = 1 / self.N - y[rows] + self.beta * self.M[rows].dot(y)
+
+        logging.info('Computed residual for {0} changed rows'
+                     .format(rows.size))
+
+        return y, r
+
+    def __residual(self, y: np.array) -> np.array:
+        """Function to compute the residual r = e / N - (I - beta * M) y of
+        every paper.
+
+        Arguments:
+            y {np.array} -- Solution of the linear system.
+
+        Returns:
+            np.array -- Residual.
+        """
+
+        return 1 / self.N - y.astype(np.float64) + \
+            self.beta * self.M.dot(y).astype(np.float64)
+
+    def calculate(self) -> np.array:
+        """Function to update the previous PaperRanks until the L1 norm of
+        the residual of every paper guarantees that they are within epsilon
+        of the stable solution. The number of push rounds, wall time and
+        final residual are stored in `iterations`, `runtime` and `residual`.
+
+        Returns:
+            np.array -- Array of PaperRanks, with indexes corresponding to M.
+        """
+
+        logging.info('Computing incremental PaperRank update for {0} IDs'
+                     .format(self.N))
+
+        start = time()
+
+        # Columns of M are used to propagate the residual
+        M_csc = self.M.tocsc()
+
+        y, r = self.__initialResidual(M_csc)
+
+        count = 0
+        pushed = 0
+
+        # With `changed`, r is only the residual of the changed rows
+        complete = self.changed is None
+
+        while count < self.max_iterations:
+            # ||y - y*||_1 <= ||r||_1 / (1 - beta); the normalized error is
+            # below epsilon if ||r||_1 <= bound
+            bound = self.epsilon * (1 - self.beta) * \
+                np.sum(y, dtype=np.float64) / 2
+            residual = np.sum(np.absolute(r), dtype=np.float64)
+
+            if residual <= bound:
+                if complete:
+                    break
+
+                # Checking the residual of every paper, including the error
+                # of the previous run
+                r = self.__residual(y)
+                complete = True
+
+                logging.info('Computed residual {0} for every paper'
+                             .format(np.sum(np.absolute(r),
+                                            dtype=np.float64)))
+                continue
+
+            # Pushing the residual of every paper above the threshold
+            push = np.nonzero(np.absolute(r) > bound / self.N)[0]
+            r_push = r[push]
+
+            y[push] += r_push.astype(y.dtype)
+            r[push] = 0
+            r += self.beta * M_csc[:, push].dot(r_push)
+
+            count += 1
+            pushed += push.size
+
+            logging.info('Completed {0} push rounds ({1} papers) with \
+                residual {2}'.format(count, push.size, residual))
+
+            if self.callback is not None:
+                self.callback(count, residual)
+
+        scores = y / np.sum(y, dtype=np.float64)
+
+        self.iterations = count
+        self.runtime = time() - start
+        self.residual = residual
+
+        logging.info('Updated PaperRanks for {0} IDs in {1} push rounds of \
+            {2} papers in total, in {3:.3f}s with residual {4}'.format(
+                self.N, count, pushed, self.runtime, residual))
+
+        return scores.astype(self.M.dtype)
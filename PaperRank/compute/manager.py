@@ -1,15 +1,22 @@
+from .incremental import IncrementalPaperRank
+from .out_of_core import OutOfCorePaperRank
 from .paperrank import StablePaperRank
-from .util import buildOutDegreeMap, buildIdList, buildReverseIdxMap, Export
+from .personalized import buildTeleportMatrix, PersonalizedPaperRank
+from .shared_memory import SharedMemoryPaperRank
+from .util import buildOutDegreeMap, buildIdList, buildReverseIdxMap, \
+    buildInitialScores, Export, GraphSnapshot, Instrumentation
 from .transition_matrix import MarkovTransitionMatrix
-from ..util import config
+from ..util import config, getFrontier
 
 from redis import StrictRedis
 import logging
 import numpy as np
+import os
 
 
 class Manager:
-    def __init__(self, r: StrictRedis, cutoff: int=None):
+    def __init__(self, r: StrictRedis, cutoff: int=None,
+                 snapshot: str=None):
         """Manager class initialization. Loads configuration variables,
         and recovers gracefully from a crash by default.
         
@@ -18,48 +25,125 @@ class Manager:
         
         Keyword Arguments:
             cutoff {int} -- ID number limit. (default: {None})
+            snapshot {str} -- Path to a graph snapshot to be read instead of
+                              the 'SEEN', 'IN' and 'OUT_DEGREE' databases
+                              (default: {None}).
         """
 
         # Class variables
         self.r = r
-
-        # Intializing SEEN ID list
-        logging.info('Initializing with {0} IDs in SEEN'
-                     .format(r.scard('SEEN')))
-        self.seen = buildIdList(r=self.r, cutoff=cutoff)
-        self.N = self.seen.size
-
-        # Building out degree map
-        logging.info('Building out degree map')
-        buildOutDegreeMap(r=self.r)
+        self.snapshot = None
+
+        # Recording the stages of the run
+        self.instrumentation = Instrumentation()
+
+        if snapshot:
+            # Intializing ID list from the graph snapshot
+            with self.instrumentation.stage('load_snapshot') as stage:
+                self.snapshot = GraphSnapshot(snapshot)
+                self.seen = np.array(self.snapshot.ids[:cutoff])
+                self.N = stage['items'] = self.seen.size
+        else:
+            # Intializing SEEN ID list
+            logging.info('Initializing with {0} IDs in SEEN'
+                         .format(getFrontier(r).count('SEEN')))
+            with self.instrumentation.stage('build_id_list') as stage:
+                self.seen = buildIdList(r=self.r, cutoff=cutoff)
+                self.N = stage['items'] = self.seen.size
+
+            # Building out degree map
+            logging.info('Building out degree map')
+            with self.instrumentation.stage('build_out_degree_map'):
+                buildOutDegreeMap(r=self.r,
+                                  batch_size=config.compute['batch_size'])
 
         # Building reverse index map for O(1) index lookup
-        self.id_idx_map = buildReverseIdxMap(seen=self.seen)
+        with self.instrumentation.stage('build_reverse_idx_map',
+                                        items=self.N):
+            self.id_idx_map = buildReverseIdxMap(seen=self.seen)
 
         # Logging frequency configuration
         self.log_increment = (self.N / 100) * config.compute['log_freq']
 
-    def start(self, export: bool=True):
+    def start(self, export: bool=True, changed: list=None):
         """Function to start the PaperRank computation.
 
         Keyword Arguments:
             export {bool} -- Toggle exporting paperrank. (default: {True})
+            changed {list} -- IDs of the papers whose citations changed since
+                              the previous run, for the `incremental` engine.
+                              If not provided, the residual of the previous
+                              PaperRanks is computed for every paper
+                              (default: {None}).
         """
 
         # Startup
         logging.info('Starting PaperRank computation for {0} IDs'
                      .format(self.N))
 
-        markov_matrix = MarkovTransitionMatrix(r=self.r,
-                                               seen=self.seen,
-                                               id_idx_map=self.id_idx_map)
-        
-        M = markov_matrix.construct()
+        # Warm-starting from the PaperRanks of the previous run
+        initial = None
+
+        with self.instrumentation.stage('warm_start', items=self.N):
+            if config.compute['warm_start'] == 'redis':
+                initial = buildInitialScores(
+                    seen=self.seen, r=self.r,
+                    batch_size=config.compute['batch_size'])
+            elif config.compute['warm_start'] == 'pickle':
+                initial = buildInitialScores(
+                    seen=self.seen,
+                    pickle_file=config.compute['output_folder'] +
+                    config.compute['pickle_pr_file'])
+
+        # Recording every solver iteration
+        callback = self.instrumentation.iteration
+
+        if config.compute['engine'] == 'out_of_core':
+            # Streaming the citations from the graph snapshot, without
+            # building the transition matrix
+            if self.snapshot is None:
+                logging.error('Out-of-core compute requires a graph snapshot')
+                raise RuntimeError('No graph snapshot for out-of-core \
+                    compute.')
+
+            M = None
+            compute_engine = OutOfCorePaperRank(self.snapshot, self.N,
+                                                initial=initial,
+                                                callback=callback)
+        else:
+            markov_matrix = MarkovTransitionMatrix(
+                r=self.r, seen=self.seen, id_idx_map=self.id_idx_map,
+                snapshot=self.snapshot, instrumentation=self.instrumentation)
+
+            M = markov_matrix.construct()
+
+            if config.compute['engine'] == 'incremental':
+                # Pushing the residual of the previous PaperRanks
+                if initial is None:
+                    logging.error('Incremental compute requires a warm start')
+                    raise RuntimeError('No previous PaperRanks for \
+                        incremental compute.')
+
+                if changed is not None:
+                    changed = self.id_idx_map.lookup(np.array(changed))
+                    changed = changed[changed >= 0]
+
+                compute_engine = IncrementalPaperRank(M, self.N, initial,
+                                                      changed=changed,
+                                                      callback=callback)
+            elif config.compute['engine'] == 'shared_memory':
+                # Splitting power iteration across processes
+                compute_engine = SharedMemoryPaperRank(M, self.N,
+                                                       initial=initial,
+                                                       callback=callback)
+            else:
+                # Initializing StablePaperRank object
+                compute_engine = StablePaperRank(M, self.N, initial=initial,
+                                                 callback=callback)
 
-        # Initializing StablePaperRank object
-        compute_engine = StablePaperRank(M, self.N)
         # Computing PaperRanks
-        paperrank = compute_engine.calculate()
+        with self.instrumentation.stage('solve', items=self.N):
+            paperrank = compute_engine.calculate()
 
         logging.info('Computed PaperRanks for {0} IDs'.format(self.N))
 
@@ -70,10 +154,53 @@ class Manager:
         # Initialize export manager
         export_manager = Export(r=self.r, paperrank=paperrank, seen=self.seen)
         
-        # Export to Redis, CSV and Excel
-        export_manager.toRedis()
-        export_manager.toCSV()
-        export_manager.toExcel()
-        export_manager.toSerialized(transition_matrix=M)
+        # Export to the configured sinks concurrently
+        export_manager.start(transition_matrix=M,
+                             instrumentation=self.instrumentation)
+
+        # Writing the run report
+        self.writeReport()
 
         return paperrank
+
+    def writeReport(self):
+        """Function to write the run report (stages and solver iterations)
+        recorded by `instrumentation` to JSON and CSV files.
+        """
+
+        if not os.path.exists(config.compute['output_folder']):
+            os.makedirs(config.compute['output_folder'])
+
+        self.instrumentation.toJSON(config.compute['output_folder'] +
+                                    config.compute['report_json_file'])
+        self.instrumentation.toCSV(config.compute['output_folder'] +
+                                   config.compute['report_csv_file'])
+
+    def startPersonalized(self, seed_sets: list) -> np.ndarray:
+        """Function to compute personalized PaperRanks for sets of seed papers
+        (e.g. all of the papers in a MeSH area) in a single pass. The
+        scholar teleports uniformly to the seed papers of each set.
+
+        Arguments:
+            seed_sets {list} -- List of K lists of seed paper IDs.
+
+        Returns:
+            np.ndarray -- N x K matrix of PaperRanks, with row indexes
+                          corresponding to the seen array.
+        """
+
+        logging.info('Starting personalized PaperRank computation for {0} \
+            IDs and {1} seed sets'.format(self.N, len(seed_sets)))
+
+        markov_matrix = MarkovTransitionMatrix(
+            r=self.r, seen=self.seen, id_idx_map=self.id_idx_map,
+            snapshot=self.snapshot, instrumentation=self.instrumentation)
+
+        M = markov_matrix.construct()
+
+        V = buildTeleportMatrix(id_idx_map=self.id_idx_map,
+                                seed_sets=seed_sets)
+
+        compute_engine = PersonalizedPaperRank(M, self.N)
+
+        return compute_engine.calculate(V)
@@ -0,0 +1,195 @@
+from .util import GraphSnapshot, logLoopProgress
+from ..util import config
+
+from time import time
+import logging
+import numpy as np
+
+
+class OutOfCorePaperRank:
+    def __init__(self, snapshot: GraphSnapshot, N: int=None,
+                 initial: np.array=None, callback: callable=None):
+        """Initialization logic for the OutOfCorePaperRank submodule, which
+        computes PaperRanks with power iteration over the memory-mapped
+        citations of a graph snapshot, without building the transition
+        matrix. Row blocks of `compute.block_size` IDs are streamed from the
+        snapshot in each iteration, and only O(N) vectors are kept in memory.
+
+        NOTE: All of the elements in a column of the (adjusted) transition
+              matrix have the same value; 1 / (out degree) or, for rebalanced
+              columns, 1 / (number of elements in the column). The matrix is
+              thus the citation pattern in the snapshot scaled by a vector of
+              column weights.
+
+        Arguments:
+            snapshot {GraphSnapshot} -- Graph snapshot.
+
+        Keyword Arguments:
+            N {int} -- Number of IDs (from the start of the snapshot) for
+                       which PaperRank is computed (default: {None}).
+            initial {np.array} -- Initial PaperRanks (default: {None}).
+            callback {callable} -- Function called with the iteration number
+                                   and difference (or residual) after every
+                                   iteration (default: {None}).
+        """
+
+        # Configuration variables
+        self.beta = config.compute['beta']
+        self.epsilon = config.compute['epsilon']
+        self.max_iterations = config.compute['max_iterations']
+        self.block_size = config.compute['block_size']
+        self.dtype = np.dtype(config.compute['dtype'])
+
+        # Storing input parameters
+        self.snapshot = snapshot
+        self.N = snapshot.N if N is None else min(N, snapshot.N)
+        self.initial = initial
+        self.callback = callback
+
+        # Computing column weights of the transition matrix
+        self.weights = self.__buildColumnWeights()
+
+        logging.info('Initialized OutOfCorePaperRank module with {0} IDs'
+                     .format(self.N))
+
+    def __iterBlocks(self):
+        """Generator for the row blocks of the snapshot citations, limited to
+        the first N IDs.
+
+        Yields:
+            (int, int, np.array, np.array) -- First and last row of the block,
+                                              and row (relative to the first
+                                              row) and column indexes of its
+                                              citations.
+        """
+
+        for start in range(0, self.N, self.block_size):
+            stop = min(start + self.block_size, self.N)
+
+            indptr = self.snapshot.indptr[start:stop + 1]
+            rows = np.repeat(np.arange(stop - start), np.diff(indptr))
+            cols = np.asarray(self.snapshot.indices[indptr[0]:indptr[-1]])
+
+            # Removing citations from IDs beyond N
+            if self.N < self.snapshot.N:
+                included = cols < self.N
+                rows, cols = rows[included], cols[included]
+
+            yield start, stop, rows, cols
+
+    def __buildColumnWeights(self) -> np.array:
+        """Function to compute the value of the elements of each column of the
+        transition matrix, applying the rebalancing rule of
+        `MarkovTransitionMatrix` to columns that sum to less than 1.
+
+        Returns:
+            np.array -- Column weights.
+        """
+
+        logging.info('Computing column weights for {0} IDs'.format(self.N))
+
+        # Number of elements in each column, counted up to the largest
+        # column of each block (instead of allocating N counts per block)
+        counts = np.zeros(self.N, dtype=np.int64)
+        for _, _, _, cols in self.__iterBlocks():
+            if cols.size > 0:
+                block_counts = np.bincount(cols)
+                counts[:block_counts.size] += block_counts
+
+        # Set d = 1 if out degree is 0, to avoid division by 0
+        out_degree = np.array(self.snapshot.out_degree[:self.N],
+                              dtype=np.float64)
+        out_degree[out_degree == 0.0] = 1.0
+
+        # Rebalancing columns that sum to less than 1
+        weights = 1 / out_degree
+        magnitudes = counts * weights
+        rebalance = (magnitudes < 1.0) & (magnitudes != 0)
+        weights[rebalance] = 1 / counts[rebalance]
+
+        logging.info('Rebalanced {0} columns'.format(np.sum(rebalance)))
+
+        return weights.astype(self.dtype)
+
+    def __powerStep(self, scores: np.array) -> (np.array, float):
+        """Function to compute one step of the random scholar's Markov
+        process, streaming the row blocks of the citations.
+
+        Arguments:
+            scores {np.array} -- Current PaperRanks.
+
+        Returns:
+            (np.array, float) -- PaperRanks after one step, and difference.
+        """
+
+        # Contribution of each paper to each of the papers it cites
+        contribution = self.weights * scores
+
+        scores_new = np.empty(self.N, dtype=self.dtype)
+
+        # counter
+        last_check = 0
+
+        for start, stop, rows, cols in self.__iterBlocks():
+            scores_new[start:stop] = self.beta * np.bincount(
+                rows, weights=contribution[cols], minlength=stop - start)
+
+            # Log progress
+            last_check = logLoopProgress(stop, last_check, self.N,
+                                         'Out-of-core PaperRank')
+
+        # Compute and redistribute leaked PaperRank from dangling papers
+        leaked_pr = 1 - np.sum(scores_new, dtype=np.float64)
+        if leaked_pr > 0:
+            scores_new += float(leaked_pr / self.N)
+
+        difference = np.sum(np.absolute(scores_new - scores),
+                            dtype=np.float64)
+
+        return scores_new, difference
+
+    def calculate(self) -> np.array:
+        """Function to compute the stable solution to the random scholar's
+        Markov process with power iteration. The number of iterations, wall
+        time and final residual are stored in `iterations`, `runtime` and
+        `residual`.
+
+        Returns:
+            np.array -- Array of PaperRanks, with indexes corresponding to
+                        the snapshot IDs.
+        """
+
+        logging.info('Computing out-of-core PaperRank solution for {0} IDs'
+                     .format(self.N))
+
+        # Initial PaperRanks
+        if self.initial is None:
+            scores = np.repeat(1 / self.N, self.N).astype(self.dtype)
+        else:
+            logging.info('Starting from initial PaperRanks')
+            scores = self.initial.astype(self.dtype)
+
+        start = time()
+        stable = False
+        count = 0
+
+        while not stable and count < self.max_iterations:
+            scores, difference = self.__powerStep(scores)
+            stable = difference < self.epsilon
+            count += 1
+
+            logging.info('Completed {0} compute iterations with difference \
+                {1}'.format(count, difference))
+
+            if self.callback is not None:
+                self.callback(count, difference)
+
+        self.iterations = count
+        self.runtime = time() - start
+        self.residual = difference
+
+        logging.info('Computed stable PaperRanks for {0} IDs in {1} \
+            iterations and {2:.3f}s with residual {3}'.format(
+                self.N, self.iterations, self.runtime, self.residual))
+
+        return scores
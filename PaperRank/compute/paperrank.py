@@ -1,74 +1,97 @@
+from .solvers import SOLVERS
+from .util import ParallelMatrix
 from ..util import config
 
 from scipy import sparse
+from time import time
 import logging
 import numpy as np
 
 
 class StablePaperRank:
-    def __init__(self, M: sparse.csc_matrix, N: int):
+    def __init__(self, M: sparse.csc_matrix, N: int,
+                 initial: np.array=None, callback: callable=None):
         """Initialization logic for the StablePaperRank submodule.
         
         Arguments:
             M {sparse.csc_matrix} -- Stochastic (Markov transition) matrix.
             N {int} -- Number of elements for which PaperRank is computed.
+
+        Keyword Arguments:
+            initial {np.array} -- Initial PaperRanks (e.g. from a previous
+                                  run) to start the iteration from, instead
+                                  of the uniform vector (default: {None}).
+            callback {callable} -- Function called with the iteration number
+                                   and difference (or residual) after every
+                                   iteration (default: {None}).
         """
 
         # Configuration variables
         self.beta = config.compute['beta']
         self.epsilon = config.compute['epsilon']
+        self.solver = config.compute['solver']
+        self.max_iterations = config.compute['max_iterations']
+        self.workers = config.compute['workers']
+
+        if self.solver not in SOLVERS:
+            logging.error('Invalid solver {0}, must be one of {1}'
+                          .format(self.solver, list(SOLVERS.keys())))
+            raise RuntimeError('Invalid PaperRank solver.')
 
         # Storing input parameters
         self.M = M
         self.N = N
+        self.initial = initial
+        self.callback = callback
 
         logging.info('Initialized StablePaperRank module with {0} IDs'
                      .format(self.N))
 
     def calculate(self) -> np.array:
         """Function to compute the stable solution to the random scholar's
-        Markov process. This function implements an adaptation of the power
+        Markov process. The solver is selected with `compute.solver` (see
+        `solvers.SOLVERS`); the default is an adaptation of the power
         iteration method for computing the stationary distrbution for the
         random scholar's first order Markov process.
 
+        The number of iterations, wall time and final residual of the solver
+        are stored in `iterations`, `runtime` and `residual`.
+
         Returns:
             np.array -- Array of PaperRanks, with indexes corresponding to M.
         """
 
-        logging.info('Computing stable PaperRank solution for {0} IDs'
-                     .format(self.N))
+        logging.info('Computing stable PaperRank solution for {0} IDs with \
+            solver {1}'.format(self.N, self.solver))
 
-        # Flags
-        scores_old = np.repeat(1 / self.N, self.N)
-        stable = False
-        count = 0
+        # Initial PaperRanks, in the precision of M
+        if self.initial is None:
+            scores = np.repeat(1 / self.N, self.N).astype(self.M.dtype)
+        else:
+            logging.info('Starting from initial PaperRanks')
+            scores = self.initial.astype(self.M.dtype)
 
-        # Iterate until solution is stable
-        while not stable:
-            # Compute unadjusted PaperRank
-            scores_unadjusted = self.beta * self.M.dot(scores_old)
+        start = time()
 
-            # Compute and redistribute leaked PaperRank from dangling papers
-            leaked_pr = 1 - np.sum(scores_unadjusted)
-            if leaked_pr > 0:
-                scores = scores_unadjusted + (leaked_pr / self.N)
+        # Splitting matrix/vector products across threads
+        M = ParallelMatrix(self.M, self.workers) if self.workers > 1 \
+            else self.M
 
-            # Compute difference between new scores and old scores
-            difference = np.sum(np.absolute(scores - scores_old))
-            # Update stable flag
-            stable = difference < self.epsilon
+        try:
+            scores, self.iterations, self.residual = SOLVERS[self.solver](
+                M=M, initial=scores, beta=self.beta, epsilon=self.epsilon,
+                max_iterations=self.max_iterations, callback=self.callback)
+        finally:
+            # Stopping the threads, also when the solver raises
+            if self.workers > 1:
+                M.close()
 
-            # Update scores_old, increment count
-            scores_old = scores
-            count += 1
+        self.runtime = time() - start
 
-            # Logging
-            logging.info('Completed {0} compute iterations with difference {1}'
-                         .format(count, difference))
+        scores = scores.astype(self.M.dtype, copy=False)
 
-        logging.info('Computed stable PaperRanks for {0} IDs in {1} iterations'
-                     .format(self.N, count))
+        logging.info('Computed stable PaperRanks for {0} IDs in {1} \
+            iterations and {2:.3f}s with residual {3}'.format(
+                self.N, self.iterations, self.runtime, self.residual))
 
-        # Return latest scores (updated in the loop)
-        return scores_old
-    
\ No newline at end of file
+        return scores
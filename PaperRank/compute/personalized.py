@@ -0,0 +1,143 @@
+from .util import IdIndex
+from ..util import config
+
+from scipy import sparse
+from time import time
+import logging
+import numpy as np
+
+
+def buildTeleportMatrix(id_idx_map: IdIndex, seed_sets: list) -> np.ndarray:
+    """Function to build the personalization (teleport) vectors for sets of
+    seed papers, as the columns of an N x K matrix. Each column is uniform
+    over the seed papers of the set that are indexed.
+
+    Arguments:
+        id_idx_map {IdIndex} -- ID -> Index map with vectorized lookup.
+        seed_sets {list} -- List of K lists of seed paper IDs.
+
+    Raises:
+        RuntimeError -- Raised when none of the IDs of a set are indexed.
+
+    Returns:
+        np.ndarray -- N x K matrix of personalization vectors.
+    """
+
+    V = np.zeros((len(id_idx_map), len(seed_sets)), dtype=np.float64)
+
+    for k, seeds in enumerate(seed_sets):
+        idx = id_idx_map.lookup(np.array(seeds))
+        idx = np.unique(idx[idx != -1])
+
+        if idx.size == 0:
+            logging.error('No seed papers of set {0} are indexed'.format(k))
+            raise RuntimeError('Empty personalization vector.')
+
+        V[idx, k] = 1 / idx.size
+
+    return V
+
+
+class PersonalizedPaperRank:
+    def __init__(self, M: sparse.csr_matrix, N: int):
+        """Initialization logic for the PersonalizedPaperRank submodule, which
+        computes PaperRanks for K personalization (teleport) vectors at once.
+        The K PaperRank vectors are iterated together as an N x K dense
+        block, with one sparse matrix / dense matrix product per iteration.
+
+        Arguments:
+            M {sparse.csr_matrix} -- Stochastic (Markov transition) matrix.
+            N {int} -- Number of elements for which PaperRank is computed.
+        """
+
+        # Configuration variables
+        self.beta = config.compute['beta']
+        self.epsilon = config.compute['epsilon']
+        self.max_iterations = config.compute['max_iterations']
+
+        # Storing input parameters
+        self.M = M
+        self.N = N
+
+        logging.info('Initialized PersonalizedPaperRank module with {0} IDs'
+                     .format(self.N))
+
+    def calculate(self, V: np.ndarray) -> np.ndarray:
+        """Function to compute the stable solutions to the random scholar's
+        Markov process, where the scholar teleports (and leaves dangling
+        papers) according to each of the personalization vectors in V. Each
+        column is iterated until its own difference is below epsilon, after
+        which it is no longer updated.
+
+        The number of iterations of each column, wall time and final residual
+        of each column are stored in `iterations`, `runtime` and `residual`.
+
+        Arguments:
+            V {np.ndarray} -- N x K matrix of personalization vectors.
+
+        Returns:
+            np.ndarray -- N x K matrix of PaperRanks, with row indexes
+                          corresponding to M.
+        """
+
+        K = V.shape[1]
+
+        logging.info('Computing {0} personalized PaperRank solutions for {1} \
+            IDs'.format(K, self.N))
+
+        V = V.astype(self.M.dtype)
+
+        # Stable PaperRanks, by column
+        result = np.empty(V.shape, dtype=V.dtype)
+
+        # PaperRanks and personalization vectors of the columns that have
+        # not converged, starting from the personalization vectors
+        active = np.arange(K)
+        scores = V.copy()
+        teleport = V
+
+        self.iterations = np.zeros(K, dtype=np.int64)
+        self.residual = np.zeros(K, dtype=np.float64)
+
+        start = time()
+        count = 0
+
+        while active.size > 0 and count < self.max_iterations:
+            # Compute unadjusted PaperRanks
+            scores_new = self.beta * self.M.dot(scores)
+
+            # Redistribute leaked PaperRank according to the personalization
+            leaked_pr = 1 - np.sum(scores_new, axis=0, dtype=np.float64)
+            scores_new += teleport * \
+                np.clip(leaked_pr, 0, None).astype(V.dtype)
+
+            # Difference of each column
+            difference = np.sum(np.absolute(scores_new - scores), axis=0,
+                                dtype=np.float64)
+
+            scores = scores_new
+            self.iterations[active] += 1
+            self.residual[active] = difference
+            count += 1
+
+            # Removing converged columns
+            converged = difference < self.epsilon
+            if np.any(converged):
+                result[:, active[converged]] = scores[:, converged]
+                scores = scores[:, ~converged]
+                teleport = teleport[:, ~converged]
+                active = active[~converged]
+
+            logging.info('Completed {0} compute iterations with {1} of {2} \
+                columns remaining'.format(count, active.size, K))
+
+        # Columns that have not converged in max_iterations
+        result[:, active] = scores
+
+        self.runtime = time() - start
+
+        logging.info('Computed {0} personalized PaperRank solutions for {1} \
+            IDs in {2} iterations and {3:.3f}s'.format(
+                K, self.N, count, self.runtime))
+
+        return result
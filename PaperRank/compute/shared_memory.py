@@ -0,0 +1,337 @@
+from ..util import config
+
+from multiprocessing import Barrier, Process
+from scipy import sparse
+from threading import BrokenBarrierError, Event, Thread
+from time import time
+import logging
+import numpy as np
+
+try:
+    # multiprocessing.shared_memory is only available from Python 3.8
+    from multiprocessing import shared_memory
+except ImportError:
+    shared_memory = None
+
+
+# Worker commands, set by the coordinator in the control buffer
+RUN = 0
+STOP = 1
+
+# Seconds between checks of the worker processes by the coordinator
+WATCH_INTERVAL = 1
+
+
+def _attach(name: str, dtype: np.dtype, size: int) -> tuple:
+    """Function to attach to a shared memory block, and create an array
+    backed by it.
+
+    Arguments:
+        name {str} -- Name of the shared memory block.
+        dtype {np.dtype} -- Type of the array.
+        size {int} -- Number of elements in the array.
+
+    Returns:
+        (shared_memory.SharedMemory, np.array) -- Block and array.
+    """
+
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray((size,), dtype=dtype, buffer=block.buf)
+
+
+def _worker(worker_id: int, rows: (int, int), shapes: dict, names: dict,
+            beta: float, barrier: Barrier):
+    """Worker process loop. Computes its row range of each power iteration
+    step, synchronizing with the other workers and the coordinator with three
+    barriers per iteration:
+        1. Start of the iteration (the coordinator has set the command).
+        2. Unadjusted PaperRanks computed; the leaked PaperRank is the sum of
+           the partial sums of all workers.
+        3. PaperRanks redistributed, and partial differences computed.
+
+    Arguments:
+        worker_id {int} -- Index of the worker.
+        rows {(int, int)} -- First and last row computed by the worker.
+        shapes {dict} -- Type and size of each shared buffer.
+        names {dict} -- Name of the shared memory block of each buffer.
+        beta {float} -- Probability of following a citation.
+        barrier {Barrier} -- Barrier shared with the coordinator.
+    """
+
+    blocks = []
+    buffers = {}
+
+    for key, (dtype, size) in shapes.items():
+        block, buffers[key] = _attach(names[key], dtype, size)
+        blocks.append(block)
+
+    start, stop = rows
+    N = buffers['scores_0'].size
+    first, last = buffers['indptr'][start], buffers['indptr'][stop]
+
+    # Rows of the matrix computed by this worker, backed by shared memory
+    M = sparse.csr_matrix(
+        (buffers['data'][first:last], buffers['indices'][first:last],
+         buffers['indptr'][start:stop + 1] - first),
+        shape=(stop - start, N))
+
+    partial = buffers['partial'].reshape(-1, 2)
+    control = buffers['control']
+    scores = scores_new = None
+    iteration = 0
+
+    while True:
+        barrier.wait()
+
+        if control[0] == STOP:
+            break
+
+        # Scores are read from and written to alternating buffers
+        scores = buffers['scores_{0}'.format(iteration % 2)]
+        scores_new = buffers['scores_{0}'.format((iteration + 1) % 2)]
+
+        scores_new[start:stop] = M.dot(scores)
+        scores_new[start:stop] *= beta
+        partial[worker_id, 0] = np.sum(scores_new[start:stop],
+                                       dtype=np.float64)
+
+        barrier.wait()
+
+        # Redistributing leaked PaperRank from dangling papers
+        leaked_pr = 1 - np.sum(partial[:, 0])
+        if leaked_pr > 0:
+            scores_new[start:stop] += float(leaked_pr / N)
+
+        partial[worker_id, 1] = np.sum(
+            np.absolute(scores_new[start:stop] - scores[start:stop]),
+            dtype=np.float64)
+
+        barrier.wait()
+
+        iteration += 1
+
+    # Releasing arrays before closing the shared memory blocks
+    del M, scores, scores_new, partial, control
+    buffers.clear()
+    for block in blocks:
+        block.close()
+
+
+class SharedMemoryPaperRank:
+    def __init__(self, M: sparse.csr_matrix, N: int,
+                 initial: np.array=None, callback: callable=None):
+        """Initialization logic for the SharedMemoryPaperRank submodule, which
+        computes PaperRanks with power iteration split across
+        `compute.workers` processes. The matrix and the PaperRank vectors are
+        copied once to shared memory, and each process computes a range of
+        rows (with approximately the same number of nonzero elements) of
+        every iteration.
+
+        Arguments:
+            M {sparse.csr_matrix} -- Stochastic (Markov transition) matrix.
+            N {int} -- Number of elements for which PaperRank is computed.
+
+        Keyword Arguments:
+            initial {np.array} -- Initial PaperRanks (default: {None}).
+            callback {callable} -- Function called with the iteration number
+                                   and difference (or residual) after every
+                                   iteration (default: {None}).
+
+        Raises:
+            RuntimeError -- Raised when shared memory is not available.
+        """
+
+        if shared_memory is None:
+            logging.error('multiprocessing.shared_memory is not available')
+            raise RuntimeError('Shared memory compute requires Python 3.8.')
+
+        # Configuration variables
+        self.beta = config.compute['beta']
+        self.epsilon = config.compute['epsilon']
+        self.max_iterations = config.compute['max_iterations']
+        self.workers = config.compute['workers']
+        self.barrier_timeout = config.compute['barrier_timeout']
+
+        # Storing input parameters
+        self.M = M.tocsr()
+        self.N = N
+        self.initial = initial
+        self.callback = callback
+
+        logging.info('Initialized SharedMemoryPaperRank module with {0} IDs \
+            and {1} workers'.format(self.N, self.workers))
+
+    def __createBuffers(self, initial: np.array) -> (dict, dict, dict):
+        """Function to create the shared memory blocks, and copy the matrix
+        and initial PaperRanks to them.
+
+        Arguments:
+            initial {np.array} -- Initial PaperRanks.
+
+        Returns:
+            (dict, dict, dict) -- Shared memory blocks, arrays and shapes.
+        """
+
+        arrays = {
+            'data': self.M.data,
+            'indices': self.M.indices,
+            'indptr': self.M.indptr,
+            'scores_0': initial,
+            'scores_1': np.zeros(self.N, dtype=self.M.dtype),
+            'partial': np.zeros(2 * self.workers, dtype=np.float64),
+            'control': np.array([RUN], dtype=np.int64)
+        }
+
+        blocks = {}
+        buffers = {}
+        shapes = {}
+
+        for key, array in arrays.items():
+            blocks[key] = shared_memory.SharedMemory(
+                create=True, size=max(array.nbytes, 1))
+            buffers[key] = np.ndarray(array.shape, dtype=array.dtype,
+                                      buffer=blocks[key].buf)
+            buffers[key][:] = array
+            shapes[key] = (array.dtype, array.size)
+
+        return blocks, buffers, shapes
+
+    def __watch(self, barrier: Barrier, processes: list, done: Event):
+        """Function checking the worker processes every `WATCH_INTERVAL`
+        seconds until `done` is set, and breaking the barrier if a worker
+        exited (e.g. with an exception, or killed when out of memory), so
+        that the coordinator and the other workers do not wait for it.
+
+        Arguments:
+            barrier {Barrier} -- Barrier shared with the workers.
+            processes {list} -- Worker processes.
+            done {Event} -- Event set when the computation is complete.
+        """
+
+        while not done.wait(WATCH_INTERVAL):
+            if any(process.exitcode is not None for process in processes):
+                barrier.abort()
+                return
+
+    def __wait(self, barrier: Barrier, processes: list):
+        """Function to wait for the workers at the barrier.
+
+        Arguments:
+            barrier {Barrier} -- Barrier shared with the workers.
+            processes {list} -- Worker processes.
+
+        Raises:
+            RuntimeError -- Raised when a worker exited, or the barrier timed
+                            out (after `compute.barrier_timeout` seconds).
+        """
+
+        try:
+            barrier.wait()
+        except BrokenBarrierError:
+            exitcodes = [process.exitcode for process in processes]
+            logging.error('Shared memory compute worker failed or timed out, \
+with exit codes {0}'.format(exitcodes))
+            raise RuntimeError('Shared memory compute worker failed.')
+
+    def calculate(self) -> np.array:
+        """Function to compute the stable solution to the random scholar's
+        Markov process with power iteration. The number of iterations, wall
+        time and final residual are stored in `iterations`, `runtime` and
+        `residual`.
+
+        Raises:
+            RuntimeError -- Raised when a worker exited, or the barrier timed
+                            out.
+
+        Returns:
+            np.array -- Array of PaperRanks, with indexes corresponding to M.
+        """
+
+        logging.info('Computing shared memory PaperRank solution for {0} IDs'
+                     .format(self.N))
+
+        # Initial PaperRanks
+        if self.initial is None:
+            initial = np.repeat(1 / self.N, self.N).astype(self.M.dtype)
+        else:
+            logging.info('Starting from initial PaperRanks')
+            initial = self.initial.astype(self.M.dtype)
+
+        start = time()
+
+        blocks, buffers, shapes = self.__createBuffers(initial)
+        names = {key: block.name for key, block in blocks.items()}
+
+        # Row ranges of the workers, balanced by number of nonzeros
+        bounds = np.searchsorted(self.M.indptr,
+                                 np.linspace(0, self.M.nnz, self.workers + 1))
+        bounds[0], bounds[-1] = 0, self.N
+
+        barrier = Barrier(self.workers + 1, timeout=self.barrier_timeout)
+        processes = [
+            Process(target=_worker,
+                    args=(i, (bounds[i], bounds[i + 1]), shapes, names,
+                          self.beta, barrier))
+            for i in range(self.workers)
+        ]
+
+        partial = buffers['partial'].reshape(-1, 2)
+        stable = False
+        difference = None
+        count = 0
+
+        done = Event()
+        watcher = Thread(target=self.__watch,
+                         args=(barrier, processes, done), daemon=True)
+
+        try:
+            for process in processes:
+                process.start()
+
+            watcher.start()
+
+            while not stable and count < self.max_iterations:
+                # Start iteration, wait for workers to complete it
+                for _ in range(3):
+                    self.__wait(barrier, processes)
+
+                difference = np.sum(partial[:, 1])
+                stable = difference < self.epsilon
+                count += 1
+
+                logging.info('Completed {0} compute iterations with \
+                    difference {1}'.format(count, difference))
+
+                if self.callback is not None:
+                    self.callback(count, difference)
+
+            # Stop workers
+            buffers['control'][0] = STOP
+            self.__wait(barrier, processes)
+
+            for process in processes:
+                process.join()
+
+            scores = np.array(buffers['scores_{0}'.format(count % 2)])
+        finally:
+            done.set()
+
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+
+            del partial
+            buffers.clear()
+            for block in blocks.values():
+                block.close()
+                block.unlink()
+
+        self.iterations = count
+        self.runtime = time() - start
+        self.residual = difference
+
+        logging.info('Computed stable PaperRanks for {0} IDs in {1} \
+            iterations and {2:.3f}s with residual {3}'.format(
+                self.N, self.iterations, self.runtime, self.residual))
+
+        return scores
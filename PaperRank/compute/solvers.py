@@ -0,0 +1,337 @@
+from .util import ParallelMatrix
+from ..util import config
+
+from scipy import sparse
+from scipy.sparse import linalg
+from inspect import signature
+import logging
+import numpy as np
+
+
+def powerStep(M: sparse.csr_matrix, scores: np.array,
+              beta: float) -> np.array:
+    """Function to compute one step of the random scholar's Markov process,
+    redistributing the PaperRank leaked from dangling papers uniformly.
+
+    Arguments:
+        M {sparse.csr_matrix} -- Stochastic (Markov transition) matrix.
+        scores {np.array} -- Current PaperRanks.
+        beta {float} -- Probability of following a citation.
+
+    Returns:
+        np.array -- PaperRanks after one step.
+    """
+
+    # Compute unadjusted PaperRank
+    scores_unadjusted = beta * M.dot(scores)
+
+    # Compute and redistribute leaked PaperRank from dangling papers,
+    # accumulating the sum in float64 to keep float32 scores stochastic
+    leaked_pr = 1 - np.sum(scores_unadjusted, dtype=np.float64)
+    if leaked_pr > 0:
+        return scores_unadjusted + float(leaked_pr / scores.size)
+
+    return scores_unadjusted
+
+
+def powerStepDifference(M: sparse.csr_matrix, scores: np.array,
+                        beta: float) -> (np.array, float):
+    """Function to compute one step of the random scholar's Markov process
+    (see `powerStep`), along with the L1 norm of the difference between the
+    new and current PaperRanks. The reductions are fused and computed in
+    parallel if M is a `ParallelMatrix`.
+
+    Arguments:
+        M {sparse.csr_matrix} -- Stochastic (Markov transition) matrix.
+        scores {np.array} -- Current PaperRanks.
+        beta {float} -- Probability of following a citation.
+
+    Returns:
+        (np.array, float) -- PaperRanks after one step, and difference.
+    """
+
+    if isinstance(M, ParallelMatrix):
+        return M.powerStep(scores, beta)
+
+    scores_new = powerStep(M, scores, beta)
+
+    return scores_new, np.sum(np.absolute(scores_new - scores),
+                              dtype=np.float64)
+
+
+def residual(M: sparse.csr_matrix, scores: np.array, beta: float) -> float:
+    """Function to compute the residual of a PaperRank vector, as the L1 norm
+    of the difference between the vector and one step of the process.
+
+    Arguments:
+        M {sparse.csr_matrix} -- Stochastic (Markov transition) matrix.
+        scores {np.array} -- PaperRanks.
+        beta {float} -- Probability of following a citation.
+
+    Returns:
+        float -- Residual of the PaperRanks.
+    """
+
+    return powerStepDifference(M, scores, beta)[1]
+
+
+def powerIteration(M: sparse.csr_matrix, initial: np.array, beta: float,
+                   epsilon: float, max_iterations: int,
+                   callback: callable=None) -> (np.array, int, float):
+    """Power iteration solver. Steps the process until the L1 norm of the
+    difference between successive PaperRank vectors is below epsilon.
+
+    Arguments:
+        M {sparse.csr_matrix} -- Stochastic (Markov transition) matrix.
+        initial {np.array} -- Initial PaperRanks.
+        beta {float} -- Probability of following a citation.
+        epsilon {float} -- Convergence threshold.
+        max_iterations {int} -- Maximum number of iterations.
+
+    Keyword Arguments:
+        callback {callable} -- Function called with the iteration number
+                               and difference after every iteration
+                               (default: {None}).
+
+    Returns:
+        (np.array, int, float) -- PaperRanks, iterations and residual.
+    """
+
+    scores_old = initial
+    stable = False
+    count = 0
+
+    # Iterate until solution is stable
+    while not stable and count < max_iterations:
+        # Compute new scores, and difference between new and old scores
+        scores, difference = powerStepDifference(M, scores_old, beta)
+        # Update stable flag
+        stable = difference < epsilon
+
+        # Update scores_old, increment count
+        scores_old = scores
+        count += 1
+
+        logging.info('Completed {0} compute iterations with difference {1}'
+                     .format(count, difference))
+
+        if callback is not None:
+            callback(count, difference)
+
+    return scores_old, count, difference
+
+
+def quadraticExtrapolation(M: sparse.csr_matrix, initial: np.array,
+                           beta: float, epsilon: float, max_iterations: int,
+                           callback: callable=None,
+                           interval: int=10) -> (np.array, int, float):
+    """Power iteration solver with periodic quadratic extrapolation (Kamvar
+    et al., 2003). Every `interval` iterations, the PaperRank vector is
+    replaced by its quadratic extrapolation from the last four iterates,
+    which removes the components along the second and third eigenvectors.
+
+    Arguments:
+        M {sparse.csr_matrix} -- Stochastic (Markov transition) matrix.
+        initial {np.array} -- Initial PaperRanks.
+        beta {float} -- Probability of following a citation.
+        epsilon {float} -- Convergence threshold.
+        max_iterations {int} -- Maximum number of iterations.
+
+    Keyword Arguments:
+        callback {callable} -- Function called with the iteration number
+                               and difference after every iteration
+                               (default: {None}).
+        interval {int} -- Iterations between extrapolations (default: {10}).
+
+    Returns:
+        (np.array, int, float) -- PaperRanks, iterations and residual.
+    """
+
+    history = [initial]
+    stable = False
+    count = 0
+
+    while not stable and count < max_iterations:
+        scores = powerStep(M, history[-1], beta)
+        count += 1
+
+        if count % interval == 0 and len(history) >= 3:
+            # Least squares fit of the coefficients of the characteristic
+            # polynomial, from the differences with the oldest iterate
+            x0, x1, x2 = history[-3:]
+            Y = np.column_stack((x1 - x0, x2 - x0))
+            gamma_1, gamma_2 = np.linalg.lstsq(Y, x0 - scores,
+                                               rcond=None)[0]
+
+            # Extrapolated vector, removing negative round-off errors
+            scores = (gamma_1 + gamma_2 + 1) * x1 + (gamma_2 + 1) * x2 + \
+                scores
+            scores = np.clip(scores, 0, None)
+            scores = scores / float(np.sum(scores, dtype=np.float64))
+
+        difference = np.sum(np.absolute(scores - history[-1]),
+                            dtype=np.float64)
+        stable = difference < epsilon
+
+        history = history[-2:] + [scores]
+
+        logging.info('Completed {0} compute iterations with difference {1}'
+                     .format(count, difference))
+
+        if callback is not None:
+            callback(count, difference)
+
+    return history[-1], count, difference
+
+
+def gaussSeidel(M: sparse.csr_matrix, initial: np.array, beta: float,
+                epsilon: float, max_iterations: int,
+                callback: callable=None) -> (np.array, int, float):
+    """Gauss-Seidel solver for the linear system (I - beta * M) y = e / N,
+    whose normalized solution y / sum(y) is the PaperRank vector. Each sweep
+    is a sparse triangular solve with the lower triangle of the system.
+
+    NOTE: As IDs are sorted from newest to oldest, and papers can only cite
+          older papers, most of M is in its lower triangle. The sweeps are
+          thus close to a direct solve.
+
+    Arguments:
+        M {sparse.csr_matrix} -- Stochastic (Markov transition) matrix.
+        initial {np.array} -- Initial PaperRanks.
+        beta {float} -- Probability of following a citation.
+        epsilon {float} -- Convergence threshold.
+        max_iterations {int} -- Maximum number of iterations.
+
+    Keyword Arguments:
+        callback {callable} -- Function called with the iteration number
+                               and difference after every iteration
+                               (default: {None}).
+
+    Returns:
+        (np.array, int, float) -- PaperRanks, iterations and residual.
+    """
+
+    N = initial.size
+    A = sparse.identity(N, dtype=M.dtype, format='csr') - beta * M.tocsr()
+    lower = sparse.tril(A, format='csr')
+    upper = sparse.triu(A, k=1, format='csr')
+    b = np.repeat(1 / N, N).astype(M.dtype)
+
+    scores_old = initial
+    y = initial
+    stable = False
+    count = 0
+
+    while not stable and count < max_iterations:
+        y = linalg.spsolve_triangular(lower, b - upper.dot(y), lower=True)
+        scores = y / float(np.sum(y, dtype=np.float64))
+
+        difference = np.sum(np.absolute(scores - scores_old),
+                            dtype=np.float64)
+        stable = difference < epsilon
+
+        scores_old = scores
+        count += 1
+
+        logging.info('Completed {0} Gauss-Seidel sweeps with difference {1}'
+                     .format(count, difference))
+
+        if callback is not None:
+            callback(count, difference)
+
+    return scores_old, count, residual(M, scores_old, beta)
+
+
+def krylov(method):
+    """Function to build a solver for the linear system
+    (I - beta * M) y = e / N with a scipy sparse Krylov `method` (e.g.
+    `linalg.bicgstab` or `linalg.gmres`). The residual tolerance is set such
+    that the L1 error of the normalized solution is below epsilon.
+
+    NOTE: The callback is passed the residual scipy computes, without extra
+          matrix/vector products: gmres reports the relative L2 norm of the
+          residual, ||b - A y||_2 / ||b||_2, after every inner iteration.
+          Other methods only pass the iterate, whose L1 residual costs a
+          product with M; it is reported every `residual_interval`
+          iterations (`compute.krylov_residual_interval`), and never if 0.
+
+    Arguments:
+        method {function} -- scipy.sparse.linalg Krylov solver.
+
+    Returns:
+        function -- PaperRank solver.
+    """
+
+    parameters = signature(method).parameters
+
+    # Relative tolerance argument name differs between scipy versions
+    tolerance = 'rtol' if 'rtol' in parameters else 'tol'
+
+    def solver(M: sparse.csr_matrix, initial: np.array, beta: float,
+               epsilon: float, max_iterations: int,
+               callback: callable=None,
+               residual_interval: int=None) -> (np.array, int, float):
+        N = initial.size
+        A = linalg.LinearOperator((N, N), dtype=M.dtype,
+                                  matvec=lambda x: x - beta * M.dot(x))
+        b = np.repeat(1 / N, N).astype(M.dtype)
+
+        if residual_interval is None:
+            residual_interval = config.compute['krylov_residual_interval']
+
+        # Counting iterations
+        count = [0]
+
+        def iterationCallback(x):
+            count[0] += 1
+
+            if callback is None:
+                return
+
+            if np.ndim(x) == 0:
+                # Relative L2 residual norm, passed by gmres
+                logging.info('Completed {0} {1} iterations with relative L2 \
+                    residual {2}'.format(count[0], method.__name__, x))
+                callback(count[0], x)
+            elif residual_interval > 0 and \
+                    count[0] % residual_interval == 0:
+                difference = np.sum(np.absolute(A.matvec(x) - b),
+                                    dtype=np.float64)
+                logging.info('Completed {0} {1} iterations with L1 residual \
+                    {2}'.format(count[0], method.__name__, difference))
+                callback(count[0], difference)
+
+        # ||y - y*||_1 <= sqrt(N) * ||r||_2 / (1 - beta), and sum(y) >= 1
+        kwargs = {
+            tolerance: epsilon * (1 - beta),
+            'atol': epsilon * (1 - beta) / np.sqrt(N)
+        }
+
+        # gmres passes the residual norm of every inner iteration
+        if 'callback_type' in parameters:
+            kwargs['callback_type'] = 'pr_norm'
+
+        y, info = method(A, b, x0=initial, maxiter=max_iterations,
+                         callback=iterationCallback, **kwargs)
+
+        if info != 0:
+            logging.warn('{0} did not converge (info {1})'
+                         .format(method.__name__, info))
+
+        # Normalizing, removing negative round-off errors
+        scores = np.clip(y, 0, None)
+        scores = scores / float(np.sum(scores, dtype=np.float64))
+
+        return scores, count[0], residual(M, scores, beta)
+
+    return solver
+
+
+# Solvers by name, selected with `compute.solver`
+SOLVERS = {
+    'power': powerIteration,
+    'quadratic': quadraticExtrapolation,
+    'gauss_seidel': gaussSeidel,
+    'bicgstab': krylov(linalg.bicgstab),
+    'gmres': krylov(linalg.gmres)
+}
@@ -1,4 +1,6 @@
-from .util import buildReverseIdxMap, getSeenIndex, logLoopProgress
+from .util import getOutDegrees, GraphSnapshot, IdIndex, Instrumentation, \
+    iterCitationEdges
+from ..util import config
 
 from redis import StrictRedis
 from scipy import sparse
@@ -8,13 +10,21 @@ import logging
 
 class MarkovTransitionMatrix:
     def __init__(self, r: StrictRedis, seen: np.array,
-                 id_idx_map: sparse.dok_matrix):
+                 id_idx_map: IdIndex, snapshot: GraphSnapshot=None,
+                 instrumentation: Instrumentation=None):
         """Initialization logic for the MarkovTransitionMatrix submodule.
         
         Arguments:
             r {StrictRedis} -- StrictRedis object for database operations.
             seen {np.array} -- Array of IDs to be iterated over.
-            id_idx_map {sparse.dok_matrix} -- ID -> Index map with O(1) lookup.
+            id_idx_map {IdIndex} -- ID -> Index map with vectorized lookup.
+
+        Keyword Arguments:
+            snapshot {GraphSnapshot} -- Graph snapshot to be read instead of
+                                        Redis (default: {None}).
+            instrumentation {Instrumentation} -- Instrumentation recording
+                                                 the construction stages
+                                                 (default: {None}).
         """
 
         # Storing input parameters
@@ -22,6 +32,13 @@ class MarkovTransitionMatrix:
         self.seen = seen
         self.N = self.seen.size
         self.id_idx_map = id_idx_map
+        self.snapshot = snapshot
+        self.instrumentation = instrumentation if instrumentation \
+            else Instrumentation()
+
+        # Configuration variables
+        self.batch_size = config.compute['batch_size']
+        self.dtype = np.dtype(config.compute['dtype'])
 
     def construct(self) -> sparse.csr_matrix:
         """Function to construct the Markov matrix for the PaperRank
@@ -32,18 +49,19 @@ class MarkovTransitionMatrix:
             scipy.sparse.csr_matrix -- Stochastic matrix for citation graph.
         """
         # Creating transition matrix
-        logging.info('Initializing {0}x{0} transition matrix'.format(self.N))
-        M = sparse.dok_matrix((self.N, self.N), dtype=np.float)
-
-        # Computing unadjusted transition matrix
-        M = self.__buildUnadjustedMatrix(M)
+        logging.info('Initializing {0}x{0} {1} transition matrix'
+                     .format(self.N, self.dtype))
 
-        # Casting to sparse.csc_matrix (compressed sparse column matrix)
-        # for increased efficiency of column operations
-        M = M.tocsc()
+        # Computing unadjusted transition matrix, as a sparse.csc_matrix
+        # (compressed sparse column matrix) for increased efficiency of
+        # column operations
+        with self.instrumentation.stage('build_matrix') as stage:
+            M = self.__buildUnadjustedMatrix()
+            stage['items'] = M.nnz
 
         # Adjusting transition matrix
-        M = self.__adjustTransitionMatrix(M)
+        with self.instrumentation.stage('adjust_matrix', items=M.nnz):
+            M = self.__adjustTransitionMatrix(M)
 
         # Casting to sparse.csr_matrix (compressed sparse row matrix)
         # for increased efficiency of matrix/vector products
@@ -51,50 +69,47 @@ class MarkovTransitionMatrix:
 
         return M
 
-    def __buildUnadjustedMatrix(self, M: sparse.dok_matrix) \
-            -> sparse.dok_matrix:
+    def __buildUnadjustedMatrix(self) -> sparse.csc_matrix:
         """Function to build the unadjusted transition matrix. That is, it
         builds a transition matrix but does not guarantee that it is
         column stochastic.
+
+        Citations and out degrees are read from the graph snapshot if one is
+        provided, and otherwise fetched from Redis in batches of `batch_size`
+        IDs. The matrix is assembled from row/column/value arrays with a
+        single conversion from the COO format.
         
         Returns:
-            sparse.dok_matrix -- Unadjusted Markov transition matrix.
+            sparse.csc_matrix -- Unadjusted Markov transition matrix.
         """
 
         logging.info('Building unadjusted transition matrix')
 
-        # counter
-        last_check = 0
-
-        for i in range(self.N):
-            # Isolate current ID
-            paper_id = str(self.seen[i])
-
-            # Getting inbound citations
-            inbound_list = eval(self.r.hget('IN', paper_id))
-
-            # Iterate throug inbound citations
-            for inbound in inbound_list:
-                # Compute position in matrix (if exists)
-                try:
-                    j = getSeenIndex(self.id_idx_map, inbound)
-                except IndexError:
-                    # If the ID is not seen, log and skip it
-                    logging.warn('Inbound citation {0} for paper {1} not \
-                        indexed'.format(inbound, paper_id))
-                    continue
-
-                # Get out degree
-                d = float(self.r.hget('OUT_DEGREE', inbound).decode('utf-8'))
-                # Set d = 1 if out degree is 0, to avoid division by 0
-                d = 1.0 if d == 0.0 else d
-                
-                # Set value in transition matrix
-                M[i, j] = 1 / d
-            
-            # Log progress
-            last_check = logLoopProgress(i, last_check, self.N,
-                                         'Unadjusted transition matrix')
+        if self.snapshot is None:
+            # Out degree of every ID, by index
+            out_degree = getOutDegrees(r=self.r, seen=self.seen,
+                                       batch_size=self.batch_size)
+
+            # Matrix coordinates of each citation
+            edges = list(iterCitationEdges(r=self.r, seen=self.seen,
+                                           id_idx_map=self.id_idx_map,
+                                           batch_size=self.batch_size))
+            rows = np.concatenate([i[0] for i in edges] + [[]])
+            cols = np.concatenate([i[1] for i in edges] + [[]])
+        else:
+            out_degree = np.array(self.snapshot.out_degree[:self.N])
+            rows, cols = self.snapshot.edges(limit=self.N)
+
+        # Set d = 1 if out degree is 0, to avoid division by 0
+        out_degree = out_degree.astype(np.float64)
+        out_degree[out_degree == 0.0] = 1.0
+
+        # Transition probability of each citation is 1 / out degree
+        values = 1 / out_degree[cols.astype(np.int64)]
+
+        M = sparse.coo_matrix((values, (rows, cols)),
+                              shape=(self.N, self.N),
+                              dtype=self.dtype).tocsc()
 
         logging.info('Built unadjusted Markov transition matrix with {0} \
             elements'.format(M.nnz))
@@ -105,6 +120,10 @@ class MarkovTransitionMatrix:
             -> sparse.csc_matrix:
         """Function to compute the adjusted Markov transition matrix, given the
         unadjusted matrix. This method enforces column stochastic behavior.
+
+        Every nonzero column with a sum below 1 is rebalanced so that each of
+        its nonzero elements is 1 / (number of nonzeros in the column). This
+        is done in a single pass over the CSC data array.
         
         Returns:
             sparse.csc_matrix -- Adjusted Markov transition matrix.
@@ -112,33 +131,21 @@ class MarkovTransitionMatrix:
 
         logging.info('Building adjusted transition matrix')
 
-        # counter
-        last_check = 0
-
-        logging.info('Computing sum of columns of M')
-        magnitues = M.sum(axis=0)
+        logging.info('Computing sum and number of nonzeros of columns of M')
+        magnitudes = np.asarray(M.sum(axis=0)).ravel()
+        counts = np.diff(M.indptr)
 
-        logging.info('Iterating through each column, rebalancing')
+        # Columns to be rebalanced
+        rebalance = (magnitudes < 1.0) & (magnitudes != 0)
 
-        # Iterate through each column
-        for i in range(self.N):
-            # Isolating magnitude
-            magnitude = magnitues[0, i]
+        logging.info('Rebalancing {0} columns'.format(np.sum(rebalance)))
 
-            # If criteria are satisfied, redistribute probabilities
-            if (magnitude < 1.0) and (magnitude != 0):
-                count = M[:, i].nnz
+        # Column of every element in the data array
+        columns = np.repeat(np.arange(self.N), counts)
 
-                # Isolate nonzero indezes
-                nonzero_idx = M[:, i].nonzero()[0]
-
-                # Update indexes with balanced probabilities
-                for idx in nonzero_idx:
-                    M[idx, i] = 1 / count
-        
-            # Log progress
-            last_check = logLoopProgress(i, last_check, self.N,
-                                         'Stable transition matrix')
+        # Update elements in rebalanced columns with balanced probabilities
+        mask = rebalance[columns]
+        M.data[mask] = 1 / counts[columns[mask]]
         
         logging.info('Built adjusted Markov transition matrix with {0} \
             elements'.format(M.nnz))
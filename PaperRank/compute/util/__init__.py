@@ -1,4 +1,10 @@
 from .build_out_degree import buildOutDegreeMap
+from .citations import countCitations, getOutDegrees, iterCitationEdges
 from .export import Export
 from .helpers import logLoopProgress
-from .id_management import buildIdList, buildReverseIdxMap, getSeenIndex
+from .instrumentation import Instrumentation
+from .id_management import buildIdList, buildReverseIdxMap, getSeenIndex, \
+    IdIndex
+from .snapshot import exportSnapshot, GraphSnapshot
+from .warm_start import buildInitialScores
+from .parallel_matrix import ParallelMatrix
@@ -1,54 +1,71 @@
+from .citations import countCitations
 from .helpers import logLoopProgress
 
 from redis import StrictRedis
 import logging
-import numpy as np
 
 
-def buildOutDegreeMap(r: StrictRedis):
+def buildOutDegreeMap(r: StrictRedis, batch_size: int=10000):
     """Function to build the out degree map for the citations in the 'OUT'
     database in Redis.
+
+    The 'OUT' database is walked with HSCAN in batches of (approximately)
+    `batch_size` IDs, so that it is never held in memory. For each batch,
+    the IDs without an out degree are found with a single HMGET on
+    'OUT_DEGREE', and their out degrees (counted from the stored citation
+    lists) are written with a single pipelined HMSET.
     
     Arguments:
         r {StrictRedis} -- StrictRedis object for database operations.
+
+    Keyword Arguments:
+        batch_size {int} -- Number of IDs scanned per database call.
+                            (default: {10000})
     """
 
     # Check if out degree map refresh is necessary, if not return
-    if r.hlen('OUT') == r.hlen('OUT_DEGREE'):
+    out_count = r.hlen('OUT')
+
+    if out_count == r.hlen('OUT_DEGREE'):
         logging.info('No difference found between OUT and OUT_DEGREE')
         return
 
     logging.info('Difference found between OUT and OUT_DEGREE, building map')
 
-    logging.info('Copying OUT and OUT_DEGREE keys for comparison')
+    # Progress tracking
+    count = 0
+    missing_count = 0
+    last_check = 0
+    cursor = 0
 
-    # Get list of elements in OUT and OUT_DEGREE
-    out_list = [i.decode('utf-8') for i in r.hkeys('OUT')]
-    outdeg_list = [i.decode('utf-8') for i in r.hkeys('OUT_DEGREE')]
+    pipe = r.pipeline(transaction=False)
 
-    # Isolate elements that do not have OUT_DEGREE
-    missing = np.setdiff1d(out_list, outdeg_list)
-    missing_count = missing.size
+    while True:
+        cursor, batch = r.hscan('OUT', cursor=cursor, count=batch_size)
 
-    logging.info('Building out degree map for {0} IDs'.format(missing_count))
+        if len(batch) > 0:
+            ids = list(batch.keys())
 
-    # Progress tracking
-    count = 0
-    last_check = 0
+            # Out degrees of IDs that do not have OUT_DEGREE
+            out_degree = {
+                i: countCitations(batch[i])
+                for i, d in zip(ids, r.hmget('OUT_DEGREE', ids))
+                if d is None
+            }
+
+            if len(out_degree) > 0:
+                pipe.hmset('OUT_DEGREE', out_degree)
+                pipe.execute()
+
+            count += len(ids)
+            missing_count += len(out_degree)
+
+            # Log every increment
+            last_check = logLoopProgress(count, last_check, out_count,
+                                         'Outbound citation map')
+
+        if int(cursor) == 0:
+            break
 
-    # Iterating through every element
-    for missing_id in missing:
-        # Defining out degree
-        out_degree = {
-            missing_id: len(eval(r.hget('OUT', missing_id)))
-        }
-        # Add to database
-        r.hmset('OUT_DEGREE', out_degree)
-        # Increment count
-        count += 1
-        # Log every increment
-        last_check = logLoopProgress(count, last_check, missing_count,
-                                     'Outbound citation map')
-
-    logging.info('Finished building out degree map for {0} IDs'.format(
-        r.hlen('OUT_DEGREE')))
+    logging.info('Finished building out degree map for {0} IDs ({1} new)'
+                 .format(r.hlen('OUT_DEGREE'), missing_count))
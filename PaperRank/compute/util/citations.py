@@ -0,0 +1,90 @@
+from .helpers import logLoopProgress
+from .id_management import IdIndex
+from ...util import countCitations, decodeCitations
+
+from redis import StrictRedis
+import logging
+import numpy as np
+
+
+def getOutDegrees(r: StrictRedis, seen: np.array,
+                  batch_size: int) -> np.array:
+    """Function to build an array of out degrees, with indexes corresponding
+    to the seen array. Out degrees are fetched from the 'OUT_DEGREE' database
+    in batches.
+
+    Arguments:
+        r {StrictRedis} -- StrictRedis object for database operations.
+        seen {np.array} -- Array of IDs for which out degrees are fetched.
+        batch_size {int} -- Number of IDs fetched per database call.
+
+    Returns:
+        np.array -- Array of out degrees.
+    """
+
+    N = seen.size
+
+    logging.info('Fetching out degrees for {0} IDs'.format(N))
+
+    out_degree = np.zeros(N, dtype=np.int64)
+
+    for start in range(0, N, batch_size):
+        batch = [str(i) for i in seen[start:start + batch_size]]
+        out_degree[start:start + len(batch)] = np.array(
+            r.hmget('OUT_DEGREE', batch), dtype=np.int64)
+
+    return out_degree
+
+
+def iterCitationEdges(r: StrictRedis, seen: np.array, id_idx_map: IdIndex,
+                      batch_size: int):
+    """Generator for the inbound citations of the IDs in the seen array, as
+    (row, column) index pairs; a citation from paper `seen[j]` to paper
+    `seen[i]` is yielded as (i, j). Inbound citations are fetched from the
+    'IN' database in batches of `batch_size` IDs, and each batch is yielded
+    sorted by row and column, without duplicates. Citations from IDs that
+    are not indexed are skipped.
+
+    Arguments:
+        r {StrictRedis} -- StrictRedis object for database operations.
+        seen {np.array} -- Array of IDs to be iterated over.
+        id_idx_map {IdIndex} -- ID -> Index map with vectorized lookup.
+        batch_size {int} -- Number of IDs fetched per database call.
+
+    Yields:
+        (np.array, np.array) -- Row and column indexes of a batch.
+    """
+
+    N = seen.size
+
+    # counter
+    last_check = 0
+
+    for start in range(0, N, batch_size):
+        # Isolate current batch of IDs
+        batch = [str(i) for i in seen[start:start + batch_size]]
+
+        # Getting inbound citations for the batch
+        inbound_lists = [decodeCitations(i) for i in r.hmget('IN', batch)]
+        inbound = np.concatenate(inbound_lists)
+
+        # Compute positions in matrix
+        rows = start + np.repeat(np.arange(len(batch)),
+                                 [i.size for i in inbound_lists])
+        cols = id_idx_map.lookup(inbound)
+
+        # If IDs are not seen, log and skip them
+        indexed = cols != -1
+        if not np.all(indexed):
+            logging.warn('{0} inbound citations in batch starting at {1} \
+                not indexed'.format(np.sum(~indexed), batch[0]))
+
+        # Removing duplicate citations
+        edges = np.unique(np.array([rows[indexed], cols[indexed]],
+                                   dtype=np.int64).reshape(2, -1), axis=1)
+
+        yield edges[0], edges[1]
+
+        # Log progress
+        last_check = logLoopProgress(start + len(batch), last_check, N,
+                                     'Inbound citation')
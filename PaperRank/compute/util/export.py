@@ -1,7 +1,11 @@
 from .helpers import logLoopProgress
+from .instrumentation import Instrumentation
 from ...util import config
 
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from functools import wraps
+from multiprocessing import get_all_start_methods, get_context
+from time import time
 from redis import StrictRedis
 from scipy import sparse
 import logging
@@ -9,6 +13,72 @@ import os
 import pandas as pd
 import numpy as np
 
+try:
+    # pyarrow is only required for the Parquet and Arrow IPC exports
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+# Redis keys of the PaperRanks, and of their sorted set (for top-N queries)
+STAGING_KEY = 'PaperRank:STAGING'
+ZSET_KEY = 'PaperRank:ZSET'
+ZSET_STAGING_KEY = 'PaperRank:ZSET:STAGING'
+
+# Export sinks, and the corresponding `Export` methods
+SINKS = {
+    'redis': 'toRedis',
+    'csv': 'toCSV',
+    'excel': 'toExcel',
+    'parquet': 'toParquet',
+    'arrow': 'toArrow',
+    'serialized': 'toSerialized'
+}
+
+# File sinks, run in forked worker processes, as the pandas writers hold the
+# GIL; the 'redis' sink waits on the network, and runs in a thread
+FILE_SINKS = ['csv', 'excel', 'parquet', 'arrow', 'serialized']
+
+# `Export` object and transition matrix of the file sinks, inherited by the
+# forked worker processes (instead of pickling them for each sink)
+_file_export = None
+
+
+def _exportSink(export: 'Export', sink: str,
+                transition_matrix: sparse.csr_matrix,
+                instrumentation: Instrumentation) -> dict:
+    kwargs = {}
+    if sink == 'serialized':
+        kwargs['transition_matrix'] = transition_matrix
+
+    with instrumentation.stage('export_' + sink, items=export.N):
+        start = time()
+        written = getattr(export, SINKS[sink])(**kwargs)
+
+    return {'runtime': time() - start, 'bytes': written}
+
+
+def _exportFileSink(sink: str) -> (dict, dict):
+    """Function exporting the PaperRanks to a file sink, in a forked worker
+    process, from the `Export` object and transition matrix in
+    `_file_export`.
+
+    Arguments:
+        sink {str} -- Name of the sink.
+
+    Returns:
+        (dict, dict) -- Runtime and bytes written, and the stage record.
+    """
+
+    export, transition_matrix = _file_export
+
+    instrumentation = Instrumentation()
+    stats = _exportSink(export, sink, transition_matrix, instrumentation)
+
+    return stats, instrumentation.stages[0]
+
 
 class _Decorators:
     @classmethod
@@ -19,9 +89,9 @@ class _Decorators:
 
         @wraps(decorated)
         def wrapper(*args, **kwargs):
-            if not os.path.exists(config.compute['output_folder']):
-                os.makedirs(config.compute['output_folder'])
-            decorated(*args, **kwargs)
+            # Sinks may run concurrently, another sink may create it first
+            os.makedirs(config.compute['output_folder'], exist_ok=True)
+            return decorated(*args, **kwargs)
         return wrapper
 
 
@@ -44,31 +114,187 @@ class Export:
         # Parsing PaperRank
         self.__parsePaperRank()
 
-    def toRedis(self):
+    def start(self, sinks: list=None,
+              transition_matrix: sparse.csr_matrix=None,
+              instrumentation: Instrumentation=None) -> dict:
+        """Function to export the PaperRanks to several sinks concurrently.
+        File sinks (see `FILE_SINKS`) run in forked worker processes (up to
+        one per core), as the pandas writers hold the GIL, and the 'redis'
+        sink runs in a thread. Without `fork` (e.g. on Windows), every sink
+        runs in a thread.
+
+        NOTE: Exports must not be started concurrently, as the worker
+              processes read the exported PaperRanks from a module variable.
+
+        Keyword Arguments:
+            sinks {list} -- Names of the sinks (see `SINKS`). If not
+                            provided, `compute.export_sinks` is used
+                            (default: {None}).
+            transition_matrix {sparse.csr_matrix} -- Transition matrix for
+                                                     the 'serialized' sink
+                                                     (default: {None}).
+            instrumentation {Instrumentation} -- Instrumentation recording a
+                                                 stage per sink
+                                                 (default: {None}).
+
+        Raises:
+            RuntimeError -- Raised when a sink is invalid.
+
+        Returns:
+            dict -- Runtime (in seconds) and bytes written, by sink.
+        """
+
+        if sinks is None:
+            sinks = config.compute['export_sinks']
+
+        invalid = [i for i in sinks if i not in SINKS]
+
+        if len(invalid) > 0:
+            logging.error('Invalid export sinks {0}'.format(invalid))
+            raise RuntimeError('Invalid export sinks.')
+
+        if instrumentation is None:
+            instrumentation = Instrumentation()
+
+        global _file_export
+
+        if 'fork' in get_all_start_methods():
+            file_sinks = [i for i in sinks if i in FILE_SINKS]
+        else:
+            file_sinks = []
+
+        thread_sinks = [i for i in sinks if i not in file_sinks]
+
+        logging.info('Exporting PaperRanks to {0}'.format(', '.join(sinks)))
+
+        start = time()
+        futures = {}
+
+        if len(file_sinks) > 0:
+            _file_export = (self, transition_matrix)
+
+            # Forking the worker processes before starting any thread
+            processes = ProcessPoolExecutor(
+                max_workers=min(len(file_sinks), os.cpu_count() or 1),
+                mp_context=get_context('fork'))
+            futures.update({i: processes.submit(_exportFileSink, i)
+                            for i in file_sinks})
+
+        try:
+            with ThreadPoolExecutor(max_workers=max(len(thread_sinks), 1)) \
+                    as executor:
+                futures.update({i: executor.submit(_exportSink, self, i,
+                                                   transition_matrix,
+                                                   instrumentation)
+                                for i in thread_sinks})
+
+                report = {}
+
+                for sink in sinks:
+                    report[sink] = futures[sink].result()
+
+                    if sink in file_sinks:
+                        # Stage recorded in the worker process
+                        report[sink], record = report[sink]
+                        instrumentation.stages.append(record)
+        finally:
+            if len(file_sinks) > 0:
+                processes.shutdown()
+                _file_export = None
+
+        for sink, stats in report.items():
+            logging.info('Exported PaperRanks to {0} in {1:.3f}s ({2} \
+                bytes)'.format(sink, stats['runtime'], stats['bytes']))
+
+        logging.info('Exported PaperRanks in {0:.3f}s'.format(time() - start))
+
+        return report
+
+    def toRedis(self, zset: bool=None) -> int:
         """Function to store the parsed PaperRanks in Redis.
+
+        PaperRanks are written with pipelined batches of `batch_size` IDs to
+        a staging key, which is then renamed to 'PaperRank' atomically, so
+        that readers never see a partially updated (or mixed) 'PaperRank'
+        database. PaperRanks are optionally also written to the
+        'PaperRank:ZSET' sorted set, for top-N queries; otherwise, the sorted
+        set of a previous run is deleted.
+
+        Keyword Arguments:
+            zset {bool} -- Toggle writing the 'PaperRank:ZSET' sorted set. If
+                           not provided, `compute.redis_zset` is used
+                           (default: {None}).
+
+        Returns:
+            int -- Number of bytes of PubMed IDs and PaperRanks written.
         """
 
-        # counter
+        if zset is None:
+            zset = config.compute['redis_zset']
+
+        if self.N == 0:
+            logging.warn('No PaperRanks to write to Redis')
+            return 0
+
+        batch_size = config.compute['batch_size']
+
+        pmids = self.pr_parsed['PubMed ID'].values.tolist()
+        prs = self.pr_parsed['PaperRank'].values.tolist()
+
+        # Clearing staging keys of an interrupted export
+        self.r.delete(STAGING_KEY, ZSET_STAGING_KEY)
+
+        logging.info('Writing {0} PaperRanks to Redis in batches of {1}'
+                     .format(self.N, batch_size))
+
+        # counters
         last_check = 0
+        written = 0
+
+        pipe = self.r.pipeline(transaction=False)
+
+        for i in range(0, self.N, batch_size):
+            batch = list(zip(pmids[i:i + batch_size],
+                             prs[i:i + batch_size]))
+
+            pipe.hmset(STAGING_KEY, dict(batch))
 
-        for i in range(self.N):
-            # Isolating row of dataframe
-            row = self.pr_parsed.iloc[i]
+            if zset:
+                # ZADD with positional (score, member) pairs, independently
+                # of the redis-py `zadd` signature
+                pairs = [j for pmid, pr in batch for j in (pr, pmid)]
+                pipe.execute_command('ZADD', ZSET_STAGING_KEY, *pairs)
 
-            # Extracting PubMed ID and corresponding PaperRank
-            pmid = row['PubMed ID']
-            pr = row['PaperRank']
+            pipe.execute()
 
-            # Add to PaperRank redis database
-            self.r.hmset('PaperRank', {pmid: pr})
+            written += sum(len(str(j)) for pair in batch for j in pair)
 
             # Log progress
             last_check = logLoopProgress(i, last_check, self.N,
                                          'PaperRank redis insertion')
-    
+
+        # Swapping the staging keys in, in a single transaction
+        pipe = self.r.pipeline(transaction=True)
+        pipe.rename(STAGING_KEY, 'PaperRank')
+
+        if zset:
+            pipe.rename(ZSET_STAGING_KEY, ZSET_KEY)
+        else:
+            # Removing the sorted set of a previous run, out of date
+            pipe.delete(ZSET_KEY)
+
+        pipe.execute()
+
+        logging.info('Wrote {0} PaperRanks to Redis'.format(self.N))
+
+        return written
+
     @_Decorators.checkFolder
-    def toCSV(self):
+    def toCSV(self) -> int:
         """Function to write the PaperRank dataframe to a csv file.
+
+        Returns:
+            int -- Number of bytes written.
         """
 
         output_file = config.compute['output_folder'] + \
@@ -77,28 +303,86 @@ class Export:
         logging.info('Writing PaperRanks to CSV file {0}'.format(output_file))
 
         self.pr_parsed.to_csv(output_file, index=False)
+
+        return os.path.getsize(output_file)
     
     @_Decorators.checkFolder
-    def toExcel(self):
-        """Function to write the PaperRank dataframe to a Microsoft Excel file.
+    def toExcel(self, top_k: int=None) -> int:
+        """Function to write the top-K PaperRanks (by rank) to a Microsoft
+        Excel file. Excel worksheets are limited to 1,048,576 rows.
+
+        Keyword Arguments:
+            top_k {int} -- Number of PaperRanks to be written. If not
+                           provided, `compute.excel_top_k` is used
+                           (default: {None}).
+
+        Returns:
+            int -- Number of bytes written.
         """
 
+        if top_k is None:
+            top_k = config.compute['excel_top_k']
+
         output_file = config.compute['output_folder'] + \
             config.compute['excel_file']
 
-        logging.info('Writing PaperRanks to Excel file {0}'
+        logging.info('Writing top {0} PaperRanks to Excel file {1}'
+                     .format(top_k, output_file))
+
+        self.pr_parsed.nsmallest(top_k, 'Rank') \
+            .to_excel(output_file, index=False)
+
+        return os.path.getsize(output_file)
+
+    @_Decorators.checkFolder
+    def toParquet(self) -> int:
+        """Function to write the PaperRank dataframe to a Parquet file, in
+        row groups of `compute.columnar_chunk_size` rows.
+
+        Returns:
+            int -- Number of bytes written.
+        """
+
+        output_file = config.compute['output_folder'] + \
+            config.compute['parquet_file']
+
+        logging.info('Writing PaperRanks to Parquet file {0}'
                      .format(output_file))
 
-        # Check if folder exists, create if not
-        if not os.path.exists('output'):
-            os.makedirs('output')
+        self.__writeColumnar(lambda schema:
+                             pq.ParquetWriter(output_file, schema))
 
-        self.pr_parsed.to_excel(output_file, index=False)
+        return os.path.getsize(output_file)
 
     @_Decorators.checkFolder
-    def toSerialized(self, transition_matrix: sparse.csr_matrix):
+    def toArrow(self) -> int:
+        """Function to write the PaperRank dataframe to an Arrow IPC file, in
+        record batches of `compute.columnar_chunk_size` rows.
+
+        Returns:
+            int -- Number of bytes written.
+        """
+
+        output_file = config.compute['output_folder'] + \
+            config.compute['arrow_file']
+
+        logging.info('Writing PaperRanks to Arrow IPC file {0}'
+                     .format(output_file))
+
+        self.__writeColumnar(lambda schema:
+                             pa.ipc.new_file(output_file, schema))
+
+        return os.path.getsize(output_file)
+
+    @_Decorators.checkFolder
+    def toSerialized(self, transition_matrix: sparse.csr_matrix=None) \
+            -> int:
         """Function to write the PaperRank dataframe and the transition
-        matrix (M) to pickle files.
+        matrix (M) to pickle files. The transition matrix is skipped if it is
+        not provided (e.g. for out-of-core compute).
+
+        Returns:
+            int -- Number of bytes written.
         """
 
         pr_output_file = config.compute['output_folder'] + \
@@ -106,27 +390,88 @@ class Export:
         m_output_file = config.compute['output_folder'] + \
             config.compute['pickle_m_file']
 
-        logging.info('Writing PaperRank and Transition Matrix to pickle \
-            {0} and {1}.'.format(pr_output_file, m_output_file))
+        logging.info('Writing PaperRank to pickle {0}'.format(pr_output_file))
 
         self.pr_parsed.to_pickle(pr_output_file)
-        sparse.save_npz(m_output_file, transition_matrix)
+
+        if transition_matrix is not None:
+            logging.info('Writing Transition Matrix to {0}'
+                         .format(m_output_file))
+            sparse.save_npz(m_output_file, transition_matrix)
+
+            return os.path.getsize(pr_output_file) + \
+                os.path.getsize(m_output_file)
+
+        return os.path.getsize(pr_output_file)
+
+    def __writeColumnar(self, open_writer: callable):
+        """Function to write the PaperRank columns in chunks of
+        `compute.columnar_chunk_size` rows, with a pyarrow writer. The
+        columns of each chunk are built from slices of the PaperRank, ID and
+        rank arrays, without copying the dataframe.
+
+        Arguments:
+            open_writer {callable} -- Function returning a pyarrow writer
+                                      (with `write_table` and `close`) for
+                                      a schema.
+
+        Raises:
+            RuntimeError -- Raised when pyarrow is not installed.
+        """
+
+        if pa is None:
+            logging.error('pyarrow is not installed')
+            raise RuntimeError('Columnar export requires pyarrow.')
+
+        chunk_size = config.compute['columnar_chunk_size']
+
+        schema = pa.schema([('PubMed ID', pa.int64()),
+                            ('PaperRank', pa.float64()),
+                            ('Rank', pa.int64()),
+                            ('Percentile', pa.float64())])
+        writer = open_writer(schema)
+
+        try:
+            # Building the columns of each chunk from the PaperRank arrays
+            for i in range(0, self.N, chunk_size):
+                rank = self.rank[i:i + chunk_size]
+                chunk = pa.Table.from_arrays([
+                    pa.array(self.seen[i:i + chunk_size].astype(np.int64)),
+                    pa.array(self.paperrank[i:i + chunk_size]
+                             .astype(np.float64)),
+                    pa.array(rank),
+                    pa.array(100 * (self.N - rank + 1) / max(self.N, 1))
+                ], schema=schema)
+                writer.write_table(chunk)
+        finally:
+            writer.close()
 
     def __parsePaperRank(self):
         """Function to parse the PaperRank scores, and build a DataFrame
-        with PubMed ID in one column, and PaperRank in another.
+        with typed columns: PubMed ID (int64), PaperRank (float64), Rank
+        (int64, 1 for the highest PaperRank) and Percentile (float64, 100 for
+        the highest PaperRank).
         """
 
         logging.info('Parsing PaperRank vector into a Pandas DataFrame')
 
-        aggregate_data = np.column_stack((self.seen.astype(np.str),
-                                         self.paperrank))
+        paperrank = self.paperrank.astype(np.float64)
+
+        # Ranking by decreasing PaperRank (ties by order in seen)
+        order = np.argsort(-paperrank, kind='mergesort')
+        rank = np.empty(self.N, dtype=np.int64)
+        rank[order] = np.arange(1, self.N + 1)
 
-        pr_parsed = pd.DataFrame(aggregate_data)
-        pr_parsed.columns = ['PubMed ID', 'PaperRank']
+        pr_parsed = pd.DataFrame({
+            'PubMed ID': self.seen.astype(np.int64),
+            'PaperRank': paperrank,
+            'Rank': rank,
+            'Percentile': 100 * (self.N - rank + 1) / max(self.N, 1)
+        }, columns=['PubMed ID', 'PaperRank', 'Rank', 'Percentile'])
 
         logging.info('Created Pandas DataFrame with dimesions {0}'
                      .format(pr_parsed.shape))
 
-        # Assign to class variable
+        # Assign to class variables (ranks for the columnar exports)
         self.pr_parsed = pr_parsed
+        self.rank = rank
@@ -1,11 +1,14 @@
-from .helpers import logLoopProgress
+from ...util import getFrontier
 
 from redis import StrictRedis
-from scipy import sparse
 import logging
 import numpy as np
 
 
+# Maximum ratio between the largest ID and the number of IDs for a dense map
+DENSE_ID_RATIO = 4
+
+
 def buildIdList(r: StrictRedis, cutoff: int) -> np.array:
     """Function to build a list of IDs to be used by the compute module.
     
@@ -17,14 +20,17 @@ def buildIdList(r: StrictRedis, cutoff: int) -> np.array:
         np.array -- Sorted list of IDs used by the compute module.
     """
 
+    # SEEN set or bitmap, selected with `update.frontier`
+    frontier = getFrontier(r)
+
     # Isolating number of IDs to be extracted
-    seen_count = r.scard('SEEN')
+    seen_count = frontier.count('SEEN')
 
     logging.info('Initializing copy of {0} IDs from SEEN'
                  .format(seen_count))
     
-    # Extracting IDs, casting to numpy array for easier handling
-    seen_raw = np.array(list(r.smembers('SEEN')), dtype=np.int)
+    # Extracting IDs, as a numpy array for easier handling
+    seen_raw = frontier.members('SEEN')
 
     # Sorting (NOTE: This sorting heuristic is specific to PubMed IDs)
     # PubMedIDs are sequential. Reversing orders them from newest to oldest
@@ -43,60 +49,94 @@ def buildIdList(r: StrictRedis, cutoff: int) -> np.array:
     return seen
 
 
-def buildReverseIdxMap(seen: np.array) -> sparse.dok_matrix:
+class IdIndex:
+    def __init__(self, seen: np.array):
+        """Initialization logic for the IdIndex, an ID -> Index map with
+        vectorized lookup.
+
+        NOTE: This heuristic is specific to PubMed IDs sequential nature. When
+              the IDs are dense (i.e. the largest ID is at most
+              `DENSE_ID_RATIO` times the number of IDs), the map is an int32
+              array indexed by ID, with -1 for IDs that are not indexed.
+              Otherwise, it is a sorted array of IDs searched with
+              `np.searchsorted`.
+
+        Arguments:
+            seen {np.array} -- Array of IDs for which the map is computed.
+        """
+
+        ids = np.asarray(seen).astype(np.int64)
+
+        # Storing input parameters
+        self.N = ids.size
+        self.max_id = int(np.amax(ids)) if self.N > 0 else -1
+        self.dense = (self.max_id + 1) <= (DENSE_ID_RATIO * self.N)
+
+        if self.dense:
+            # Index of every ID, by ID (max_id + 1 is because IDs start at 1)
+            self.id_idx = np.full(self.max_id + 1, -1, dtype=np.int32)
+            self.id_idx[ids] = np.arange(self.N, dtype=np.int32)
+        else:
+            # Sorted IDs, and their corresponding indexes
+            self.order = np.argsort(ids, kind='mergesort').astype(np.int32)
+            self.sorted_ids = ids[self.order]
+
+    def lookup(self, ids: np.ndarray) -> np.ndarray:
+        """Function to get the seen array indexes for an array of IDs.
+
+        Arguments:
+            ids {np.ndarray} -- IDs to be searched (int or str).
+
+        Returns:
+            np.ndarray -- Corresponding int32 indexes, -1 if not found.
+        """
+
+        ids = np.asarray(ids).astype(np.int64)
+        idx = np.full(ids.shape, -1, dtype=np.int32)
+
+        if self.dense:
+            valid = (ids >= 0) & (ids <= self.max_id)
+            idx[valid] = self.id_idx[ids[valid]]
+        elif self.N > 0:
+            position = np.searchsorted(self.sorted_ids, ids)
+            position[position == self.N] = 0
+            found = self.sorted_ids[position] == ids
+            idx[found] = self.order[position[found]]
+
+        return idx
+
+    def __len__(self) -> int:
+        return self.N
+
+
+def buildReverseIdxMap(seen: np.array) -> IdIndex:
     """Function to build a reverse map, creating a mapping from the ID of a
     paper to its index in the seen array. This provides O(1) index lookup
-    for any given ID.
-    
-    NOTE: Due to the fact that sparse arrays define unassigned values to be 0,
-          we have incremented every index by +1, to use 0 as a flag. Because of
-          this, -1 must be added before using these values.
+    for any given ID, and vectorized lookup for arrays of IDs.
     
     Arguments:
         seen {np.array} -- Array of IDs for which reverse map is computed.
     
     Returns:
-        sparse.dok_matrix -- ID -> Index mapping with O(1) lookup.
+        IdIndex -- ID -> Index mapping with vectorized lookup.
     """
 
-    # Isolating number of IDs
-    N = seen.size
+    logging.info('Instatiating reverse ID map for {0} IDs'.format(seen.size))
 
-    logging.info('Instatiating reverse ID map for {0} IDs'.format(N))
-    
-    # NOTE: This creation heuristic is specific to PubMed IDs sequential nature
-    max_id = np.amax(seen)
-
-    # Defining matrix dimensions
-    matrix_dim = (max_id + 1, 1)  # max_id +1 is because IDs start at 1, not 0
-
-    # Instatiating sparse.dok_matrix column vector
-    id_idx_map = sparse.dok_matrix((max_id + 1, 1), dtype=np.int)
-
-    # counter
-    last_check = 0
-
-    # Building ID -> Index map to allow O(1) lookup
-    for i in range(N):
-        # i + 1 is so we can use 0 as a indicator for being empty
-        # sparse.dok_matrix elements are 0 if not explicitly defined
-        # When using this value, always subtract 1 first
-        id_idx_map[seen[i], 0] = i + 1
-    
-        # Log progress
-        last_check = logLoopProgress(i, last_check, N, 'Reverse ID map')
+    id_idx_map = IdIndex(seen=seen)
 
-    logging.info('Instantiated reverse ID map with {0} elements'
-                 .format(id_idx_map.nnz))
+    logging.info('Instantiated {0} reverse ID map with {1} elements'
+                 .format('dense' if id_idx_map.dense else 'sorted',
+                         len(id_idx_map)))
 
     return id_idx_map
 
 
-def getSeenIndex(id_idx_map: sparse.dok_matrix, candidate_id: str) -> int:
-    """Function to get the seen array index for a given ID in O(1).
+def getSeenIndex(id_idx_map: IdIndex, candidate_id: str) -> int:
+    """Function to get the seen array index for a given ID.
     
     Arguments:
-        id_idx_map {sparse.dok_matrix} -- ID -> Index map with O(1) lookup.
+        id_idx_map {IdIndex} -- ID -> Index map.
         candidate_id {str} -- Candidate ID to be searched.
     
     Raises:
@@ -106,12 +146,10 @@ def getSeenIndex(id_idx_map: sparse.dok_matrix, candidate_id: str) -> int:
         int -- Corresponding index of the ID.
     """
 
-    # Get index from map
-    idx = id_idx_map[np.int(candidate_id), 0]   # Will raise IndexError
+    idx = id_idx_map.lookup(np.array([candidate_id]))[0]
 
-    # If empty pointer, raise exception
-    if idx == 0:
+    # If not found, raise exception
+    if idx == -1:
         raise IndexError
     
-    # Return idx - 1 because we added 1 at initialization
-    return idx - 1
+    return int(idx)
@@ -0,0 +1,161 @@
+from contextlib import contextmanager
+from time import process_time, time
+import csv
+import json
+import logging
+import os
+import sys
+
+try:
+    # resource is only available on Unix
+    import resource
+except ImportError:
+    resource = None
+
+
+# Fields of the stage records, in the CSV run report
+STAGE_FIELDS = ['stage', 'items', 'wall_time', 'cpu_time', 'rss',
+                'rss_delta', 'process_peak_rss']
+
+
+def getRSS() -> int:
+    """Function to get the current resident set size of the process, from
+    /proc/self/statm.
+
+    Returns:
+        int -- Resident set size in bytes, None if not available (e.g. on
+               macOS or Windows).
+    """
+
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+
+    return pages * os.sysconf('SC_PAGE_SIZE')
+
+
+def getPeakRSS() -> int:
+    """Function to get the peak resident set size of the process, over
+    its lifetime (not of a single stage).
+
+    Returns:
+        int -- Peak resident set size in bytes, None if not available.
+    """
+
+    if resource is None:
+        return None
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # ru_maxrss is in bytes on macOS, and in kilobytes on Linux
+    return peak_rss if sys.platform == 'darwin' else peak_rss * 1024
+
+
+class Instrumentation:
+    def __init__(self):
+        """Initialization logic for the Instrumentation module, which records
+        the wall time, CPU time, RSS and item count of each stage of a
+        compute run, and the residual and time of each solver iteration.
+
+        The RSS of a stage is recorded as the current RSS of the process at
+        its end (`rss`), and its change over the stage (`rss_delta`), as the
+        peak RSS (`process_peak_rss`) is that of the whole process lifetime.
+        """
+
+        self.stages = []
+        self.iterations = []
+
+        # Current stage, and time of the last stage start or iteration
+        self.__stage = None
+        self.__last_time = time()
+
+    @contextmanager
+    def stage(self, name: str, items: int=None):
+        """Context manager to record a stage. The number of items processed
+        can be set in the `items` field of the yielded record.
+
+        NOTE: CPU time and RSS are those of the process, which include those
+              of stages running concurrently in other threads.
+
+        Arguments:
+            name {str} -- Name of the stage.
+
+        Keyword Arguments:
+            items {int} -- Number of items processed (default: {None}).
+        """
+
+        record = {'stage': name, 'items': items}
+
+        self.__stage = name
+        self.__last_time = start = time()
+        cpu_start = process_time()
+        rss_start = getRSS()
+
+        try:
+            yield record
+        finally:
+            record['wall_time'] = time() - start
+            record['cpu_time'] = process_time() - cpu_start
+            record['rss'] = getRSS()
+            record['rss_delta'] = None if rss_start is None \
+                else record['rss'] - rss_start
+            record['process_peak_rss'] = getPeakRSS()
+
+            self.stages.append(record)
+
+            logging.info('Completed stage {0} with {1} items in {2:.3f}s \
+                ({3:.3f}s CPU)'.format(name, record['items'],
+                                       record['wall_time'],
+                                       record['cpu_time']))
+
+    def iteration(self, count: int, residual: float):
+        """Function to record a solver iteration, to be passed as the
+        `callback` of the compute engines. The iteration time is measured
+        from the previous iteration (or the start of the stage).
+
+        Arguments:
+            count {int} -- Iteration number.
+            residual {float} -- Residual (or difference) of the iteration.
+        """
+
+        now = time()
+
+        self.iterations.append({
+            'stage': self.__stage,
+            'iteration': count,
+            'residual': float(residual),
+            'time': now - self.__last_time
+        })
+
+        self.__last_time = now
+
+    def toJSON(self, output_file: str):
+        """Function to write the run report (stages and iterations) to a
+        JSON file.
+
+        Arguments:
+            output_file {str} -- Path to the JSON file.
+        """
+
+        logging.info('Writing run report to JSON file {0}'
+                     .format(output_file))
+
+        with open(output_file, 'w') as f:
+            json.dump({'stages': self.stages, 'iterations': self.iterations},
+                      f, indent=4)
+
+    def toCSV(self, output_file: str):
+        """Function to write the stages of the run report to a CSV file.
+
+        Arguments:
+            output_file {str} -- Path to the CSV file.
+        """
+
+        logging.info('Writing run report to CSV file {0}'.format(output_file))
+
+        with open(output_file, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=STAGE_FIELDS)
+            writer.writeheader()
+            writer.writerows(self.stages)
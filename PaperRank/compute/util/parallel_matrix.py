@@ -0,0 +1,124 @@
+from concurrent.futures import ThreadPoolExecutor
+from scipy import sparse
+import logging
+import numpy as np
+
+
+class ParallelMatrix:
+    def __init__(self, M: sparse.csr_matrix, workers: int):
+        """Initialization logic for the ParallelMatrix, a wrapper around a
+        sparse.csr_matrix that computes matrix/vector products with a pool of
+        threads. The rows of the matrix are split into `workers` blocks with
+        (approximately) the same number of nonzero elements; the blocks share
+        the data of the matrix.
+
+        NOTE: scipy releases the GIL in sparse matrix/vector products and
+              numpy in vector operations, so the blocks are computed
+              concurrently.
+
+        Arguments:
+            M {sparse.csr_matrix} -- Matrix to be wrapped.
+            workers {int} -- Number of threads.
+        """
+
+        # Storing input parameters
+        self.M = M.tocsr()
+        self.shape = self.M.shape
+        self.dtype = self.M.dtype
+        self.nnz = self.M.nnz
+        self.workers = workers
+
+        # Row boundaries of the blocks, balanced by number of nonzeros
+        targets = np.linspace(0, self.nnz, workers + 1)
+        bounds = np.searchsorted(self.M.indptr, targets)
+        bounds[0], bounds[-1] = 0, self.shape[0]
+        bounds = np.unique(bounds)
+
+        self.blocks = []
+
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            first, last = self.M.indptr[start], self.M.indptr[stop]
+            block = sparse.csr_matrix(
+                (self.M.data[first:last], self.M.indices[first:last],
+                 self.M.indptr[start:stop + 1] - first),
+                shape=(stop - start, self.shape[1]))
+            self.blocks.append((start, stop, block))
+
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+
+        logging.info('Split {0}x{1} matrix into {2} row blocks for {3} threads'
+                     .format(self.shape[0], self.shape[1], len(self.blocks),
+                             workers))
+
+    def dot(self, x: np.array) -> np.array:
+        """Function to compute the matrix/vector product M * x.
+
+        Arguments:
+            x {np.array} -- Vector.
+
+        Returns:
+            np.array -- Product of the matrix and the vector.
+        """
+
+        y = np.empty(self.shape[0], dtype=np.result_type(self.dtype, x))
+
+        def multiply(block):
+            start, stop, B = block
+            y[start:stop] = B.dot(x)
+
+        list(self.pool.map(multiply, self.blocks))
+
+        return y
+
+    def powerStep(self, scores: np.array, beta: float) -> (np.array, float):
+        """Function to compute one step of the random scholar's Markov process
+        (see `solvers.powerStep`), along with the L1 norm of the difference
+        between the new and current PaperRanks. The sums of the leaked
+        PaperRank and of the difference are computed by each thread on its
+        block, and accumulated in float64.
+
+        Arguments:
+            scores {np.array} -- Current PaperRanks.
+            beta {float} -- Probability of following a citation.
+
+        Returns:
+            (np.array, float) -- PaperRanks after one step, and difference.
+        """
+
+        N = scores.size
+        y = np.empty(N, dtype=np.result_type(self.dtype, scores))
+
+        def multiply(block):
+            start, stop, B = block
+            y[start:stop] = B.dot(scores)
+            y[start:stop] *= beta
+            return np.sum(y[start:stop], dtype=np.float64)
+
+        # Compute and redistribute leaked PaperRank from dangling papers
+        leaked_pr = 1 - sum(self.pool.map(multiply, self.blocks))
+        teleport = float(leaked_pr / N) if leaked_pr > 0 else 0.0
+
+        def redistribute(block):
+            start, stop, _ = block
+            y[start:stop] += teleport
+            return np.sum(np.absolute(y[start:stop] - scores[start:stop]),
+                          dtype=np.float64)
+
+        difference = sum(self.pool.map(redistribute, self.blocks))
+
+        return y, difference
+
+    def tocsr(self) -> sparse.csr_matrix:
+        """Function to get the wrapped matrix.
+
+        Returns:
+            sparse.csr_matrix -- Wrapped matrix.
+        """
+
+        return self.M
+
+    def close(self):
+        """Function to shut down the thread pool.
+        """
+
+        self.pool.shutdown()
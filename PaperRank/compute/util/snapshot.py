@@ -0,0 +1,205 @@
+from .build_out_degree import buildOutDegreeMap
+from .citations import getOutDegrees, iterCitationEdges
+from .id_management import buildIdList, buildReverseIdxMap
+
+from redis import StrictRedis
+import logging
+import numpy as np
+import os
+
+
+# Snapshot file identifier and format version
+SNAPSHOT_MAGIC = b'PRGRAPH'
+SNAPSHOT_VERSION = 1
+
+# Snapshot file header. The header is followed by the sections below, each
+# padded to a multiple of 8 bytes:
+#   - ids         int64[N]     IDs, in the order of the seen array
+#   - out_degree  int32[N]     Out degree of each ID (from 'OUT_DEGREE')
+#   - indptr      int64[N + 1] CSR row pointers of the inbound citations
+#   - indices     int32[nnz]   CSR column indexes of the inbound citations
+SNAPSHOT_HEADER = np.dtype([
+    ('magic', 'S8'),
+    ('version', '<u4'),
+    ('reserved', '<u4'),
+    ('N', '<u8'),
+    ('nnz', '<u8')
+])
+
+
+def _sectionLayout(N: int, nnz: int) -> list:
+    """Function to compute the offset of each section of a snapshot file.
+
+    Arguments:
+        N {int} -- Number of IDs.
+        nnz {int} -- Number of citations.
+
+    Returns:
+        list -- List of (name, dtype, length, offset) tuples.
+    """
+
+    sections = [
+        ('ids', np.dtype('<i8'), N),
+        ('out_degree', np.dtype('<i4'), N),
+        ('indptr', np.dtype('<i8'), N + 1),
+        ('indices', np.dtype('<i4'), nnz)
+    ]
+
+    layout = []
+    offset = SNAPSHOT_HEADER.itemsize
+
+    for name, dtype, length in sections:
+        layout.append((name, dtype, length, offset))
+        # Padding each section to a multiple of 8 bytes
+        offset += -(-dtype.itemsize * length // 8) * 8
+
+    return layout
+
+
+class GraphSnapshot:
+    def __init__(self, path: str):
+        """Initialization logic for the GraphSnapshot, which opens an on-disk
+        CSR snapshot of the citation graph (see `exportSnapshot`) with
+        `np.memmap`. Row `i` of the snapshot lists the indexes of the papers
+        citing `ids[i]`.
+
+        Arguments:
+            path {str} -- Path to the snapshot file.
+
+        Raises:
+            RuntimeError -- Raised when the file is not a valid snapshot.
+        """
+
+        header = np.fromfile(path, dtype=SNAPSHOT_HEADER, count=1)
+
+        if header.size != 1 or header['magic'][0] != SNAPSHOT_MAGIC:
+            logging.error('{0} is not a PaperRank graph snapshot'.format(path))
+            raise RuntimeError('Invalid graph snapshot file.')
+
+        if header['version'][0] != SNAPSHOT_VERSION:
+            logging.error('Unsupported graph snapshot version {0} in {1}'
+                          .format(header['version'][0], path))
+            raise RuntimeError('Unsupported graph snapshot version.')
+
+        # Storing input parameters
+        self.path = path
+        self.N = int(header['N'][0])
+        self.nnz = int(header['nnz'][0])
+
+        # Mapping every section of the file
+        for name, dtype, length, offset in _sectionLayout(self.N, self.nnz):
+            section = np.memmap(path, dtype=dtype, mode='r', offset=offset,
+                                shape=(length,)) if length > 0 \
+                else np.zeros(0, dtype=dtype)
+            setattr(self, name, section)
+
+        logging.info('Opened graph snapshot {0} with {1} IDs and {2} \
+            citations'.format(path, self.N, self.nnz))
+
+    def edges(self, limit: int=None) -> (np.array, np.array):
+        """Function to get the (row, column) indexes of the citations between
+        the first `limit` IDs of the snapshot.
+
+        Keyword Arguments:
+            limit {int} -- Number of IDs to be included (default: {None}).
+
+        Returns:
+            (np.array, np.array) -- Row and column indexes of the citations.
+        """
+
+        limit = self.N if limit is None else min(limit, self.N)
+
+        # Rows of the first `limit` IDs
+        counts = np.diff(self.indptr[:limit + 1])
+        rows = np.repeat(np.arange(limit, dtype=np.int64), counts)
+        cols = np.array(self.indices[:self.indptr[limit]])
+
+        # Removing citations from IDs beyond the limit
+        if limit < self.N:
+            included = cols < limit
+            rows, cols = rows[included], cols[included]
+
+        return rows, cols
+
+
+def exportSnapshot(r: StrictRedis, path: str, cutoff: int=None,
+                   batch_size: int=10000) -> GraphSnapshot:
+    """Function to export the 'SEEN', 'IN' and 'OUT_DEGREE' databases to an
+    on-disk CSR snapshot of the citation graph, that can be opened with
+    `GraphSnapshot` instead of querying Redis.
+
+    Arguments:
+        r {StrictRedis} -- StrictRedis object for database operations.
+        path {str} -- Path to the snapshot file.
+
+    Keyword Arguments:
+        cutoff {int} -- ID number limit. (default: {None})
+        batch_size {int} -- Number of IDs fetched per database call.
+                            (default: {10000})
+
+    Returns:
+        GraphSnapshot -- Exported graph snapshot.
+    """
+
+    # Building ID list and out degree map, as for the compute engine
+    seen = buildIdList(r=r, cutoff=cutoff)
+    buildOutDegreeMap(r=r, batch_size=batch_size)
+    id_idx_map = buildReverseIdxMap(seen=seen)
+
+    N = seen.size
+
+    logging.info('Exporting graph snapshot with {0} IDs to {1}'
+                 .format(N, path))
+
+    # Writing inbound citations to a temporary file, as the number of
+    # citations (and thus the section offsets) is not known in advance
+    indices_path = path + '.indices'
+    indptr = np.zeros(N + 1, dtype=np.int64)
+
+    with open(indices_path, 'wb') as indices_file:
+        for rows, cols in iterCitationEdges(r=r, seen=seen,
+                                            id_idx_map=id_idx_map,
+                                            batch_size=batch_size):
+            np.add.at(indptr, rows + 1, 1)
+            indices_file.write(cols.astype('<i4').tobytes())
+
+    indptr = np.cumsum(indptr)
+    nnz = int(indptr[-1])
+
+    out_degree = getOutDegrees(r=r, seen=seen, batch_size=batch_size)
+
+    # Writing header and sections
+    header = np.array([(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, 0, N, nnz)],
+                      dtype=SNAPSHOT_HEADER)
+    sections = {
+        'ids': seen,
+        'out_degree': out_degree,
+        'indptr': indptr
+    }
+
+    with open(path, 'wb') as snapshot_file:
+        header.tofile(snapshot_file)
+
+        for name, dtype, length, offset in _sectionLayout(N, nnz):
+            snapshot_file.seek(offset)
+
+            if name == 'indices':
+                # Copying citations from the temporary file in chunks
+                with open(indices_path, 'rb') as indices_file:
+                    chunk = indices_file.read(2**26)
+                    while chunk:
+                        snapshot_file.write(chunk)
+                        chunk = indices_file.read(2**26)
+            else:
+                snapshot_file.write(sections[name].astype(dtype).tobytes())
+
+        # Padding the last section
+        snapshot_file.truncate(_sectionLayout(N, nnz)[-1][3] +
+                               -(-4 * nnz // 8) * 8)
+
+    os.remove(indices_path)
+
+    logging.info('Exported graph snapshot with {0} IDs and {1} citations'
+                 .format(N, nnz))
+
+    return GraphSnapshot(path)
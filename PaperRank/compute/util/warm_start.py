@@ -0,0 +1,78 @@
+from .id_management import IdIndex
+
+from redis import StrictRedis
+import logging
+import numpy as np
+import os
+import pandas as pd
+
+
+def buildInitialScores(seen: np.array, r: StrictRedis=None,
+                       pickle_file: str=None,
+                       batch_size: int=10000) -> np.array:
+    """Function to build an initial PaperRank vector for the seen array from
+    the PaperRanks of a previous run, read from the 'PaperRank' database
+    (if `r` is provided) or from the pickle file written by
+    `Export.toSerialized` (if `pickle_file` is provided). IDs without a
+    previous PaperRank are assigned the uniform mass 1 / N, and the vector
+    is renormalized to sum to 1. If the pickle file does not exist (e.g. on
+    the first run), the uniform vector is returned.
+
+    Arguments:
+        seen {np.array} -- Array of IDs for which the vector is built.
+
+    Keyword Arguments:
+        r {StrictRedis} -- StrictRedis object for database operations.
+                           (default: {None})
+        pickle_file {str} -- Path to the PaperRank pickle file.
+                             (default: {None})
+        batch_size {int} -- Number of IDs fetched per database call.
+                            (default: {10000})
+
+    Raises:
+        RuntimeError -- Raised when no source is provided.
+
+    Returns:
+        np.array -- Initial PaperRanks, with indexes corresponding to seen.
+    """
+
+    N = seen.size
+
+    # Previous PaperRanks, NaN if missing
+    scores = np.full(N, np.nan, dtype=np.float64)
+
+    if pickle_file:
+        if not os.path.exists(pickle_file):
+            logging.warn('PaperRank pickle file {0} not found, starting from \
+uniform PaperRanks'.format(pickle_file))
+            return np.repeat(1 / N, N)
+
+        logging.info('Loading previous PaperRanks from {0}'
+                     .format(pickle_file))
+
+        previous = pd.read_pickle(pickle_file)
+        idx = IdIndex(seen=seen).lookup(previous['PubMed ID'].values)
+        found = idx != -1
+        scores[idx[found]] = previous['PaperRank'].values[found] \
+            .astype(np.float64)
+    elif r is not None:
+        logging.info('Loading previous PaperRanks from Redis')
+
+        for start in range(0, N, batch_size):
+            batch = [str(i) for i in seen[start:start + batch_size]]
+            scores[start:start + len(batch)] = np.array(
+                [np.nan if i is None else float(i)
+                 for i in r.hmget('PaperRank', batch)])
+    else:
+        raise RuntimeError('No source for previous PaperRanks.')
+
+    # Assigning default mass to missing IDs
+    missing = np.isnan(scores)
+
+    logging.info('Found previous PaperRanks for {0} of {1} IDs'
+                 .format(N - np.sum(missing), N))
+
+    scores[missing] = 1 / N
+
+    # Renormalizing
+    return scores / np.sum(scores)
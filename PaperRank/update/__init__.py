@@ -1,2 +1,5 @@
+from .async_manager import AsyncManager
 from .manager import Manager
 from .query import Query
+from .rate_limiter import isThrottled, RateLimiter
+from .stream import StreamManager, StreamWorker
@@ -0,0 +1,217 @@
+from ..util import config, getFrontier
+from .manager import Manager
+from .query import buildRequestParams, failedRequestHandler, \
+    successfulRequestHandler
+from .rate_limiter import isThrottled, RateLimiter
+
+from redis import ConnectionPool
+import asyncio
+import logging
+
+try:
+    # aiohttp and redis.asyncio are only required for the asyncio engine
+    import aiohttp
+    from redis import asyncio as aioredis
+except ImportError:
+    aiohttp = None
+    aioredis = None
+
+
+class AsyncManager(Manager):
+    def __init__(self, conn_pool: ConnectionPool, recover: bool=True):
+        """AsyncManager class initialization. The AsyncManager queries PMIDs
+        like the Manager, with concurrent requests in a single asyncio event
+        loop instead of a process pool: elink requests share keep-alive
+        connections (aiohttp), results are written with an async Redis
+        client, and at most `update.max_in_flight` requests run at once.
+
+        Arguments:
+            conn_pool {ConnectionPool} -- Connection pool to be used for
+                                          Database transactions.
+
+        Keyword Arguments:
+            recover {bool} -- True for crash recovery (default: {True}).
+
+        Raises:
+            RuntimeError -- Raised when aiohttp or redis.asyncio are not
+                            installed.
+        """
+
+        if aiohttp is None or aioredis is None:
+            logging.error('aiohttp and redis.asyncio (redis>=4.2) are not \
+installed')
+            raise RuntimeError('Asyncio engine requires aiohttp and \
+redis.asyncio.')
+
+        super(AsyncManager, self).__init__(conn_pool=conn_pool,
+                                           recover=recover)
+
+        self.max_in_flight = config.update['max_in_flight']
+
+        # Rate limiter shared with other crawlers, with the blocking client
+        self.limiter = RateLimiter(self.db)
+
+    def start(self):
+        """Function to start scraping.
+        """
+
+        asyncio.run(self.crawl())
+
+        logging.info('Scrape completed with {0} IDs'
+                     .format(self.frontier.count('SEEN')))
+
+    async def crawl(self):
+        """Coroutine claiming PMIDs from EXPLORE every second, and querying
+        them in batches of `pmid_per_request`. Claims wait while
+        `max_in_flight` requests are running. Returns when EXPLORE is empty
+        and every request completed.
+        """
+
+        loop = asyncio.get_event_loop()
+        window = asyncio.Semaphore(self.max_in_flight)
+        tasks = set()
+
+        # Async Redis client, with the connection settings of the pool
+        db = aioredis.StrictRedis(
+            **{i: self.conn_pool.connection_kwargs[i]
+               for i in ['host', 'port', 'db', 'password']
+               if i in self.conn_pool.connection_kwargs})
+
+        # Keep-alive connections, up to one per request in flight
+        connector = aiohttp.TCPConnector(limit=self.max_in_flight)
+
+        async with aiohttp.ClientSession(connector=connector) as session:
+            explore_count = await loop.run_in_executor(
+                None, self.getExplorationCount)
+            counter = 0
+
+            while explore_count > 0 or len(tasks) > 0:
+                if explore_count > 0:
+                    # Moving PMIDs not in SEEN from EXPLORE to INSTANCE,
+                    # with the blocking client, outside of the event loop
+                    pmids = await loop.run_in_executor(
+                        None, self.frontier.claim, 'EXPLORE', 'INSTANCE',
+                        self.pmid_per_second, 'SEEN')
+
+                    explore_count -= len(pmids)
+                    counter += 1
+
+                    for i in range(0, len(pmids), self.pmid_per_request):
+                        # Waiting for a slot in the request window
+                        await window.acquire()
+
+                        task = asyncio.ensure_future(self.query(
+                            session, db,
+                            pmids[i:i + self.pmid_per_request], window))
+                        tasks.add(task)
+                        task.add_done_callback(tasks.discard)
+
+                    logging.info('Currently running {0} queries'
+                                 .format(len(tasks)))
+                    logging.info('There are {0} PMIDs left in EXPLORE size \
+cache'.format(explore_count))
+
+                # Wait for 1 second
+                await asyncio.sleep(1)
+
+                # Clean EXPLORE every clean interval, and once every request
+                # completed (as they add IDs that were already seen)
+                if counter >= self.clean_interval or \
+                        (len(tasks) == 0 and counter > 0):
+                    await loop.run_in_executor(None, self.reclaimInstance)
+                    await loop.run_in_executor(None, self.cleanExplore)
+                    explore_count = await loop.run_in_executor(
+                        None, self.getExplorationCount)
+                    counter = 0
+
+                # Check if explore count is near 0, if so update
+                if explore_count < self.pmid_per_request:
+                    explore_count = await loop.run_in_executor(
+                        None, self.getExplorationCount)
+
+        await db.close()
+
+    async def query(self, session: 'aiohttp.ClientSession',
+                    db: 'aioredis.StrictRedis', pmids: list,
+                    window: asyncio.Semaphore):
+        """Coroutine querying a batch of PMIDs, and writing the results (as
+        the `Query` function). Releases a slot in the request window once
+        completed.
+
+        Arguments:
+            session {aiohttp.ClientSession} -- HTTP session for the request.
+            db {aioredis.StrictRedis} -- Async Redis client.
+            pmids {list} -- IDs to be queried.
+            window {asyncio.Semaphore} -- Request window.
+        """
+
+        try:
+            pipe = db.pipeline()
+
+            # Request parameters, with a parameter for each ID
+            params = [
+                (i, j) for i, values in buildRequestParams(pmids).items()
+                for j in (values if type(values) is list else [values])
+                if j is not None]
+
+            ok, response_raw = await self.request(session, params)
+
+            # Queuing the database operations, as the Query function
+            if ok:
+                pipe = successfulRequestHandler(pipe=pipe, pmids=pmids,
+                                                response_raw=response_raw)
+            else:
+                pipe = failedRequestHandler(pipe=pipe, pmids=pmids)
+
+            getFrontier(pipe).release('INSTANCE', pmids)
+
+            await pipe.execute()
+        finally:
+            window.release()
+
+    async def request(self, session: 'aiohttp.ClientSession',
+                      params: list) -> (bool, str):
+        """Coroutine making an elink request when allowed by the rate
+        limiter. Throttled requests are retried after a backoff, up to
+        `update.max_retries` times (as the `request` function).
+
+        Arguments:
+            session {aiohttp.ClientSession} -- HTTP session for the request.
+            params {list} -- Request parameters, as (name, value) tuples.
+
+        Returns:
+            (bool, str) -- True if the request succeeded, and the response.
+        """
+
+        loop = asyncio.get_event_loop()
+
+        for attempt in range(self.limiter.max_retries + 1):
+            # Waiting for a token, without blocking the event loop
+            wait = await loop.run_in_executor(None, self.limiter.reserve)
+
+            while wait > 0:
+                await asyncio.sleep(wait)
+                wait = await loop.run_in_executor(None, self.limiter.reserve)
+
+            try:
+                async with session.get(config.ncbi_api['url'],
+                                       params=params) as r:
+                    status = r.status
+                    response_raw = await r.text()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logging.warn('Request failed with {0}'.format(repr(e)))
+                return False, None
+
+            if not isThrottled(status):
+                await loop.run_in_executor(None, self.limiter.success)
+                break
+
+            rate = await loop.run_in_executor(None, self.limiter.throttled)
+
+            logging.warn('Request throttled with HTTP {0}, reduced rate to \
+{1:.2f} requests per second'.format(status, rate))
+
+            if attempt < self.limiter.max_retries:
+                await asyncio.sleep(self.limiter.backoff(attempt))
+
+        return status < 400, response_raw
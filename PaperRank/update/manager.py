@@ -1,4 +1,4 @@
-from ..util import config
+from ..util import config, getFrontier
 from .query import Query
 
 from multiprocessing import Pool, Value, Lock
@@ -28,6 +28,9 @@ class Manager:
         # Creating database object for the Manager
         self.db = StrictRedis(connection_pool=self.conn_pool)
 
+        # ID sets, selected with `update.frontier`
+        self.frontier = getFrontier(self.db)
+
         # Recovering from failure
         if recover:
             self.recoverInstance()
@@ -39,6 +42,7 @@ class Manager:
         self.pmid_per_request = config.ncbi_api['pmid_per_request']
         self.request_per_second = config.ncbi_api['request_per_second']
         self.pmid_per_second = self.pmid_per_request * self.request_per_second
+        self.lease_timeout = config.update['lease_timeout']
 
         # Setting pool size and maxtasksperchild
         self.pool_size = os.cpu_count() * 20
@@ -62,14 +66,13 @@ class Manager:
         while explore_count > 0:
             # Check if process limit is not reached
             if proc_count.value < self.pool_size:
-                # Get PMIDs
-                pmids = self.db.srandmember(
+                # Moving PMIDs from EXPLORE to INSTANCE (atomically), dropping
+                # IDs already in SEEN
+                pmids = self.frontier.claim(
                     name='EXPLORE',
-                    number=self.pmid_per_second)
-                # Removing popped elements
-                self.db.srem('EXPLORE', *pmids)
-                # Adding IDs to instance nodes
-                self.db.sadd('INSTANCE', *pmids)
+                    target='INSTANCE',
+                    number=self.pmid_per_second,
+                    exclude='SEEN')
 
                 # Logging progress
                 logging.info('Extracted {0} PubMed IDs for scraping'
@@ -109,6 +112,8 @@ class Manager:
 
                 # Also close and re-create pool
                 if counter >= self.clean_interval:
+                    # Reclaim IDs of stale queries
+                    self.reclaimInstance()
                     # Clean EXPLORE
                     self.cleanExplore()
                     # Update explore_count
@@ -124,7 +129,7 @@ class Manager:
             sleep(1)
         
         logging.info('EXPLORE empty, currently {0} IDs in INSTANCE'
-                     .format(self.db.scard('INSTANCE')))
+                     .format(self.frontier.count('INSTANCE')))
         logging.info('Waiting for {0} processes to join'
                      .format(proc_count.value))
         # Close process pool
@@ -134,22 +139,35 @@ class Manager:
         # Terminate pool
         pool.terminate()
         logging.info('Scrape completed with {0} IDs'
-                     .format(self.db.scard('SEEN')))
+                     .format(self.frontier.count('SEEN')))
 
     def recoverInstance(self):
         """Move `INSTANCE` IDs to `EXPLORE`, to recover
         from a crash/exit.
         """
         logging.info('Recovering {0} IDs from INSTANCE'
-                     .format(self.db.scard('INSTANCE')))
+                     .format(self.frontier.count('INSTANCE')))
         pipe = self.db.pipeline()
         # Move everything from `INSTANCE` to `EXPLORE`
-        pipe.sunionstore('EXPLORE', 'EXPLORE', 'INSTANCE')
+        self.frontier.union('EXPLORE', 'INSTANCE', pipe=pipe)
         # Delete `INSTANCE`
-        pipe.delete('INSTANCE')
+        self.frontier.delete('INSTANCE', pipe=pipe)
         # Execute commands
         pipe.execute()
 
+    def reclaimInstance(self):
+        """Move `INSTANCE` IDs claimed more than `update.lease_timeout`
+        seconds ago to `EXPLORE`, to recover the IDs of queries that did not
+        complete (e.g. killed workers), while queries are running.
+        """
+
+        reclaimed = self.frontier.reclaim(name='INSTANCE', target='EXPLORE',
+                                          max_age=self.lease_timeout)
+
+        if reclaimed > 0:
+            logging.warn('Reclaimed {0} IDs from INSTANCE with leases older \
+                than {1}s'.format(reclaimed, self.lease_timeout))
+
     def getExplorationCount(self) -> int:
         """Get the number of elements remaining in the
         exploration frontier.
@@ -158,7 +176,7 @@ class Manager:
             int -- Number of IDs in the exploration frontier.
         """
 
-        return int(self.db.scard('EXPLORE'))
+        return self.frontier.count('EXPLORE')
 
     def cleanExplore(self):
         """Function to clean EXPLORE, by removing all items already
@@ -167,13 +185,15 @@ class Manager:
 
         # Logging before
         logging.info('{0} PMIDs in Explore and {1} PMIDs in SEEN before clean'
-                     .format(self.db.scard('EXPLORE'), self.db.scard('SEEN')))
+                     .format(self.frontier.count('EXPLORE'),
+                             self.frontier.count('SEEN')))
         # Removing SEEN IDs from EXPLORE
         logging.info('Removing SEEN IDs from EXPLORE')
-        self.db.sdiffstore('EXPLORE', 'EXPLORE', 'SEEN')
+        self.frontier.difference('EXPLORE', 'SEEN')
         # Logging after
         logging.info('{0} PMIDs in Explore and {1} PMIDs in SEEN after clean'
-                     .format(self.db.scard('EXPLORE'), self.db.scard('SEEN')))
+                     .format(self.frontier.count('EXPLORE'),
+                             self.frontier.count('SEEN')))
         # Updating clean interval
         self.updateCleanInterval()
 
@@ -184,7 +204,7 @@ class Manager:
         """
 
         # Isolating SEEN size
-        seen_size = self.db.scard('SEEN')
+        seen_size = self.frontier.count('SEEN')
 
         # Updating clean interval
         if seen_size < 10**5:
@@ -1,11 +1,13 @@
+from .rate_limiter import isThrottled, RateLimiter
 from .worker import worker
-from ..util import config
+from ..util import config, getFrontier
 
 from multiprocessing import Value, Lock
 from collections import OrderedDict
-from redis.client import StrictPipeline
+from redis.client import Pipeline
 from redis import ConnectionPool, StrictRedis
-from requests import get
+from requests import get, Response
+from time import sleep
 from xmltodict import parse
 import logging
 
@@ -28,38 +30,50 @@ def Query(conn_pool: ConnectionPool, pmids: list, proc_count: Value,
     # Creating redis pipeline
     pipe = db.pipeline()
 
-    # Building request parameters
-    request_parameters = __buildRequestParams(pmids)
-
-    # Making request
-    r = get(url=config.ncbi_api['url'], params=request_parameters)
+    # Making request, through the shared rate limiter
+    r = request(limiter=RateLimiter(db), pmids=pmids)
 
     # Check validity, handle appropriately
     if r.ok:
-        pipe = __successfulRequestHandler(pipe=pipe,
-                                          pmids=pmids,
-                                          response_raw=r.text)
+        pipe = successfulRequestHandler(pipe=pipe,
+                                        pmids=pmids,
+                                        response_raw=r.text)
     else:
-        pipe = __failedRequestHandler(pipe=pipe, pmids=pmids)
+        pipe = failedRequestHandler(pipe=pipe, pmids=pmids)
 
     logging.info('Executing Query process database actions with {0} PMIDs'
                  .format(len(pmids)))
     
-    # Removing current instances from INSTANCE
-    pipe.srem('INSTANCE', *pmids)
+    # Removing current instances (and their leases) from INSTANCE
+    getFrontier(pipe).release('INSTANCE', pmids)
     
     # Execute database calls
     pipe.execute()  # Blocking
 
-    # Acquire lock, decrement process counter, release lock
-    lock.acquire()
-    proc_count.value -= 1
-    lock.release()
+    # Acquire lock, decrement process counter, release lock (if the Query
+    # is run by the Manager process pool)
+    if proc_count is not None:
+        lock.acquire()
+        proc_count.value -= 1
+        lock.release()
+
+
+def successfulRequestHandler(pipe: Pipeline,
+                             pmids: list,
+                             response_raw: str) -> Pipeline:
+    """Successful request handler. Queues the database operations of each
+    ID in the elink response, or handles the request as failed if the
+    response has no results.
+
+    Arguments:
+        pipe {Pipeline} -- Pipeline for the database operations.
+        pmids {list} -- IDs of the request.
+        response_raw {str} -- elink XML response.
 
+    Returns:
+        Pipeline -- Pipeline with queued operations.
+    """
 
-def __successfulRequestHandler(pipe: StrictPipeline,
-                               pmids: list,
-                               response_raw: str) -> StrictPipeline:
     # Parse XML
     response = parse(response_raw)
 
@@ -68,7 +82,7 @@ def __successfulRequestHandler(pipe: StrictPipeline,
         linkset_container = response['eLinkResult']['LinkSet']
     except KeyError:
         # Handle failed request
-        pipe = __failedRequestHandler(pipe=pipe, pmids=pmids)
+        pipe = failedRequestHandler(pipe=pipe, pmids=pmids)
         return pipe
     
     if type(linkset_container) is list:
@@ -82,7 +96,43 @@ def __successfulRequestHandler(pipe: StrictPipeline,
     return pipe
 
 
-def __buildRequestParams(pmids: list) -> dict:
+def request(limiter: RateLimiter, pmids: list) -> Response:
+    """Function to make the elink request of a list of PMIDs, when allowed
+    by the rate limiter. Throttled requests are retried after a backoff, up
+    to `update.max_retries` times.
+
+    Arguments:
+        limiter {RateLimiter} -- Shared rate limiter.
+        pmids {list} -- IDs to be queried.
+
+    Returns:
+        Response -- Response of the last attempt.
+    """
+
+    # Building request parameters
+    request_parameters = buildRequestParams(pmids)
+
+    for attempt in range(limiter.max_retries + 1):
+        limiter.acquire()
+
+        r = get(url=config.ncbi_api['url'], params=request_parameters)
+
+        if not isThrottled(r.status_code):
+            limiter.success()
+            break
+
+        rate = limiter.throttled()
+
+        logging.warn('Request throttled with HTTP {0}, reduced rate to \
+{1:.2f} requests per second'.format(r.status_code, rate))
+
+        if attempt < limiter.max_retries:
+            sleep(limiter.backoff(attempt))
+
+    return r
+
+
+def buildRequestParams(pmids: list) -> dict:
     """Function to build request parameter dictionary.
     
     Returns:
@@ -100,21 +150,22 @@ def __buildRequestParams(pmids: list) -> dict:
     return default_headers
 
 
-def __failedRequestHandler(pipe: StrictPipeline,
-                           pmids: list) -> StrictPipeline:
+def failedRequestHandler(pipe: Pipeline,
+                         pmids: list) -> Pipeline:
     """Failed request handler. Removes the current PMIIDs from the list
     in 'INSTANCE', and adds the IDs back to 'EXPLORE' for retrying.
     
     Arguments:
-        pipe {StrictPipeline} -- Pipeline for the database operations.
+        pipe {Pipeline} -- Pipeline for the database operations.
     
     Returns:
-        StrictPipeline -- Pipeline with queued operations.
+        Pipeline -- Pipeline with queued operations.
     """
 
     # Gracefully recover progress
-    pipe.srem('INSTANCE', *pmids)
-    pipe.sadd('EXPLORE', *pmids)
+    frontier = getFrontier(pipe)
+    frontier.release('INSTANCE', pmids)
+    frontier.add('EXPLORE', pmids)
 
     logging.warn('Query failed for PMIDs {0}'.format(pmids))
 
@@ -0,0 +1,171 @@
+from ..util import config
+
+from redis import StrictRedis
+import random
+import time
+
+
+# Redis key of the shared rate limiter state
+RATE_LIMIT_KEY = 'RATE_LIMIT'
+
+# Lua helper setting `now` to the server time, shared by every host. Scripts
+# reading TIME (a random command) must replicate their effects on Redis < 5.
+SERVER_TIME = """
+if redis.replicate_commands then
+    redis.replicate_commands()
+end
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+"""
+
+# Lua script taking a token from the bucket KEYS[1], refilled at the current
+# rate (at most ARGV[1] tokens per second) up to ARGV[2] tokens. Returns 0
+# if a token was taken, or the seconds until the next token.
+TOKEN_BUCKET_SCRIPT = SERVER_TIME + """
+local max_rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'timestamp', 'rate')
+local rate = math.min(max_rate, tonumber(state[3]) or max_rate)
+local tokens = tonumber(state[1]) or burst
+local elapsed = math.max(0, now - (tonumber(state[2]) or now))
+tokens = math.min(burst, tokens + elapsed * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HMSET', KEYS[1], 'tokens', tostring(tokens),
+           'timestamp', tostring(now), 'rate', tostring(rate))
+return tostring(wait)
+"""
+
+# Lua script adjusting the rate of the bucket KEYS[1]: additive increase by
+# ARGV[3] up to ARGV[1] after a success, or multiplicative decrease by
+# ARGV[4] down to ARGV[2] after throttling (emptying the bucket). Throttling
+# within one request interval of the last decrease is ignored, so that a
+# burst of throttled responses only decreases the rate once.
+AIMD_SCRIPT = SERVER_TIME + """
+local max_rate = tonumber(ARGV[1])
+local min_rate = tonumber(ARGV[2])
+local state = redis.call('HMGET', KEYS[1], 'rate', 'decreased')
+local rate = math.min(max_rate, tonumber(state[1]) or max_rate)
+if ARGV[5] == 'increase' then
+    rate = math.min(max_rate, rate + tonumber(ARGV[3]))
+elseif now - (tonumber(state[2]) or 0) > 1 / rate then
+    rate = math.max(min_rate, rate * tonumber(ARGV[4]))
+    redis.call('HMSET', KEYS[1], 'tokens', '0', 'timestamp', tostring(now),
+               'decreased', tostring(now))
+end
+redis.call('HSET', KEYS[1], 'rate', tostring(rate))
+return tostring(rate)
+"""
+
+
+class RateLimiter:
+    def __init__(self, r: StrictRedis):
+        """Initialization logic for the RateLimiter class, a token bucket
+        shared by every crawler process and host through Redis, limiting
+        elink requests to `ncbi_api.request_per_second`.
+
+        The rate adapts to throttling (AIMD): it is multiplied by
+        `update.rate_limit_decrease` (down to `update.rate_limit_min`) when
+        a request is throttled (HTTP 429 or 5xx), and increased by
+        `update.rate_limit_increase` after each successful request, up to
+        `ncbi_api.request_per_second`. Throttled requests are retried up to
+        `update.max_retries` times, after a jittered exponential backoff.
+
+        Arguments:
+            r {StrictRedis} -- StrictRedis object for database operations.
+        """
+
+        self.r = r
+
+        self.max_rate = config.ncbi_api['request_per_second']
+        self.min_rate = config.update['rate_limit_min']
+        self.burst = config.update['rate_limit_burst']
+        self.increase = config.update['rate_limit_increase']
+        self.decrease = config.update['rate_limit_decrease']
+        self.max_retries = config.update['max_retries']
+        self.retry_backoff = config.update['retry_backoff']
+        self.retry_backoff_max = config.update['retry_backoff_max']
+
+        self.token_bucket_script = self.r.register_script(
+            TOKEN_BUCKET_SCRIPT)
+        self.aimd_script = self.r.register_script(AIMD_SCRIPT)
+
+    def reserve(self) -> float:
+        """Function to take a token from the bucket, if available.
+
+        Returns:
+            float -- 0 if a token was taken, or the number of seconds until
+                     the next token.
+        """
+
+        return float(self.token_bucket_script(
+            keys=[RATE_LIMIT_KEY], args=[self.max_rate, self.burst]))
+
+    def acquire(self):
+        """Function to wait for, and take a token from the bucket.
+        """
+
+        wait = self.reserve()
+
+        while wait > 0:
+            time.sleep(wait)
+            wait = self.reserve()
+
+    def success(self) -> float:
+        """Function to increase the rate after a successful request.
+
+        Returns:
+            float -- New rate, in requests per second.
+        """
+
+        return self.__adjust('increase')
+
+    def throttled(self) -> float:
+        """Function to decrease the rate after a throttled request, and
+        empty the bucket.
+
+        Returns:
+            float -- New rate, in requests per second.
+        """
+
+        return self.__adjust('decrease')
+
+    def backoff(self, attempt: int) -> float:
+        """Function to get the delay before retrying a throttled request,
+        drawn uniformly up to an exponentially increasing delay ("full
+        jitter"), so that throttled workers do not retry at once. (The
+        `random` module is reseeded in forked worker processes.)
+
+        Arguments:
+            attempt {int} -- Number of the attempt that was throttled, from 0.
+
+        Returns:
+            float -- Delay, in seconds.
+        """
+
+        return random.uniform(0, min(self.retry_backoff_max,
+                                     self.retry_backoff * 2**attempt))
+
+    def __adjust(self, direction: str) -> float:
+        return float(self.aimd_script(
+            keys=[RATE_LIMIT_KEY],
+            args=[self.max_rate, self.min_rate, self.increase, self.decrease,
+                  direction]))
+
+
+def isThrottled(status: int) -> bool:
+    """Function to check if a request was throttled, from its HTTP status
+    (429, too many requests, or a server error).
+
+    Arguments:
+        status {int} -- HTTP status code.
+
+    Returns:
+        bool -- True if the request was throttled.
+    """
+
+    return status == 429 or status >= 500
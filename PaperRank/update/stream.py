@@ -0,0 +1,331 @@
+from ..util import config, getFrontier
+from .manager import Manager
+from .query import Query
+
+from redis import ConnectionPool, StrictRedis
+from redis.exceptions import ResponseError
+from time import sleep, time
+import logging
+import os
+import socket
+
+
+# Stream of PMID batches to be queried, and its consumer group
+STREAM_KEY = 'EXPLORE:STREAM'
+STREAM_GROUP = 'CRAWLERS'
+
+# PMIDs of batches dropped after `stream_max_deliveries` failed deliveries
+STREAM_FAILED_KEY = 'EXPLORE:STREAM:FAILED'
+
+
+def createStreamGroup(r: StrictRedis):
+    """Function to create the stream of PMID batches and its consumer group,
+    if they do not exist.
+
+    Arguments:
+        r {StrictRedis} -- StrictRedis object for database operations.
+    """
+
+    try:
+        r.execute_command('XGROUP', 'CREATE', STREAM_KEY, STREAM_GROUP, '0',
+                          'MKSTREAM')
+    except ResponseError as e:
+        # Group already created by another coordinator or worker
+        if not str(e).startswith('BUSYGROUP'):
+            raise
+
+
+def parseStreamEntries(entries: list) -> list:
+    """Function to parse stream entries returned by XREADGROUP or XAUTOCLAIM
+    into (entry ID, PMIDs) tuples. Entries deleted from the stream (returned
+    without fields) are skipped.
+
+    Arguments:
+        entries {list} -- Stream entries, as (entry ID, fields) pairs.
+
+    Returns:
+        list -- List of (entry ID, list of PMIDs) tuples.
+    """
+
+    batches = []
+
+    for entry_id, fields in entries or []:
+        if not fields:
+            continue
+
+        # Fields are a flat list of names and values, or a dict
+        if not isinstance(fields, dict):
+            fields = dict(zip(fields[::2], fields[1::2]))
+
+        pmids = fields[b'pmids'].decode('utf-8').split(',')
+        batches.append((entry_id, pmids))
+
+    return batches
+
+
+class StreamManager(Manager):
+    def __init__(self, conn_pool: ConnectionPool, recover: bool=False):
+        """StreamManager class initialization. The StreamManager is the
+        coordinator of a distributed crawl: it claims PMIDs from EXPLORE and
+        publishes them in batches of `pmid_per_request` to a Redis Stream,
+        to be queried by `StreamWorker` processes on any number of hosts.
+
+        IDs in INSTANCE belong to batches in the stream, which are reclaimed
+        by workers if a worker crashes, so they are not recovered by
+        default.
+
+        Arguments:
+            conn_pool {ConnectionPool} -- Connection pool to be used for
+                                          Database transactions.
+
+        Keyword Arguments:
+            recover {bool} -- True to move INSTANCE IDs back to EXPLORE
+                              (default: {False}).
+        """
+
+        super(StreamManager, self).__init__(conn_pool=conn_pool,
+                                            recover=recover)
+
+        self.max_length = config.update['stream_max_length']
+
+        createStreamGroup(self.db)
+
+    def start(self):
+        """Function to start publishing PMID batches. At most
+        `request_per_second` batches are published per second, which bounds
+        the request rate of all workers, and no batches are published while
+        `stream_max_length` batches are waiting or being queried. Returns
+        when EXPLORE and the stream are empty.
+        """
+
+        explore_count = self.getExplorationCount()
+        length = self.getStreamLength()
+
+        counter = 0
+
+        while explore_count > 0 or length > 0:
+            if explore_count > 0 and length < self.max_length:
+                # Moving PMIDs from EXPLORE to INSTANCE (atomically), dropping
+                # IDs already in SEEN
+                pmids = self.frontier.claim(
+                    name='EXPLORE',
+                    target='INSTANCE',
+                    number=self.pmid_per_second,
+                    exclude='SEEN')
+
+                # Publishing batches of `pmid_per_request` IDs
+                pipe = self.db.pipeline()
+
+                for i in range(0, len(pmids), self.pmid_per_request):
+                    pipe.execute_command(
+                        'XADD', STREAM_KEY, '*', 'pmids',
+                        ','.join(pmids[i:i + self.pmid_per_request]))
+
+                length += len(pipe.execute())
+                explore_count -= len(pmids)
+                counter += 1
+
+                logging.info('Published {0} PubMed IDs for scraping'
+                             .format(len(pmids)))
+                logging.info('There are {0} batches in the stream'
+                             .format(length))
+
+                if counter >= self.clean_interval:
+                    # Clean EXPLORE, update explore_count
+                    self.cleanExplore()
+                    explore_count = self.getExplorationCount()
+                    counter = 0
+
+            # Check if explore count is near 0, if so update
+            if explore_count < self.pmid_per_request:
+                explore_count = self.getExplorationCount()
+
+            # Wait for 1 second
+            sleep(1)
+
+            length = self.getStreamLength()
+
+            # Every published batch was queried; clean EXPLORE of the IDs
+            # added by the workers that were already seen
+            if length == 0 and counter > 0:
+                self.cleanExplore()
+                explore_count = self.getExplorationCount()
+                counter = 0
+
+        logging.info('Scrape completed with {0} IDs'
+                     .format(self.frontier.count('SEEN')))
+
+    def getStreamLength(self) -> int:
+        """Get the number of batches in the stream, waiting or being queried
+        (workers delete batches once queried).
+
+        Returns:
+            int -- Number of batches in the stream.
+        """
+
+        return int(self.db.execute_command('XLEN', STREAM_KEY))
+
+
+class StreamWorker:
+    def __init__(self, conn_pool: ConnectionPool, consumer: str=None):
+        """StreamWorker class initialization. A StreamWorker queries the PMID
+        batches published by a `StreamManager`, through the stream consumer
+        group, acknowledging and deleting each batch once queried. Batches
+        that were not acknowledged within `stream_claim_idle` seconds (e.g.
+        of crashed workers, or failed queries) are claimed with XAUTOCLAIM
+        before new batches. Batches delivered more than
+        `stream_max_deliveries` times are dropped, and their PMIDs added to
+        the 'EXPLORE:STREAM:FAILED' set.
+
+        Arguments:
+            conn_pool {ConnectionPool} -- Connection pool to be used for
+                                          Database transactions.
+
+        Keyword Arguments:
+            consumer {str} -- Name of the consumer in the group. If not
+                              provided, '<hostname>-<pid>' is used
+                              (default: {None}).
+        """
+
+        self.conn_pool = conn_pool
+        self.db = StrictRedis(connection_pool=self.conn_pool)
+
+        self.consumer = consumer or '{0}-{1}'.format(socket.gethostname(),
+                                                     os.getpid())
+
+        self.claim_idle = int(config.update['stream_claim_idle'] * 1000)
+        self.block = int(config.update['stream_block'] * 1000)
+        self.max_deliveries = config.update['stream_max_deliveries']
+
+        createStreamGroup(self.db)
+
+    def start(self, max_idle: float=None) -> int:
+        """Function to start querying batches.
+
+        Keyword Arguments:
+            max_idle {float} -- Seconds without batches after which the
+                                worker stops. If not provided, the worker
+                                runs until it is stopped (default: {None}).
+
+        Returns:
+            int -- Number of batches queried.
+        """
+
+        queried = 0
+        last_batch = time()
+
+        while max_idle is None or time() - last_batch < max_idle:
+            batches = self.claimBatches() or self.readBatches()
+
+            for entry_id, pmids in batches:
+                try:
+                    Query(conn_pool=self.conn_pool, pmids=pmids,
+                          proc_count=None, lock=None)
+                except Exception as e:
+                    # Leaving the batch pending, to be claimed again
+                    logging.error('Query of batch {0} failed with {1}'
+                                  .format(entry_id, repr(e)))
+                else:
+                    # Acknowledging and deleting the batch
+                    pipe = self.db.pipeline()
+                    pipe.execute_command('XACK', STREAM_KEY, STREAM_GROUP,
+                                         entry_id)
+                    pipe.execute_command('XDEL', STREAM_KEY, entry_id)
+                    pipe.execute()
+
+                    queried += 1
+
+                last_batch = time()
+
+        logging.info('Stopping stream worker {0} after {1} batches'
+                     .format(self.consumer, queried))
+
+        return queried
+
+    def claimBatches(self) -> list:
+        """Function to claim a batch pending for more than
+        `stream_claim_idle` seconds from another consumer (or this one).
+        A batch delivered more than `stream_max_deliveries` times is
+        dropped instead (see `dropBatch`).
+
+        Returns:
+            list -- List of (entry ID, list of PMIDs) tuples.
+        """
+
+        response = self.db.execute_command(
+            'XAUTOCLAIM', STREAM_KEY, STREAM_GROUP, self.consumer,
+            self.claim_idle, '0-0', 'COUNT', 1)
+
+        batches = parseStreamEntries(response[1])
+
+        if len(batches) > 0:
+            logging.warn('Claimed stale batch {0} with {1} PMIDs'
+                         .format(batches[0][0], len(batches[0][1])))
+
+            if self.getDeliveries(batches[0][0]) > self.max_deliveries:
+                self.dropBatch(*batches[0])
+                return []
+
+        return batches
+
+    def getDeliveries(self, entry_id: bytes) -> int:
+        """Get the number of times a pending batch was delivered to a
+        consumer (XPENDING).
+
+        Arguments:
+            entry_id {bytes} -- Entry ID of the batch.
+
+        Returns:
+            int -- Number of deliveries, or 0 if the batch is not pending.
+        """
+
+        pending = self.db.execute_command(
+            'XPENDING', STREAM_KEY, STREAM_GROUP, entry_id, entry_id, 1,
+            parse_detail=True)
+
+        if not pending:
+            return 0
+
+        # Entries are parsed as dicts, or returned as lists
+        if isinstance(pending[0], dict):
+            return int(pending[0]['times_delivered'])
+
+        return int(pending[0][3])
+
+    def dropBatch(self, entry_id: bytes, pmids: list):
+        """Function to drop a batch that keeps failing: it is acknowledged
+        and deleted, and its PMIDs are moved from INSTANCE to the
+        'EXPLORE:STREAM:FAILED' set, so that they are not queried again.
+
+        Arguments:
+            entry_id {bytes} -- Entry ID of the batch.
+            pmids {list} -- PMIDs of the batch.
+        """
+
+        logging.error('Dropping batch {0} after {1} deliveries, PMIDs {2}'
+                      .format(entry_id, self.max_deliveries, pmids))
+
+        pipe = self.db.pipeline()
+        getFrontier(pipe).release('INSTANCE', pmids)
+        pipe.sadd(STREAM_FAILED_KEY, *pmids)
+        pipe.execute_command('XACK', STREAM_KEY, STREAM_GROUP, entry_id)
+        pipe.execute_command('XDEL', STREAM_KEY, entry_id)
+        pipe.execute()
+
+    def readBatches(self) -> list:
+        """Function to read a new batch, waiting up to `stream_block`
+        seconds.
+
+        Returns:
+            list -- List of (entry ID, list of PMIDs) tuples.
+        """
+
+        response = self.db.execute_command(
+            'XREADGROUP', 'GROUP', STREAM_GROUP, self.consumer, 'COUNT', 1,
+            'BLOCK', self.block, 'STREAMS', STREAM_KEY, '>')
+
+        if not response:
+            return []
+
+        # A single stream is read
+        return parseStreamEntries(response[0][1])
@@ -1,20 +1,21 @@
 from .citation.ncbi_citation import NCBICitation as Citation
+from ..util import encodeCitations, getFrontier
 
 from collections import OrderedDict
-from redis.client import StrictPipeline
+from redis.client import Pipeline
 
 
-def worker(pipe: StrictPipeline, linkset: OrderedDict) -> StrictPipeline:
-    """Worker function. Queues actions in the `StrictPipeline` object to add
+def worker(pipe: Pipeline, linkset: OrderedDict) -> Pipeline:
+    """Worker function. Queues actions in the `Pipeline` object to add
     tuples to GRAPH, maps outbound citations in OUT, adds unseen IDs to EXPLORE
     and removes current ID from INSTANCE.
     
     Arguments:
-        pipe {StrictPipeline} -- Pipeline for the database operations.
+        pipe {Pipeline} -- Pipeline for the database operations.
         linkset {OrderedDict} -- Raw response from the NCBI API.
     
     Returns:
-        StrictPipeline -- Pipeline with queued operations.
+        Pipeline -- Pipeline with queued operations.
     """
 
     # Create citation object
@@ -23,9 +24,12 @@ def worker(pipe: StrictPipeline, linkset: OrderedDict) -> StrictPipeline:
     if citation.error:
         # Escape, return unmodified pipe if there is an error
         return pipe
+
+    # ID sets, with operations queued in the pipeline
+    frontier = getFrontier(pipe)
     
     # Adding to 'SEEN'
-    pipe.sadd('SEEN', citation.id)
+    frontier.add('SEEN', [citation.id])
 
     # Building inbound and outbound tuples
     out_tuples = ['("{0}","{1}")'.format(citation.id, i)
@@ -33,9 +37,10 @@ def worker(pipe: StrictPipeline, linkset: OrderedDict) -> StrictPipeline:
     in_tuples = ['("{0}","{1}")'.format(i, citation.id)
                  for i in citation.inbound]
 
-    # Saving inbound, outbound lists and outbound degree (even if empty)
-    pipe.hmset('OUT', {citation.id: citation.outbound})
-    pipe.hmset('IN', {citation.id: citation.inbound})
+    # Saving inbound, outbound lists (in the binary encoding) and outbound
+    # degree (even if empty)
+    pipe.hmset('OUT', {citation.id: encodeCitations(citation.outbound)})
+    pipe.hmset('IN', {citation.id: encodeCitations(citation.inbound)})
     pipe.hmset('OUT_DEGREE', {citation.id: len(citation.outbound)})
 
     if (len(out_tuples) + len(in_tuples)) > 0:
@@ -45,14 +50,13 @@ def worker(pipe: StrictPipeline, linkset: OrderedDict) -> StrictPipeline:
         pipe.sadd('GRAPH', *in_tuples, *out_tuples)
 
         # Add all inbound and outbound IDs to EXPLORE
-        pipe.sadd('EXPLORE',
-                  *citation.inbound, *citation.outbound)
+        frontier.add('EXPLORE', citation.inbound + citation.outbound)
         # Store the difference of `EXPLORE`` and `SEEN` in `EXPLORE`
         # NOTE: Temporarily commented out, this takes too long
         # pipe.sdiffstore('EXPLORE', 'EXPLORE', 'SEEN')
     else:
         # No inbound or outbound citations; add to `DANGLING`
-        pipe.sadd('DANGLING', citation.id)
+        frontier.add('DANGLING', [citation.id])
 
     # Return pipe object with new instructions
     return pipe
@@ -1,2 +1,6 @@
 from .configuration import setup as configSetup
 from .configuration import Parameters as config
+from .citation_encoding import countCitations, decodeCitations, \
+    encodeCitations, isEncoded, migrateCitationEncoding
+from .frontier import BitmapFrontier, getFrontier, migrateToBitmap, \
+    SetFrontier
@@ -0,0 +1,142 @@
+from redis import StrictRedis
+import logging
+import numpy as np
+import re
+
+
+# Header of the binary citation list encoding (magic and version), followed
+# by the IDs as packed little-endian uint32
+CITATION_HEADER = b'PRC\x01'
+CITATION_DTYPE = np.dtype('<u4')
+
+# IDs in the legacy encoding (string representation of a list of IDs)
+LEGACY_ID = re.compile(rb'\d+')
+
+
+def encodeCitations(citations: list) -> bytes:
+    """Function to encode a citation list for the 'IN' and 'OUT' databases,
+    as packed little-endian uint32 IDs after a versioned header.
+
+    Arguments:
+        citations {list} -- List of IDs (int or str).
+
+    Returns:
+        bytes -- Encoded citation list.
+    """
+
+    return CITATION_HEADER + np.array(citations, dtype=np.int64) \
+        .astype(CITATION_DTYPE).tobytes()
+
+
+def isEncoded(citations: bytes) -> bool:
+    """Function to check if a stored citation list has the binary encoding
+    (and not the legacy encoding).
+
+    Arguments:
+        citations {bytes} -- Stored citation list.
+
+    Returns:
+        bool -- True if the citation list has the binary encoding.
+    """
+
+    return citations is not None and citations.startswith(CITATION_HEADER)
+
+
+def decodeCitations(citations: bytes) -> np.array:
+    """Function to decode a citation list stored in the 'IN' or 'OUT'
+    databases, in the binary encoding or in the legacy encoding (the string
+    representation of a list of IDs, parsed without `eval`). Missing lists
+    (None) have no citations.
+
+    Arguments:
+        citations {bytes} -- Stored citation list.
+
+    Returns:
+        np.array -- int64 array of IDs.
+    """
+
+    if citations is None:
+        return np.zeros(0, dtype=np.int64)
+
+    if isEncoded(citations):
+        return np.frombuffer(citations, dtype=CITATION_DTYPE,
+                             offset=len(CITATION_HEADER)).astype(np.int64)
+
+    return np.array(LEGACY_ID.findall(citations)).astype(np.int64)
+
+
+def countCitations(citations: bytes) -> int:
+    """Function to count the citations in a citation list stored in the
+    'IN' or 'OUT' databases, without decoding it.
+
+    Arguments:
+        citations {bytes} -- Stored citation list.
+
+    Returns:
+        int -- Number of citations.
+    """
+
+    if citations is None:
+        return 0
+
+    if isEncoded(citations):
+        return (len(citations) - len(CITATION_HEADER)) // \
+            CITATION_DTYPE.itemsize
+
+    citations = citations.strip()
+
+    if citations in (b'', b'[]'):
+        return 0
+
+    return citations.count(b',') + 1
+
+
+def migrateCitationEncoding(r: StrictRedis, name: str,
+                            batch_size: int=10000) -> int:
+    """Function to migrate the citation lists of the 'IN' or 'OUT' database
+    from the legacy encoding to the binary encoding. The database is walked
+    with HSCAN, and the re-encoded lists of each batch are written with a
+    single pipelined HMSET. Lists with the binary encoding are skipped, so
+    the migration can be interrupted and resumed.
+
+    Arguments:
+        r {StrictRedis} -- StrictRedis object for database operations.
+        name {str} -- Name of the database ('IN' or 'OUT').
+
+    Keyword Arguments:
+        batch_size {int} -- Number of IDs scanned per database call.
+                            (default: {10000})
+
+    Returns:
+        int -- Number of citation lists migrated.
+    """
+
+    logging.info('Migrating {0} citation lists in {1} to the binary \
+        encoding'.format(r.hlen(name), name))
+
+    migrated = 0
+    cursor = 0
+
+    pipe = r.pipeline(transaction=False)
+
+    while True:
+        cursor, batch = r.hscan(name, cursor=cursor, count=batch_size)
+
+        legacy = {
+            i: encodeCitations(decodeCitations(j))
+            for i, j in batch.items() if not isEncoded(j)
+        }
+
+        if len(legacy) > 0:
+            pipe.hmset(name, legacy)
+            pipe.execute()
+
+            migrated += len(legacy)
+
+            logging.info('Migrated {0} citation lists in {1}'
+                         .format(migrated, name))
+
+        if int(cursor) == 0:
+            break
+
+    return migrated
@@ -0,0 +1,537 @@
+from .configuration import Parameters as config
+
+from redis import StrictRedis
+from time import time
+import logging
+import numpy as np
+
+
+# Bytes of the EXPLORE bitmap read per round trip when sampling IDs
+BITMAP_CHUNK_SIZE = 2**16
+
+# Lua script for the bitmap difference KEYS[1] = KEYS[1] AND NOT KEYS[2],
+# with KEYS[3] as a temporary key. BITOP pads shorter bitmaps with zeros, so
+# the negated bitmap is padded to the length of KEYS[1] before negation.
+BITMAP_DIFFERENCE_SCRIPT = """
+local length = redis.call('STRLEN', KEYS[1])
+if length == 0 then
+    return 0
+end
+redis.call('BITOP', 'OR', KEYS[3], KEYS[2])
+if redis.call('STRLEN', KEYS[3]) < length then
+    redis.call('SETRANGE', KEYS[3], length - 1, '\\0')
+end
+redis.call('BITOP', 'NOT', KEYS[3], KEYS[3])
+redis.call('BITOP', 'AND', KEYS[1], KEYS[1], KEYS[3])
+redis.call('DEL', KEYS[3])
+return redis.call('BITCOUNT', KEYS[1])
+"""
+
+# Lua helper calling a variadic command on a key, in chunks of arguments to
+# stay within the Lua stack limit of `unpack`
+CHUNKED_CALL = """
+local function chunkedCall(command, key, values)
+    for i = 1, #values, 1000 do
+        redis.call(command, key,
+                   unpack(values, i, math.min(i + 999, #values)))
+    end
+end
+local function leases(ids, timestamp)
+    local scores = {}
+    for i, id in ipairs(ids) do
+        scores[2 * i - 1] = timestamp
+        scores[2 * i] = id
+    end
+    return scores
+end
+"""
+
+# Lua script moving up to ARGV[1] random IDs from the set KEYS[1] to the set
+# KEYS[2], with lease timestamp ARGV[2] in the sorted set KEYS[3]. IDs in
+# the optional set KEYS[4] are removed from KEYS[1] without being claimed.
+# Scripts with SPOP (a random command) must replicate their effects on
+# Redis < 5.
+SET_CLAIM_SCRIPT = CHUNKED_CALL + """
+if redis.replicate_commands then
+    redis.replicate_commands()
+end
+local ids = {}
+for _, id in ipairs(redis.call('SPOP', KEYS[1], ARGV[1])) do
+    if #KEYS < 4 or redis.call('SISMEMBER', KEYS[4], id) == 0 then
+        ids[#ids + 1] = id
+    end
+end
+if #ids > 0 then
+    chunkedCall('SADD', KEYS[2], ids)
+    chunkedCall('ZADD', KEYS[3], leases(ids, ARGV[2]))
+end
+return ids
+"""
+
+# Lua script moving the IDs with a lease timestamp up to ARGV[1] in the
+# sorted set KEYS[3] from the set KEYS[1] back to the set KEYS[2]
+SET_RECLAIM_SCRIPT = CHUNKED_CALL + """
+local ids = redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', ARGV[1])
+if #ids > 0 then
+    chunkedCall('SREM', KEYS[1], ids)
+    chunkedCall('SADD', KEYS[2], ids)
+    chunkedCall('ZREM', KEYS[3], ids)
+end
+return #ids
+"""
+
+# Bitmap versions of the claim and reclaim scripts. IDs are claimed in
+# order with BITPOS (one bit at a time, as the Lua `bit` library is not
+# available in every Redis build), from the rotating cursor KEYS[4] (the ID
+# after the last claimed ID), wrapping around to the start of KEYS[1] once.
+# IDs added back to KEYS[1] (e.g. of failed requests) are thus only claimed
+# again after the other IDs. IDs in the optional bitmap KEYS[5] are removed
+# without being claimed. As with SPOP, at most ARGV[1] IDs are removed from
+# KEYS[1], including the excluded IDs, so fewer IDs may be claimed.
+BITMAP_CLAIM_SCRIPT = CHUNKED_CALL + """
+local ids = {}
+local cursor = tonumber(redis.call('GET', KEYS[4])) or 0
+local start = math.floor(cursor / 8)
+local wrapped = cursor == 0
+local steps = 0
+local last = -1
+while steps < tonumber(ARGV[1]) do
+    local id = redis.call('BITPOS', KEYS[1], 1, start)
+    if id >= 0 and id < cursor and not wrapped then
+        -- Skipping the IDs before the cursor, in the byte of the cursor
+        id = redis.call('BITPOS', KEYS[1], 1, start + 1)
+        for bit = (start + 1) * 8 - 1, cursor, -1 do
+            if redis.call('GETBIT', KEYS[1], bit) == 1 then
+                id = bit
+            end
+        end
+    end
+    if id < 0 then
+        if wrapped then
+            break
+        end
+        start = 0
+        wrapped = true
+    else
+        steps = steps + 1
+        last = id
+        redis.call('SETBIT', KEYS[1], id, 0)
+        if #KEYS < 5 or redis.call('GETBIT', KEYS[5], id) == 0 then
+            redis.call('SETBIT', KEYS[2], id, 1)
+            ids[#ids + 1] = id
+        end
+        start = math.floor(id / 8)
+    end
+end
+if last >= 0 then
+    redis.call('SET', KEYS[4], last + 1)
+end
+if #ids > 0 then
+    chunkedCall('ZADD', KEYS[3], leases(ids, ARGV[2]))
+end
+return ids
+"""
+
+BITMAP_RECLAIM_SCRIPT = CHUNKED_CALL + """
+local ids = redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', ARGV[1])
+for _, id in ipairs(ids) do
+    redis.call('SETBIT', KEYS[1], id, 0)
+    redis.call('SETBIT', KEYS[2], id, 1)
+end
+if #ids > 0 then
+    chunkedCall('ZREM', KEYS[3], ids)
+end
+return #ids
+"""
+
+
+class SetFrontier:
+    CLAIM_SCRIPT = SET_CLAIM_SCRIPT
+    RECLAIM_SCRIPT = SET_RECLAIM_SCRIPT
+
+    def __init__(self, r: StrictRedis):
+        """Initialization logic for the SetFrontier class, which stores the
+        'SEEN', 'EXPLORE', 'INSTANCE' and 'DANGLING' ID sets of the update
+        engine as Redis sets of IDs.
+
+        Operations that write IDs take an optional pipeline, to be queued
+        with other database operations.
+
+        Arguments:
+            r {StrictRedis} -- StrictRedis object for database operations.
+        """
+
+        self.r = r
+
+        self.claim_script = self.r.register_script(self.CLAIM_SCRIPT)
+        self.reclaim_script = self.r.register_script(self.RECLAIM_SCRIPT)
+
+    def _key(self, name: str) -> str:
+        return name
+
+    def _leaseKey(self, name: str) -> str:
+        return '{0}:LEASE'.format(name)
+
+    def _claimKeys(self, name: str, target: str) -> list:
+        return [self._key(name), self._key(target), self._leaseKey(target)]
+
+    def add(self, name: str, ids: list, pipe: StrictRedis=None):
+        """Function to add IDs to a set.
+
+        Arguments:
+            name {str} -- Name of the set.
+            ids {list} -- IDs to be added.
+
+        Keyword Arguments:
+            pipe {StrictRedis} -- Pipeline to queue the operation in
+                                  (default: {None}).
+        """
+
+        if len(ids) > 0:
+            (pipe or self.r).sadd(name, *ids)
+
+    def remove(self, name: str, ids: list, pipe: StrictRedis=None):
+        """Function to remove IDs from a set.
+
+        Arguments:
+            name {str} -- Name of the set.
+            ids {list} -- IDs to be removed.
+
+        Keyword Arguments:
+            pipe {StrictRedis} -- Pipeline to queue the operation in
+                                  (default: {None}).
+        """
+
+        if len(ids) > 0:
+            (pipe or self.r).srem(name, *ids)
+
+    def count(self, name: str) -> int:
+        """Function to count the IDs in a set.
+
+        Arguments:
+            name {str} -- Name of the set.
+
+        Returns:
+            int -- Number of IDs in the set.
+        """
+
+        return int(self.r.scard(name))
+
+    def members(self, name: str) -> np.array:
+        """Function to get the IDs in a set.
+
+        Arguments:
+            name {str} -- Name of the set.
+
+        Returns:
+            np.array -- int64 array of IDs (in no particular order).
+        """
+
+        return np.array([int(i) for i in self.r.smembers(name)],
+                        dtype=np.int64)
+
+    def sample(self, name: str, number: int) -> list:
+        """Function to get (without removing) up to `number` IDs of a set.
+
+        Arguments:
+            name {str} -- Name of the set.
+            number {int} -- Number of IDs.
+
+        Returns:
+            list -- IDs, as strings.
+        """
+
+        return [i.decode('utf-8') for i in
+                self.r.srandmember(name=name, number=number)]
+
+    def claim(self, name: str, target: str, number: int,
+              exclude: str=None) -> list:
+        """Function to move up to `number` IDs from a set to the `target`
+        set, in a single atomic server-side step. The time of the claim is
+        recorded for each ID in the '<target>:LEASE' sorted set, until the ID
+        is released (see `release`) or reclaimed (see `reclaim`).
+
+        Arguments:
+            name {str} -- Name of the set.
+            target {str} -- Name of the set of claimed IDs.
+            number {int} -- Number of IDs.
+
+        Keyword Arguments:
+            exclude {str} -- Name of a set of IDs that are removed from the
+                             set without being claimed, e.g. 'SEEN'. These
+                             count towards `number`, so that a claim takes
+                             at most `number` steps (default: {None}).
+
+        Returns:
+            list -- Claimed IDs, as strings.
+        """
+
+        keys = self._claimKeys(name, target)
+
+        if exclude is not None:
+            keys.append(self._key(exclude))
+
+        ids = self.claim_script(keys=keys, args=[number, time()])
+
+        return [i.decode('utf-8') if isinstance(i, bytes) else str(i)
+                for i in ids]
+
+    def release(self, name: str, ids: list, pipe: StrictRedis=None):
+        """Function to remove claimed IDs from a set, with their lease.
+
+        Arguments:
+            name {str} -- Name of the set of claimed IDs.
+            ids {list} -- IDs to be removed.
+
+        Keyword Arguments:
+            pipe {StrictRedis} -- Pipeline to queue the operation in
+                                  (default: {None}).
+        """
+
+        if len(ids) > 0:
+            self.remove(name, ids, pipe=pipe)
+            (pipe or self.r).zrem(self._leaseKey(name), *ids)
+
+    def reclaim(self, name: str, target: str, max_age: float) -> int:
+        """Function to move the IDs claimed more than `max_age` seconds ago
+        from a set of claimed IDs back to the `target` set, in a single
+        atomic server-side step. IDs without a lease are not moved.
+
+        Arguments:
+            name {str} -- Name of the set of claimed IDs.
+            target {str} -- Name of the set the IDs are moved to.
+            max_age {float} -- Age of the oldest claim kept, in seconds.
+
+        Returns:
+            int -- Number of IDs reclaimed.
+        """
+
+        return int(self.reclaim_script(keys=[self._key(name),
+                                             self._key(target),
+                                             self._leaseKey(name)],
+                                       args=[time() - max_age]))
+
+    def difference(self, name: str, other: str):
+        """Function to remove the IDs of the `other` set from a set.
+
+        Arguments:
+            name {str} -- Name of the set.
+            other {str} -- Name of the set of IDs to be removed.
+        """
+
+        self.r.sdiffstore(name, name, other)
+
+    def union(self, name: str, other: str, pipe: StrictRedis=None):
+        """Function to add the IDs of the `other` set to a set.
+
+        Arguments:
+            name {str} -- Name of the set.
+            other {str} -- Name of the set of IDs to be added.
+
+        Keyword Arguments:
+            pipe {StrictRedis} -- Pipeline to queue the operation in
+                                  (default: {None}).
+        """
+
+        (pipe or self.r).sunionstore(name, name, other)
+
+    def delete(self, name: str, pipe: StrictRedis=None):
+        """Function to delete a set.
+
+        Arguments:
+            name {str} -- Name of the set.
+
+        Keyword Arguments:
+            pipe {StrictRedis} -- Pipeline to queue the operation in
+                                  (default: {None}).
+        """
+
+        (pipe or self.r).delete(name, self._leaseKey(name))
+
+
+class BitmapFrontier(SetFrontier):
+    CLAIM_SCRIPT = BITMAP_CLAIM_SCRIPT
+    RECLAIM_SCRIPT = BITMAP_RECLAIM_SCRIPT
+
+    def __init__(self, r: StrictRedis):
+        """Initialization logic for the BitmapFrontier class, which stores
+        the ID sets of the update engine as Redis bitmaps (in the
+        '<name>:BITMAP' keys), where bit i is set if ID i is in the set.
+        As PubMed IDs are dense integers, this takes 1 bit per possible ID
+        (about 5MB per set), instead of tens of bytes per member, and the
+        difference and union of sets are computed with BITOP in O(words).
+        IDs that are not integers cannot be stored, and are skipped. IDs are
+        claimed in order from a rotating cursor (in the '<name>:CURSOR'
+        keys), so that IDs added back to a set are claimed after the others.
+
+        Arguments:
+            r {StrictRedis} -- StrictRedis object for database operations.
+        """
+
+        super(BitmapFrontier, self).__init__(r)
+
+        self.difference_script = self.r.register_script(
+            BITMAP_DIFFERENCE_SCRIPT)
+
+    def _key(self, name: str) -> str:
+        return '{0}:BITMAP'.format(name)
+
+    def _cursorKey(self, name: str) -> str:
+        return '{0}:CURSOR'.format(name)
+
+    def _claimKeys(self, name: str, target: str) -> list:
+        return [self._key(name), self._key(target), self._leaseKey(target),
+                self._cursorKey(name)]
+
+    def __setBits(self, name: str, ids: list, value: int, pipe: StrictRedis):
+        offsets = []
+
+        for i in ids:
+            i = i.decode('utf-8') if isinstance(i, bytes) else str(i)
+
+            if not i.isdigit():
+                logging.warn('Skipping non-integer ID {0} in {1}'
+                             .format(i, name))
+                continue
+
+            offsets += ['SET', 'u1', i, value]
+
+        # Setting every bit with a single BITFIELD command
+        if len(offsets) > 0:
+            (pipe or self.r).execute_command('BITFIELD', self._key(name),
+                                             *offsets)
+
+    def add(self, name: str, ids: list, pipe: StrictRedis=None):
+        self.__setBits(name, ids, 1, pipe)
+
+    def remove(self, name: str, ids: list, pipe: StrictRedis=None):
+        self.__setBits(name, ids, 0, pipe)
+
+    def count(self, name: str) -> int:
+        return int(self.r.bitcount(self._key(name)))
+
+    def members(self, name: str) -> np.array:
+        bitmap = self.r.get(self._key(name)) or b''
+
+        # Bit 0 is the most significant bit of the first byte
+        return np.nonzero(np.unpackbits(
+            np.frombuffer(bitmap, dtype=np.uint8)))[0].astype(np.int64)
+
+    def sample(self, name: str, number: int) -> list:
+        """Function to get (without removing) up to `number` IDs of a set,
+        in order from the claim cursor of the set (see `claim`), wrapping
+        around to its smallest IDs. The bitmap is read in chunks of
+        `BITMAP_CHUNK_SIZE` bytes.
+
+        Arguments:
+            name {str} -- Name of the set.
+            number {int} -- Number of IDs.
+
+        Returns:
+            list -- IDs, as strings.
+        """
+
+        key = self._key(name)
+        cursor = int(self.r.get(self._cursorKey(name)) or 0)
+        length = self.r.strlen(key)
+
+        ids = []
+
+        # IDs from the cursor to the end, and from the start to the cursor
+        for first, end, keep in [
+                (cursor // 8, length, lambda bits: bits >= cursor),
+                (0, min(cursor // 8 + 1, length),
+                 lambda bits: bits < cursor)]:
+            for start in range(first, end, BITMAP_CHUNK_SIZE):
+                if len(ids) >= number:
+                    return ids
+
+                chunk = self.r.getrange(
+                    key, start, min(start + BITMAP_CHUNK_SIZE, end) - 1)
+
+                bits = np.nonzero(np.unpackbits(
+                    np.frombuffer(chunk, dtype=np.uint8)))[0] + start * 8
+                bits = bits[keep(bits)]
+                ids += [str(i) for i in bits[:number - len(ids)]]
+
+        return ids
+
+    def difference(self, name: str, other: str):
+        self.difference_script(keys=[self._key(name), self._key(other),
+                                     self._key(name + ':DIFF')])
+
+    def union(self, name: str, other: str, pipe: StrictRedis=None):
+        (pipe or self.r).bitop('OR', self._key(name), self._key(name),
+                               self._key(other))
+
+    def delete(self, name: str, pipe: StrictRedis=None):
+        (pipe or self.r).delete(self._key(name), self._leaseKey(name),
+                                self._cursorKey(name))
+
+
+# Frontier backends, selected with `update.frontier`
+FRONTIERS = {
+    'set': SetFrontier,
+    'bitmap': BitmapFrontier
+}
+
+
+def getFrontier(r: StrictRedis) -> SetFrontier:
+    """Function to get the frontier backend selected with `update.frontier`.
+
+    Arguments:
+        r {StrictRedis} -- StrictRedis object for database operations.
+
+    Raises:
+        RuntimeError -- Raised when the frontier backend is invalid.
+
+    Returns:
+        SetFrontier -- Frontier backend.
+    """
+
+    frontier = config.update['frontier']
+
+    if frontier not in FRONTIERS:
+        logging.error('Invalid frontier backend {0}, must be one of {1}'
+                      .format(frontier, list(FRONTIERS.keys())))
+        raise RuntimeError('Invalid frontier backend.')
+
+    return FRONTIERS[frontier](r)
+
+
+def migrateToBitmap(r: StrictRedis, names: list=None,
+                    batch_size: int=10000):
+    """Function to copy the ID sets of the update engine to bitmaps, to
+    switch `update.frontier` from 'set' to 'bitmap'. Sets are walked with
+    SSCAN, and the IDs of each batch are set with a single BITFIELD
+    command. The sets are not deleted.
+
+    Arguments:
+        r {StrictRedis} -- StrictRedis object for database operations.
+
+    Keyword Arguments:
+        names {list} -- Names of the sets to be copied. If not provided,
+                        'SEEN', 'EXPLORE', 'INSTANCE' and 'DANGLING' are
+                        copied (default: {None}).
+        batch_size {int} -- Number of IDs scanned per database call.
+                            (default: {10000})
+    """
+
+    names = names or ['SEEN', 'EXPLORE', 'INSTANCE', 'DANGLING']
+    bitmap = BitmapFrontier(r)
+
+    for name in names:
+        logging.info('Copying {0} IDs in {1} to a bitmap'
+                     .format(r.scard(name), name))
+
+        cursor = 0
+
+        while True:
+            cursor, batch = r.sscan(name, cursor=cursor, count=batch_size)
+            bitmap.add(name, batch)
+
+            if int(cursor) == 0:
+                break
+
+        logging.info('Copied {0} IDs to the {1} bitmap'
+                     .format(bitmap.count(name), name))
@@ -0,0 +1,106 @@
+# Benchmark for the column rebalancing step of `MarkovTransitionMatrix`.
+# Compares the vectorized `__adjustTransitionMatrix` with the previous
+# per-column implementation on a synthetic graph (10M edges by default).
+# The per-column implementation is timed on a subset of the columns and
+# extrapolated to the full matrix, as it takes hours at this scale.
+#
+# Usage: python adjust_transition_matrix.py [nodes] [edges] [sample_columns]
+
+from context import PaperRank
+
+from scipy import sparse
+from time import time
+import numpy as np
+import sys
+
+
+def syntheticUnadjustedMatrix(N: int, E: int, seed: int=0) \
+        -> sparse.csc_matrix:
+    """Function to build a synthetic unadjusted transition matrix with
+    roughly `E` elements, where the out degree of each column is at least
+    the number of its nonzero elements (i.e. some columns leak probability,
+    as they do with citations to papers that are not in SEEN).
+
+    Arguments:
+        N {int} -- Number of nodes.
+        E {int} -- Number of edges.
+
+    Keyword Arguments:
+        seed {int} -- Random seed (default: {0}).
+
+    Returns:
+        sparse.csc_matrix -- Unadjusted transition matrix.
+    """
+
+    rng = np.random.RandomState(seed)
+
+    # Power-law distributed citing papers, uniformly distributed cited papers
+    cols = (rng.pareto(1.5, E) * N / 100).astype(np.int64) % N
+    rows = rng.randint(0, N, E)
+
+    M = sparse.coo_matrix((np.ones(E), (rows, cols)), shape=(N, N)).tocsc()
+    M.data[:] = 1
+
+    # Out degree is the column count, plus a few unseen citations
+    counts = np.diff(M.indptr)
+    out_degree = counts + rng.poisson(0.5, N)
+    out_degree[out_degree == 0] = 1
+    M.data = 1 / np.repeat(out_degree, counts).astype(np.float64)
+
+    return M
+
+
+def legacyAdjustTransitionMatrix(M: sparse.csc_matrix,
+                                 columns: np.array) -> sparse.csc_matrix:
+    """Previous per-column implementation of the column rebalancing, limited
+    to the given `columns`.
+    """
+
+    magnitues = M.sum(axis=0)
+
+    for i in columns:
+        magnitude = magnitues[0, i]
+
+        if (magnitude < 1.0) and (magnitude != 0):
+            count = M[:, i].nnz
+            nonzero_idx = M[:, i].nonzero()[0]
+            for idx in nonzero_idx:
+                M[idx, i] = 1 / count
+
+    return M
+
+
+if __name__ == '__main__':
+    N = int(sys.argv[1]) if len(sys.argv) > 1 else 10**6
+    E = int(sys.argv[2]) if len(sys.argv) > 2 else 10**7
+    sample = int(sys.argv[3]) if len(sys.argv) > 3 else 10**3
+
+    PaperRank.util.configSetup()
+
+    print('Building synthetic {0}x{0} matrix with {1} edges'.format(N, E))
+    M = syntheticUnadjustedMatrix(N, E)
+    print('Synthetic matrix has {0} elements'.format(M.nnz))
+
+    markov_matrix = PaperRank.compute.transition_matrix \
+        .MarkovTransitionMatrix(r=None, seen=np.arange(N), id_idx_map=None)
+    adjust = markov_matrix._MarkovTransitionMatrix__adjustTransitionMatrix
+
+    # Vectorized implementation
+    start = time()
+    M_vectorized = adjust(M.copy())
+    vectorized_time = time() - start
+
+    # Per-column implementation, on an evenly spaced sample of the columns
+    columns = np.linspace(0, N - 1, min(sample, N)).astype(np.int64)
+    start = time()
+    M_legacy = legacyAdjustTransitionMatrix(M.copy(), columns)
+    legacy_time = (time() - start) * N / columns.size
+
+    # Verifying that both implementations agree on the sampled columns
+    difference = abs(M_vectorized[:, columns] - M_legacy[:, columns]).max()
+
+    print('Vectorized:  {0:10.3f}s'.format(vectorized_time))
+    print('Per-column:  {0:10.3f}s (extrapolated from {1} columns)'
+          .format(legacy_time, columns.size))
+    print('Speedup:     {0:10.1f}x'.format(legacy_time / vectorized_time))
+    print('Max difference on sampled columns: {0}'.format(difference))
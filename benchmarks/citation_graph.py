@@ -0,0 +1,153 @@
+# Synthetic power-law citation graph generator. Papers are numbered from
+# oldest (1) to newest (N), and each paper cites older papers, chosen with a
+# probability proportional to a power-law distributed fitness (so that the
+# number of inbound citations follows a power law). The graph is loaded into
+# the Redis database used by the tests (`test.redis`), in the 'SEEN', 'IN',
+# 'OUT' and 'OUT_DEGREE' layout written by the `update` engine workers.
+#
+# WARNING: Loading a graph flushes the database.
+#
+# Usage: python citation_graph.py [nodes] [mean_citations]
+
+from context import PaperRank
+from PaperRank.util import encodeCitations, getFrontier
+
+from redis import StrictRedis
+from time import time
+import numpy as np
+import sys
+
+
+def generateCitationGraph(N: int, mean_citations: float=10, seed: int=0) \
+        -> (np.array, np.array):
+    """Function to generate a synthetic citation graph with power-law
+    distributed inbound citations.
+
+    Arguments:
+        N {int} -- Number of papers, with IDs 1 (oldest) to N (newest).
+
+    Keyword Arguments:
+        mean_citations {float} -- Mean number of outbound citations
+                                  (default: {10}).
+        seed {int} -- Random seed (default: {0}).
+
+    Returns:
+        (np.array, np.array) -- IDs of the citing and cited paper of each
+                                citation, sorted by citing paper.
+    """
+
+    rng = np.random.RandomState(seed)
+
+    # Number of outbound citations of each paper (the oldest cites nothing)
+    out_degree = rng.poisson(mean_citations, N)
+    out_degree[0] = 0
+
+    citing = np.repeat(np.arange(1, N + 1), out_degree)
+
+    # Fitness of each paper, and its cumulative sum from the oldest paper
+    fitness = rng.pareto(1.5, N) + 1
+    cumulative = np.cumsum(fitness)
+
+    # Cited paper, drawn from the papers older than the citing paper with a
+    # probability proportional to their fitness
+    draws = rng.uniform(0, 1, citing.size) * cumulative[citing - 2]
+    cited = np.searchsorted(cumulative, draws, side='right') + 1
+
+    # Removing duplicate citations
+    edges = np.unique(citing * (N + 1) + cited)
+
+    return edges // (N + 1), edges % (N + 1)
+
+
+def buildAdjacencyLists(N: int, citing: np.array, cited: np.array) \
+        -> ((np.array, np.array), (np.array, np.array)):
+    """Function to build the outbound and inbound citation lists of every
+    paper, as (indptr, IDs) arrays: the citations of paper i are
+    `ids[indptr[i - 1]:indptr[i]]`.
+
+    Arguments:
+        N {int} -- Number of papers, with IDs 1 to N.
+        citing {np.array} -- ID of the citing paper of each citation.
+        cited {np.array} -- ID of the cited paper of each citation.
+
+    Returns:
+        ((np.array, np.array), (np.array, np.array)) -- Outbound and inbound
+                                                        citation lists.
+    """
+
+    # Outbound citations, by citing paper
+    out_order = np.argsort(citing, kind='mergesort')
+    out_indptr = np.searchsorted(citing[out_order], np.arange(1, N + 2))
+    out_ids = cited[out_order]
+
+    # Inbound citations, by cited paper
+    in_order = np.argsort(cited, kind='mergesort')
+    in_indptr = np.searchsorted(cited[in_order], np.arange(1, N + 2))
+    in_ids = citing[in_order]
+
+    return (out_indptr, out_ids), (in_indptr, in_ids)
+
+
+def loadCitationGraph(r: StrictRedis, N: int, citing: np.array,
+                      cited: np.array, batch_size: int=10000):
+    """Function to load a citation graph into Redis, in the 'SEEN', 'IN',
+    'OUT' and 'OUT_DEGREE' layout written by the `update` engine workers.
+
+    Arguments:
+        r {StrictRedis} -- StrictRedis object for database operations.
+        N {int} -- Number of papers, with IDs 1 to N.
+        citing {np.array} -- ID of the citing paper of each citation.
+        cited {np.array} -- ID of the cited paper of each citation.
+
+    Keyword Arguments:
+        batch_size {int} -- Number of IDs written per pipeline round trip
+                            (default: {10000}).
+    """
+
+    (out_indptr, out_ids), (in_indptr, in_ids) = \
+        buildAdjacencyLists(N, citing, cited)
+
+    pipe = r.pipeline(transaction=False)
+    frontier = getFrontier(pipe)
+
+    for start in range(0, N, batch_size):
+        ids = range(start + 1, min(start + batch_size, N) + 1)
+
+        # Citation lists, in the encoding written by the workers
+        outbound = {
+            i: encodeCitations(out_ids[out_indptr[i - 1]:out_indptr[i]])
+            for i in ids}
+        inbound = {
+            i: encodeCitations(in_ids[in_indptr[i - 1]:in_indptr[i]])
+            for i in ids}
+        out_degree = {i: int(out_indptr[i] - out_indptr[i - 1])
+                      for i in ids}
+
+        frontier.add('SEEN', ids)
+        pipe.hmset('OUT', outbound)
+        pipe.hmset('IN', inbound)
+        pipe.hmset('OUT_DEGREE', out_degree)
+        pipe.execute()
+
+
+if __name__ == '__main__':
+    N = int(sys.argv[1]) if len(sys.argv) > 1 else 10**5
+    mean_citations = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    PaperRank.util.configSetup()
+    config = PaperRank.util.config
+
+    r = StrictRedis(host=config.test['redis']['host'],
+                    port=config.test['redis']['port'],
+                    db=config.test['redis']['db'])
+
+    start = time()
+    citing, cited = generateCitationGraph(N, mean_citations)
+    print('Generated {0} papers and {1} citations in {2:.2f}s'
+          .format(N, citing.size, time() - start))
+
+    r.flushdb()
+
+    start = time()
+    loadCitationGraph(r, N, citing, cited)
+    print('Loaded graph into Redis in {0:.2f}s'.format(time() - start))
@@ -0,0 +1,119 @@
+# Benchmark of the stages of a `compute.Manager` run, on synthetic power-law
+# citation graphs (see `citation_graph.py`) of 10^4 to 10^7 papers, loaded
+# into the Redis database used by the tests (`test.redis`). Stage timings
+# are recorded with the `Manager` instrumentation, and compared with the
+# baselines stored in `baselines/compute_<nodes>.json` (if any); `--save`
+# stores the timings of the run as the new baselines, e.g. before a change
+# to `transition_matrix.py` or `paperrank.py`.
+#
+# WARNING: Loading a graph flushes the database.
+#
+# Usage: python compute.py [nodes ...] [--save]
+
+from context import PaperRank
+from citation_graph import generateCitationGraph, loadCitationGraph
+
+from redis import StrictRedis
+import json
+import os
+import sys
+
+
+BASELINE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               'baselines')
+
+
+def benchmarkCompute(r: StrictRedis, N: int) -> dict:
+    """Function to load a synthetic citation graph of N papers, and time the
+    stages of a `Manager` run on it (without exporting the PaperRanks).
+
+    Arguments:
+        r {StrictRedis} -- StrictRedis object for database operations.
+        N {int} -- Number of papers.
+
+    Returns:
+        dict -- Run report, with the 'stages' and solver 'iterations'.
+    """
+
+    citing, cited = generateCitationGraph(N)
+
+    r.flushdb()
+    loadCitationGraph(r, N, citing, cited)
+
+    compute_manager = PaperRank.compute.Manager(r=r)
+    compute_manager.start(export=False)
+
+    return {
+        'nodes': N,
+        'edges': int(citing.size),
+        'stages': compute_manager.instrumentation.stages,
+        'iterations': compute_manager.instrumentation.iterations
+    }
+
+
+def printComparison(report: dict, baseline: dict=None):
+    """Function to print the wall time of each stage of a run, and its ratio
+    to the baseline.
+
+    Arguments:
+        report {dict} -- Run report.
+
+    Keyword Arguments:
+        baseline {dict} -- Baseline run report (default: {None}).
+    """
+
+    print('\n{0} papers, {1} citations, {2} solver iterations'.format(
+        report['nodes'], report['edges'], len(report['iterations'])))
+    print('{0:>22} {1:>10} {2:>10} {3:>10} {4:>10}'.format(
+        'stage', 'wall (s)', 'cpu (s)', 'base (s)', 'ratio'))
+
+    base = {}
+    if baseline is not None:
+        base = {i['stage']: i['wall_time'] for i in baseline['stages']}
+
+    for stage in report['stages']:
+        name = stage['stage']
+
+        if name in base:
+            comparison = '{0:>10.3f} {1:>10.2f}'.format(
+                base[name], stage['wall_time'] / max(base[name], 1e-9))
+        else:
+            comparison = '{0:>10} {1:>10}'.format('-', '-')
+
+        print('{0:>22} {1:>10.3f} {2:>10.3f} {3}'.format(
+            name, stage['wall_time'], stage['cpu_time'], comparison))
+
+
+if __name__ == '__main__':
+    save = '--save' in sys.argv
+    scales = [int(i) for i in sys.argv[1:] if i != '--save'] or \
+        [10**4, 10**5, 10**6]
+
+    PaperRank.util.configSetup()
+    config = PaperRank.util.config
+
+    r = StrictRedis(host=config.test['redis']['host'],
+                    port=config.test['redis']['port'],
+                    db=config.test['redis']['db'])
+
+    for N in scales:
+        report = benchmarkCompute(r, N)
+
+        baseline_file = os.path.join(BASELINE_FOLDER,
+                                     'compute_{0}.json'.format(N))
+
+        baseline = None
+        if os.path.exists(baseline_file):
+            with open(baseline_file) as f:
+                baseline = json.load(f)
+
+        printComparison(report, baseline)
+
+        if save:
+            if not os.path.exists(BASELINE_FOLDER):
+                os.makedirs(BASELINE_FOLDER)
+
+            with open(baseline_file, 'w') as f:
+                json.dump(report, f, indent=4)
+
+            print('Saved baseline to {0}'.format(baseline_file))
@@ -0,0 +1,9 @@
+import os
+import sys
+
+try:
+    import PaperRank
+except ModuleNotFoundError:
+    sys.path.insert(0, os.path.abspath('../'))
+    os.chdir(os.path.abspath('../'))
+    import PaperRank
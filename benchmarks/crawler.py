@@ -0,0 +1,115 @@
+# Throughput benchmark of the `update` engine, crawling a synthetic citation
+# graph served by the local elink stand-in (see `elink_server.py`) instead
+# of the NCBI API, into the Redis database used by the tests (`test.redis`).
+# Reports the IDs crawled per second, Redis commands per second, and the
+# utilization of the Query worker pool (sampled from the size of INSTANCE).
+#
+# WARNING: The benchmark flushes the database.
+#
+# Usage: python crawler.py [nodes] [seeds] [latency] [error_rate]
+#                          [mean_citations]
+
+from context import PaperRank
+from elink_server import createELinkServer, ELinkGraph
+
+from multiprocessing import Process
+from redis import ConnectionPool, StrictRedis
+from threading import Event, Thread
+from time import sleep, time
+import numpy as np
+import sys
+
+
+# Port of the elink stand-in, and interval between utilization samples
+PORT = 8765
+SAMPLE_INTERVAL = 0.5
+
+
+def serveELink(graph: ELinkGraph, latency: float, error_rate: float):
+    """Function to serve the elink stand-in, in a separate process.
+    """
+
+    server = createELinkServer(PORT, graph, latency=latency,
+                               error_rate=error_rate)
+    server.serve_forever()
+
+
+def sampleInstance(r: StrictRedis, samples: list, stop: Event):
+    """Function to sample the number of IDs in INSTANCE (i.e. being queried)
+    until `stop` is set.
+    """
+
+    frontier = PaperRank.util.getFrontier(r)
+
+    while not stop.is_set():
+        samples.append(frontier.count('INSTANCE'))
+        sleep(SAMPLE_INTERVAL)
+
+
+if __name__ == '__main__':
+    N = int(sys.argv[1]) if len(sys.argv) > 1 else 10**5
+    seeds = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    latency = float(sys.argv[3]) if len(sys.argv) > 3 else 0.2
+    error_rate = float(sys.argv[4]) if len(sys.argv) > 4 else 0.01
+    mean_citations = float(sys.argv[5]) if len(sys.argv) > 5 else 10
+
+    PaperRank.util.configSetup()
+    config = PaperRank.util.config
+
+    # Crawling the elink stand-in into the test database (the Query
+    # processes inherit the configuration)
+    config.redis.update(config.test['redis'])
+    config.ncbi_api['url'] = 'http://localhost:{0}/'.format(PORT)
+
+    graph = ELinkGraph(N, mean_citations)
+    server = Process(target=serveELink, args=(graph, latency, error_rate),
+                     daemon=True)
+    server.start()
+
+    conn_pool = ConnectionPool(host=config.redis['host'],
+                               port=config.redis['port'],
+                               db=config.redis['db'])
+    r = StrictRedis(connection_pool=conn_pool)
+
+    # Seeding EXPLORE with random IDs
+    frontier = PaperRank.util.getFrontier(r)
+
+    r.flushdb()
+    frontier.add('EXPLORE',
+                 np.random.RandomState(0).randint(1, N + 1, seeds).tolist())
+
+    # Waiting for the server to start
+    sleep(1)
+
+    update_manager = PaperRank.update.Manager(conn_pool=conn_pool,
+                                              recover=False)
+
+    samples = []
+    stop = Event()
+    sampler = Thread(target=sampleInstance, args=(r, samples, stop))
+
+    commands = int(r.info('stats')['total_commands_processed'])
+    start = time()
+    sampler.start()
+
+    update_manager.start()
+
+    elapsed = time() - start
+    stop.set()
+    sampler.join()
+    commands = int(r.info('stats')['total_commands_processed']) - commands
+
+    server.terminate()
+
+    # Queries in flight, from the IDs in INSTANCE
+    in_flight = np.mean(samples) / config.ncbi_api['pmid_per_request']
+    crawled = frontier.count('SEEN')
+
+    print('Crawled {0} of {1} papers in {2:.1f}s (latency {3}s, error rate \
+{4})'.format(crawled, N, elapsed, latency, error_rate))
+    print('{0:>24} {1:>10.1f}'.format('IDs / second', crawled / elapsed))
+    print('{0:>24} {1:>10.1f}'.format('Redis commands / second',
+                                       commands / elapsed))
+    print('{0:>24} {1:>10.1f}'.format('Queries in flight', in_flight))
+    print('{0:>24} {1:>9.1f}%'.format(
+        'Worker utilization', 100 * in_flight / update_manager.pool_size))
@@ -0,0 +1,154 @@
+# Local stand-in for the NCBI Entrez elink API (`ncbi_api.url`), serving the
+# `eLinkResult` XML of a synthetic citation graph (see `citation_graph.py`)
+# for the `update` engine. Each request is delayed by a configurable
+# latency, and fails with HTTP 429 (too many requests) with a configurable
+# probability. IDs that are not in the graph are returned with ID 0, as by
+# the NCBI API.
+#
+# Usage: python elink_server.py [port] [nodes] [mean_citations] [latency]
+#                               [error_rate]
+
+from citation_graph import buildAdjacencyLists, generateCitationGraph
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import sleep
+from urllib.parse import parse_qs, urlparse
+import numpy as np
+import sys
+
+
+def buildLinkSetDb(link_name: str, ids: list) -> str:
+    """Function to build the `LinkSetDb` element of a citation direction.
+
+    Arguments:
+        link_name {str} -- 'pubmed_pubmed_citedin' (inbound citations) or
+                           'pubmed_pubmed_refs' (outbound citations).
+        ids {list} -- Citation IDs.
+
+    Returns:
+        str -- `LinkSetDb` XML element, empty if there are no citations.
+    """
+
+    if len(ids) == 0:
+        return ''
+
+    links = ''.join('<Link><Id>{0}</Id></Link>'.format(i) for i in ids)
+
+    return '<LinkSetDb><DbTo>pubmed</DbTo><LinkName>{0}</LinkName>{1}\
+</LinkSetDb>'.format(link_name, links)
+
+
+class ELinkGraph:
+    def __init__(self, N: int, mean_citations: float=10, seed: int=0):
+        """Initialization logic for the ELinkGraph class, which builds the
+        `eLinkResult` responses of a synthetic citation graph.
+
+        Arguments:
+            N {int} -- Number of papers, with IDs 1 to N.
+
+        Keyword Arguments:
+            mean_citations {float} -- Mean number of outbound citations
+                                      (default: {10}).
+            seed {int} -- Random seed (default: {0}).
+        """
+
+        self.N = N
+
+        citing, cited = generateCitationGraph(N, mean_citations, seed)
+        self.outbound, self.inbound = buildAdjacencyLists(N, citing, cited)
+
+    def __citations(self, lists: (np.array, np.array), pmid: int) -> list:
+        indptr, ids = lists
+        return ids[indptr[pmid - 1]:indptr[pmid]].tolist()
+
+    def response(self, pmids: list) -> str:
+        """Function to build the `eLinkResult` XML response for a request,
+        with a `LinkSet` for each ID.
+
+        Arguments:
+            pmids {list} -- Requested IDs.
+
+        Returns:
+            str -- `eLinkResult` XML response.
+        """
+
+        linksets = []
+
+        for pmid in pmids:
+            pmid = int(pmid) if pmid.isdigit() else 0
+
+            if not 1 <= pmid <= self.N:
+                linksets.append('<LinkSet><DbFrom>pubmed</DbFrom><IdList>\
+<Id>0</Id></IdList></LinkSet>')
+                continue
+
+            linksets.append(
+                '<LinkSet><DbFrom>pubmed</DbFrom><IdList><Id>{0}</Id>\
+</IdList>{1}{2}</LinkSet>'.format(
+                    pmid,
+                    buildLinkSetDb('pubmed_pubmed_citedin',
+                                   self.__citations(self.inbound, pmid)),
+                    buildLinkSetDb('pubmed_pubmed_refs',
+                                   self.__citations(self.outbound, pmid))))
+
+        return '<?xml version="1.0" encoding="UTF-8" ?>\n<eLinkResult>{0}\
+</eLinkResult>'.format(''.join(linksets))
+
+
+def createELinkServer(port: int, graph: ELinkGraph, latency: float=0,
+                      error_rate: float=0) -> ThreadingHTTPServer:
+    """Function to create the stub elink HTTP server (with a thread per
+    request), to be started with `serve_forever`.
+
+    Arguments:
+        port {int} -- Port to listen on, on localhost.
+        graph {ELinkGraph} -- Citation graph to be served.
+
+    Keyword Arguments:
+        latency {float} -- Delay of each response, in seconds
+                           (default: {0}).
+        error_rate {float} -- Probability of a request failing with HTTP 429
+                              (default: {0}).
+
+    Returns:
+        ThreadingHTTPServer -- Stub elink server.
+    """
+
+    class ELinkHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            sleep(latency)
+
+            if np.random.uniform() < error_rate:
+                self.send_error(429, 'Too Many Requests')
+                return
+
+            pmids = parse_qs(urlparse(self.path).query).get('id', [])
+            body = graph.response(pmids).encode()
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/xml')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Silencing the request log
+            pass
+
+    return ThreadingHTTPServer(('localhost', port), ELinkHandler)
+
+
+if __name__ == '__main__':
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8000
+    N = int(sys.argv[2]) if len(sys.argv) > 2 else 10**5
+    mean_citations = float(sys.argv[3]) if len(sys.argv) > 3 else 10
+    latency = float(sys.argv[4]) if len(sys.argv) > 4 else 0.2
+    error_rate = float(sys.argv[5]) if len(sys.argv) > 5 else 0.01
+
+    server = createELinkServer(port, ELinkGraph(N, mean_citations),
+                               latency=latency, error_rate=error_rate)
+
+    print('Serving elink for {0} papers on http://localhost:{1}/'
+          .format(N, port))
+
+    server.serve_forever()
@@ -0,0 +1,60 @@
+# Scaling benchmark for the multi-threaded power iteration step
+# (`ParallelMatrix`, selected with `compute.workers`), from 1 thread to the
+# number of cores on the host, on a synthetic graph (see
+# `adjust_transition_matrix.py`).
+#
+# Usage: python parallel_spmv.py [nodes] [edges] [steps]
+
+from context import PaperRank
+from adjust_transition_matrix import syntheticUnadjustedMatrix
+
+from time import time
+import numpy as np
+import os
+import sys
+
+
+if __name__ == '__main__':
+    N = int(sys.argv[1]) if len(sys.argv) > 1 else 10**6
+    E = int(sys.argv[2]) if len(sys.argv) > 2 else 10**7
+    steps = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    PaperRank.util.configSetup()
+    beta = PaperRank.util.config.compute['beta']
+
+    # Synthetic graph, adjusted to be column stochastic
+    markov_matrix = PaperRank.compute.transition_matrix \
+        .MarkovTransitionMatrix(r=None, seen=np.arange(N), id_idx_map=None)
+    adjust = markov_matrix._MarkovTransitionMatrix__adjustTransitionMatrix
+    M = adjust(syntheticUnadjustedMatrix(N, E)).tocsr()
+
+    print('Synthetic graph: {0} IDs, {1} elements, {2} power iteration steps'
+          .format(N, M.nnz, steps))
+    print('{0:>8} {1:>12} {2:>10}'.format('threads', 'ms / step', 'speedup'))
+
+    # Number of threads, doubling up to the number of cores
+    cores = os.cpu_count()
+    threads = sorted(set([2**i for i in range(cores.bit_length())] +
+                         [cores]))
+
+    step = PaperRank.compute.solvers.powerStepDifference
+    initial = np.repeat(1 / N, N)
+    baseline = None
+
+    for workers in threads:
+        matrix = PaperRank.compute.util.ParallelMatrix(M, workers) \
+            if workers > 1 else M
+
+        scores = initial
+        start = time()
+        for _ in range(steps):
+            scores, difference = step(matrix, scores, beta)
+        elapsed = (time() - start) / steps
+
+        if workers > 1:
+            matrix.close()
+
+        baseline = baseline or elapsed
+
+        print('{0:>8} {1:>12.2f} {2:>10.2f}'.format(
+            workers, elapsed * 1000, baseline / elapsed))
@@ -0,0 +1,84 @@
+# Accuracy comparison of the float32 compute mode (`compute.dtype`) against
+# float64, on the sample citation graph used in the tests and on synthetic
+# graphs (see `adjust_transition_matrix.py`).
+#
+# Usage: python precision.py [nodes] [edges]
+
+from context import PaperRank
+from adjust_transition_matrix import syntheticUnadjustedMatrix
+
+from scipy import sparse, stats
+from time import time
+import numpy as np
+import sys
+
+
+def comparePrecision(name: str, M: sparse.csr_matrix):
+    """Function to compute PaperRanks with M in float64 and float32 with each
+    solver, and print the differences between the two.
+
+    Arguments:
+        name {str} -- Name of the graph.
+        M {sparse.csr_matrix} -- float64 stochastic matrix.
+    """
+
+    N = M.shape[0]
+
+    print('\n{0}: {1} IDs, {2} elements, {3:.1f}MB (float64) / {4:.1f}MB \
+(float32) matrix data'.format(name, N, M.nnz, M.data.nbytes / 2**20,
+                              M.data.nbytes / 2**21))
+    print('{0:>14} {1:>10} {2:>10} {3:>10} {4:>10} {5:>8} {6:>8} {7:>8}'
+          .format('solver', 'L1 error', 'max rel', '|sum - 1|', 'residual',
+                  'tau', 'top-100', 'speedup'))
+
+    for solver in PaperRank.compute.solvers.SOLVERS:
+        PaperRank.util.config.compute['solver'] = solver
+
+        results = {}
+
+        for dtype in [np.float64, np.float32]:
+            compute_engine = PaperRank.compute.paperrank.StablePaperRank(
+                M.astype(dtype), N)
+            start = time()
+            results[dtype] = (compute_engine.calculate(), time() - start,
+                              compute_engine.residual)
+
+        pr_64, time_64, _ = results[np.float64]
+        pr_32, time_32, residual_32 = results[np.float32]
+
+        top_64 = np.argsort(-pr_64)[:100]
+        top_32 = np.argsort(-pr_32.astype(np.float64))[:100]
+
+        print('{0:>14} {1:>10.2e} {2:>10.2e} {3:>10.2e} {4:>10.2e} {5:>8.5f} \
+{6:>8d} {7:>8.2f}'.format(
+            solver,
+            np.sum(np.absolute(pr_64 - pr_32)),
+            np.max(np.absolute(pr_64 - pr_32) / pr_64),
+            abs(np.sum(pr_32, dtype=np.float64) - 1),
+            residual_32,
+            stats.kendalltau(pr_64, pr_32)[0],
+            np.intersect1d(top_64, top_32).size,
+            time_64 / time_32))
+
+    PaperRank.util.config.compute['solver'] = 'power'
+
+
+if __name__ == '__main__':
+    N = int(sys.argv[1]) if len(sys.argv) > 1 else 10**6
+    E = int(sys.argv[2]) if len(sys.argv) > 2 else 10**7
+
+    PaperRank.util.configSetup()
+
+    # Sample citation graph from `compute_transition_matrix_test`
+    M = sparse.csr_matrix(np.array([[0, 1, .5, 0],
+                                    [0, 0, .5, .5],
+                                    [0, 0, 0, .5],
+                                    [0, 0, 0, 0]]))
+    comparePrecision('Test graph', M)
+
+    # Synthetic graph, adjusted to be column stochastic
+    markov_matrix = PaperRank.compute.transition_matrix \
+        .MarkovTransitionMatrix(r=None, seen=np.arange(N), id_idx_map=None)
+    adjust = markov_matrix._MarkovTransitionMatrix__adjustTransitionMatrix
+    M = adjust(syntheticUnadjustedMatrix(N, E)).tocsr()
+    comparePrecision('Synthetic graph', M)
@@ -0,0 +1,53 @@
+from context import PaperRank
+import logging
+import os
+import redis
+import sys
+
+########################
+# LOGGING
+########################
+
+# Setting up formatter
+formatter = logging.Formatter('%(asctime)s - %(name)s - \
+    %(levelname)s - %(message)s')
+
+# Setting up base logger
+root = logging.getLogger()
+root.setLevel(logging.INFO)
+
+# Adding stdout
+log_stdout = logging.StreamHandler(sys.stdout)
+log_stdout.setFormatter(formatter)
+root.addHandler(log_stdout)
+
+
+########################
+# PaperRank
+########################
+
+# Setting up configuration
+PaperRank.util.configSetup(override='default.json')
+
+config = PaperRank.util.config
+
+# Creating redis-py connection
+r = redis.StrictRedis(
+    host=config.redis['host'],
+    port=config.redis['port'],
+    db=config.redis['db']
+)
+
+# Check if output folder exists, create if not
+if not os.path.exists(config.compute['output_folder']):
+    os.makedirs(config.compute['output_folder'])
+
+# Exporting graph snapshot, to be used with
+# PaperRank.compute.Manager(r=r, snapshot=snapshot_file)
+snapshot_file = config.compute['output_folder'] + \
+    config.compute['snapshot_file']
+
+PaperRank.compute.util.exportSnapshot(
+    r=r,
+    path=snapshot_file,
+    batch_size=config.compute['batch_size'])
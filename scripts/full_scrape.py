@@ -43,8 +43,12 @@ conn_pool = redis.ConnectionPool(
     db=config.redis['db']
 )
 
-# Creating Manager
-update_engine = PaperRank.update.Manager(conn_pool=conn_pool)
+# Creating Manager, with a process pool ('process') or an asyncio event loop
+# ('async') to query PMIDs
+if config.update['engine'] == 'async':
+    update_engine = PaperRank.update.AsyncManager(conn_pool=conn_pool)
+else:
+    update_engine = PaperRank.update.Manager(conn_pool=conn_pool)
 
 # Run update engine
 update_engine.start()
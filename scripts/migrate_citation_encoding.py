@@ -0,0 +1,46 @@
+from context import PaperRank
+import logging
+import redis
+import sys
+
+########################
+# LOGGING
+########################
+
+# Setting up formatter
+formatter = logging.Formatter('%(asctime)s - %(name)s - \
+    %(levelname)s - %(message)s')
+
+# Setting up base logger
+root = logging.getLogger()
+root.setLevel(logging.INFO)
+
+# Adding stdout
+log_stdout = logging.StreamHandler(sys.stdout)
+log_stdout.setFormatter(formatter)
+root.addHandler(log_stdout)
+
+
+########################
+# PaperRank
+########################
+
+# Setting up configuration
+PaperRank.util.configSetup(override='default.json')
+
+config = PaperRank.util.config
+
+# Creating redis-py connection
+r = redis.StrictRedis(
+    host=config.redis['host'],
+    port=config.redis['port'],
+    db=config.redis['db']
+)
+
+# One-time migration of the 'IN' and 'OUT' citation lists from the legacy
+# (string representation) encoding to the binary encoding
+for name in ['IN', 'OUT']:
+    migrated = PaperRank.util.migrateCitationEncoding(
+        r=r, name=name, batch_size=config.compute['batch_size'])
+
+    logging.info('Migrated {0} citation lists in {1}'.format(migrated, name))
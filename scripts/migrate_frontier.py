@@ -0,0 +1,42 @@
+from context import PaperRank
+import logging
+import redis
+import sys
+
+########################
+# LOGGING
+########################
+
+# Setting up formatter
+formatter = logging.Formatter('%(asctime)s - %(name)s - \
+    %(levelname)s - %(message)s')
+
+# Setting up base logger
+root = logging.getLogger()
+root.setLevel(logging.INFO)
+
+# Adding stdout
+log_stdout = logging.StreamHandler(sys.stdout)
+log_stdout.setFormatter(formatter)
+root.addHandler(log_stdout)
+
+
+########################
+# PaperRank
+########################
+
+# Setting up configuration
+PaperRank.util.configSetup(override='default.json')
+
+config = PaperRank.util.config
+
+# Creating redis-py connection
+r = redis.StrictRedis(
+    host=config.redis['host'],
+    port=config.redis['port'],
+    db=config.redis['db']
+)
+
+# One-time copy of the 'SEEN', 'EXPLORE', 'INSTANCE' and 'DANGLING' sets to
+# bitmaps, before setting `update.frontier` to 'bitmap'
+PaperRank.util.migrateToBitmap(r=r, batch_size=config.compute['batch_size'])
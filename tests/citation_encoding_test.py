@@ -0,0 +1,72 @@
+from context import PaperRank
+
+from redis import StrictRedis
+import numpy as np
+
+import unittest
+
+
+class TestCitationEncoding(unittest.TestCase):
+    """Test the binary and legacy citation list encodings of the `util`
+    module.
+    """
+
+    def __init__(self, *args, **kwargs):
+        # Running superclass initialization
+        super(TestCitationEncoding, self).__init__(*args, **kwargs)
+
+        # Setting up PaperRank
+        PaperRank.util.configSetup()
+        self.config = PaperRank.util.config
+
+        # Connecting to redis
+        self.redis = StrictRedis(
+            host=self.config.test['redis']['host'],
+            port=self.config.test['redis']['port'],
+            db=self.config.test['redis']['db']
+        )
+
+    def test_encodeDecode(self):
+        """Test that binary and legacy citation lists are decoded and
+        counted, including empty lists.
+        """
+
+        citations = ['29044241', '21876761', '1']
+
+        for encoded in [PaperRank.util.encodeCitations(citations),
+                        str(citations).encode()]:
+            np.testing.assert_array_equal(
+                PaperRank.util.decodeCitations(encoded),
+                np.array(citations, dtype=np.int64))
+            self.assertEqual(PaperRank.util.countCitations(encoded), 3)
+
+        for encoded in [PaperRank.util.encodeCitations([]), b'[]']:
+            self.assertEqual(PaperRank.util.decodeCitations(encoded).size, 0)
+            self.assertEqual(PaperRank.util.countCitations(encoded), 0)
+
+        # Binary encoding is 4 bytes per ID, after the header
+        self.assertEqual(len(PaperRank.util.encodeCitations(citations)),
+                         len(PaperRank.util.citation_encoding
+                             .CITATION_HEADER) + 12)
+
+    def test_migrateCitationEncoding(self):
+        """Test that `migrateCitationEncoding` re-encodes legacy citation
+        lists, and skips binary citation lists.
+        """
+
+        # Flush db, set up legacy and binary citation lists
+        self.redis.flushdb()
+        self.redis.hmset('IN', {1: str(['2', '3']), 2: str([]),
+                                3: PaperRank.util.encodeCitations([4])})
+
+        migrated = PaperRank.util.migrateCitationEncoding(r=self.redis,
+                                                          name='IN')
+
+        self.assertEqual(migrated, 2)
+
+        expected = {b'1': [2, 3], b'2': [], b'3': [4]}
+
+        for pmid, citations in self.redis.hgetall('IN').items():
+            self.assertTrue(PaperRank.util.isEncoded(citations))
+            np.testing.assert_array_equal(
+                PaperRank.util.decodeCitations(citations), expected[pmid])
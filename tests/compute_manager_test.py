@@ -1,7 +1,9 @@
 from context import PaperRank
 
 from redis import StrictRedis, ConnectionPool
+import json
 import numpy as np
+import tempfile
 
 import unittest
 
@@ -74,14 +76,16 @@ class TestComputeManager(unittest.TestCase):
             3: [4],
             4: []
         }
-        self.redis.hmset('IN', self.inbound_map)
+        self.redis.hmset('IN', {i: str(j) for i, j in
+                                self.inbound_map.items()})
         outbound_map = {
             1: [],
             2: [1],
             3: [1, 2],
             4: [2, 3]
         }
-        self.redis.hmset('OUT', outbound_map)
+        self.redis.hmset('OUT', {i: str(j) for i, j in
+                                 outbound_map.items()})
         seen = [1, 2, 3, 4]
         self.redis.sadd('SEEN', *seen)
 
@@ -103,3 +107,43 @@ class TestComputeManager(unittest.TestCase):
         paperrank = compute_manager.start(export=False)
 
         self.assertEqual(len(paperrank), 4)
+
+    def test_instrumentation(self):
+        """Test that the `Manager` records every stage of a run, and every
+        solver iteration, and writes them to a run report.
+        """
+
+        # Setting up test environment
+        self.dataSetup()
+        self.config.compute['id_limit'] = 10
+
+        compute_manager = PaperRank.compute.Manager(r=self.redis)
+        compute_manager.start(export=False)
+
+        instrumentation = compute_manager.instrumentation
+        stages = [i['stage'] for i in instrumentation.stages]
+
+        self.assertEqual(stages, ['build_id_list', 'build_out_degree_map',
+                                  'build_reverse_idx_map', 'warm_start',
+                                  'build_matrix', 'adjust_matrix', 'solve'])
+        self.assertEqual(instrumentation.stages[0]['items'], 4)
+        self.assertEqual(sorted(instrumentation.stages[0].keys()),
+                         sorted(PaperRank.compute.util.instrumentation
+                                .STAGE_FIELDS))
+        self.assertGreater(len(instrumentation.iterations), 0)
+        self.assertLess(instrumentation.iterations[-1]['residual'],
+                        self.config.compute['epsilon'])
+
+        # Writing the run report
+        output_folder = self.config.compute['output_folder']
+        self.config.compute['output_folder'] = tempfile.mkdtemp() + '/'
+
+        compute_manager.writeReport()
+
+        with open(self.config.compute['output_folder'] +
+                  self.config.compute['report_json_file']) as f:
+            report = json.load(f)
+
+        self.assertEqual(len(report['stages']), len(stages))
+
+        self.config.compute['output_folder'] = output_folder
@@ -0,0 +1,260 @@
+from context import PaperRank
+
+from scipy import sparse
+from unittest import mock
+import numpy as np
+import os
+
+import unittest
+
+
+def failingWorker(*args):
+    """Shared memory worker process exiting before the first iteration.
+    """
+
+    os._exit(1)
+
+
+class TestComputePaperRank(unittest.TestCase):
+    """Test the compute engine `StablePaperRank` module and its solvers.
+    """
+
+    def __init__(self, *args, **kwargs):
+        # Running superclass initialization
+        super(TestComputePaperRank, self).__init__(*args, **kwargs)
+
+        # Setting up PaperRank
+        PaperRank.util.configSetup()
+        self.config = PaperRank.util.config
+
+        # Transition matrix of the sample citation graph used in
+        # `compute_transition_matrix_test`
+        self.M = sparse.csr_matrix(np.array([[0, 1, .5, 0],
+                                             [0, 0, .5, .5],
+                                             [0, 0, 0, .5],
+                                             [0, 0, 0, 0]]))
+
+    def test_solvers(self):
+        """Test that every solver in `solvers.SOLVERS` computes a stochastic
+        PaperRank vector that agrees with power iteration within epsilon,
+        and reports its iterations, runtime and residual.
+        """
+
+        epsilon = self.config.compute['epsilon']
+        max_iterations = self.config.compute['max_iterations']
+        solver = self.config.compute['solver']
+
+        try:
+            # Reference solution, with a tighter threshold
+            self.config.compute['epsilon'] = 1e-12
+            expected = PaperRank.compute.paperrank \
+                .StablePaperRank(self.M, 4).calculate()
+            self.config.compute['epsilon'] = epsilon
+
+            for name in PaperRank.compute.solvers.SOLVERS:
+                self.config.compute['solver'] = name
+
+                compute_engine = PaperRank.compute.paperrank \
+                    .StablePaperRank(self.M, 4)
+                paperrank = compute_engine.calculate()
+
+                self.assertAlmostEqual(np.sum(paperrank), 1)
+                self.assertLess(np.sum(np.absolute(paperrank - expected)),
+                                epsilon)
+                self.assertGreater(compute_engine.iterations, 0)
+                self.assertGreaterEqual(compute_engine.runtime, 0)
+                self.assertLess(compute_engine.residual, epsilon)
+        finally:
+            self.config.compute['epsilon'] = epsilon
+            self.config.compute['max_iterations'] = max_iterations
+            self.config.compute['solver'] = solver
+
+    def test_krylovCallback(self):
+        """Test the residuals reported by the Krylov solvers: the relative L2
+        residual of every gmres iteration, and the L1 residual of bicgstab
+        only when requested.
+        """
+
+        solvers = PaperRank.compute.solvers.SOLVERS
+        initial = np.repeat(0.25, 4)
+        epsilon = self.config.compute['epsilon']
+
+        residuals = []
+        solvers['gmres'](self.M, initial, 0.85, epsilon, 100,
+                         callback=lambda i, r: residuals.append(r))
+        self.assertGreater(len(residuals), 0)
+        self.assertLess(residuals[-1], epsilon)
+
+        for interval, calls in [(0, 0), (1, None)]:
+            residuals = []
+            _, count, _ = solvers['bicgstab'](
+                self.M, initial, 0.85, epsilon, 100,
+                callback=lambda i, r: residuals.append(r),
+                residual_interval=interval)
+            self.assertEqual(len(residuals),
+                             count if calls is None else calls)
+
+    def test_incrementalPaperRankChained(self):
+        """Test that successive `IncrementalPaperRank` updates with the set of
+        changed papers stay within epsilon of `StablePaperRank`, without
+        keeping the error of the previous runs.
+        """
+
+        epsilon = self.config.compute['epsilon']
+        rng = np.random.RandomState(0)
+
+        # Random citation graph, where paper i (from the oldest) cites up to
+        # 5 older papers
+        N = 2000
+        citing = np.repeat(np.arange(1, N), 5)
+        cited = (rng.uniform(0, 1, citing.size) * citing).astype(np.int64)
+        edges = np.unique(citing * N + cited)
+        citing, cited = edges // N, edges % N
+
+        def buildMatrix(n: int) -> sparse.csr_matrix:
+            # Papers sorted from newest to oldest, as in the compute engine
+            keep = citing < n
+            out_degree = np.bincount(citing[keep], minlength=n)
+            return sparse.csr_matrix(
+                (1 / out_degree[citing[keep]],
+                 (n - 1 - cited[keep], n - 1 - citing[keep])),
+                shape=(n, n))
+
+        n = 1700
+
+        try:
+            # PaperRanks of a first run, with a larger error
+            self.config.compute['epsilon'] = 1e-3
+            paperrank = PaperRank.compute.paperrank \
+                .StablePaperRank(buildMatrix(n), n).calculate()
+            self.config.compute['epsilon'] = epsilon
+
+            for _ in range(3):
+                M = buildMatrix(n + 100)
+
+                # Warm start, with the uniform mass for the 100 new papers
+                previous = np.concatenate([np.repeat(1 / (n + 100), 100),
+                                           paperrank])
+                previous = previous / np.sum(previous)
+
+                paperrank = PaperRank.compute.incremental \
+                    .IncrementalPaperRank(M, n + 100, previous,
+                                          changed=np.arange(100)) \
+                    .calculate()
+                n += 100
+
+                self.config.compute['epsilon'] = 1e-12
+                expected = PaperRank.compute.paperrank \
+                    .StablePaperRank(M, n).calculate()
+                self.config.compute['epsilon'] = epsilon
+
+                self.assertLess(np.sum(np.absolute(paperrank - expected)),
+                                epsilon)
+        finally:
+            self.config.compute['epsilon'] = epsilon
+
+    def test_sharedMemoryPaperRank(self):
+        """Test that PaperRanks computed by 2 worker processes with
+        `SharedMemoryPaperRank` match those of `StablePaperRank`.
+        """
+
+        expected = PaperRank.compute.paperrank.StablePaperRank(self.M, 4) \
+            .calculate()
+
+        self.config.compute['workers'] = 2
+
+        try:
+            compute_engine = PaperRank.compute.shared_memory \
+                .SharedMemoryPaperRank(self.M, 4)
+            paperrank = compute_engine.calculate()
+        finally:
+            self.config.compute['workers'] = 1
+
+        np.testing.assert_allclose(paperrank, expected)
+        self.assertLess(compute_engine.residual,
+                        self.config.compute['epsilon'])
+
+    def test_sharedMemoryPaperRankFailures(self):
+        """Test that `SharedMemoryPaperRank` raises when a worker process
+        exits, instead of waiting for it, and stops workers before the first
+        iteration.
+        """
+
+        max_iterations = self.config.compute['max_iterations']
+        self.config.compute['workers'] = 2
+
+        try:
+            with mock.patch.object(PaperRank.compute.shared_memory,
+                                   '_worker', failingWorker):
+                compute_engine = PaperRank.compute.shared_memory \
+                    .SharedMemoryPaperRank(self.M, 4)
+
+                with self.assertRaises(RuntimeError):
+                    compute_engine.calculate()
+
+            self.config.compute['max_iterations'] = 0
+            compute_engine = PaperRank.compute.shared_memory \
+                .SharedMemoryPaperRank(self.M, 4)
+            paperrank = compute_engine.calculate()
+        finally:
+            self.config.compute['workers'] = 1
+            self.config.compute['max_iterations'] = max_iterations
+
+        np.testing.assert_allclose(paperrank, np.repeat(0.25, 4))
+        self.assertEqual(compute_engine.iterations, 0)
+
+    def test_personalizedPaperRank(self):
+        """Test that `PersonalizedPaperRank` computes a stochastic vector for
+        each seed set, and matches `StablePaperRank` for a uniform
+        personalization vector.
+        """
+
+        expected = PaperRank.compute.paperrank.StablePaperRank(self.M, 4) \
+            .calculate()
+
+        # Seed sets for IDs [4, 3, 2, 1], and a uniform teleport vector
+        id_idx_map = PaperRank.compute.util.IdIndex(np.array([4, 3, 2, 1]))
+        V = PaperRank.compute.personalized.buildTeleportMatrix(
+            id_idx_map=id_idx_map, seed_sets=[[4], [3, 2], [4, 3, 2, 1]])
+
+        compute_engine = PaperRank.compute.personalized \
+            .PersonalizedPaperRank(self.M, 4)
+        paperrank = compute_engine.calculate(V)
+
+        self.assertEqual(paperrank.shape, (4, 3))
+        np.testing.assert_allclose(np.sum(paperrank, axis=0), 1)
+        np.testing.assert_allclose(paperrank[:, 2], expected, atol=1e-6)
+        self.assertTrue(np.all(compute_engine.residual <
+                               self.config.compute['epsilon']))
+
+    def test_incrementalPaperRank(self):
+        """Test that `IncrementalPaperRank` updates the PaperRanks of a
+        smaller citation graph to those of `StablePaperRank` within epsilon,
+        with and without the set of changed papers.
+        """
+
+        epsilon = self.config.compute['epsilon']
+
+        # PaperRanks of the sample citation graph before ID 4 (cited by IDs
+        # 3 and 2) was crawled, with a 0 PaperRank for ID 4
+        M_previous = sparse.csr_matrix(np.array([[0, 1, .5],
+                                                 [0, 0, .5],
+                                                 [0, 0, 0]]))
+        previous = PaperRank.compute.paperrank \
+            .StablePaperRank(M_previous, 3).calculate()
+        previous = np.concatenate([[0], previous * 3 / 4])
+        previous = previous / np.sum(previous)
+
+        self.config.compute['epsilon'] = 1e-12
+        expected = PaperRank.compute.paperrank.StablePaperRank(self.M, 4) \
+            .calculate()
+        self.config.compute['epsilon'] = epsilon
+
+        for changed in [None, np.array([0, 1, 2])]:
+            compute_engine = PaperRank.compute.incremental \
+                .IncrementalPaperRank(self.M, 4, previous, changed=changed)
+            paperrank = compute_engine.calculate()
+
+            self.assertAlmostEqual(np.sum(paperrank), 1)
+            self.assertLess(np.sum(np.absolute(paperrank - expected)),
+                            epsilon)
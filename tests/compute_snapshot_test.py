@@ -0,0 +1,118 @@
+from context import PaperRank
+
+from redis import StrictRedis
+import numpy as np
+import os
+import tempfile
+
+import unittest
+
+
+class TestComputeSnapshot(unittest.TestCase):
+    """Test the compute engine graph snapshot export and `GraphSnapshot`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        # Running superclass initialization
+        super(TestComputeSnapshot, self).__init__(*args, **kwargs)
+
+        # Setting up PaperRank
+        PaperRank.util.configSetup()
+        self.config = PaperRank.util.config
+
+        # Connecting to redis
+        self.redis = StrictRedis(
+            host=self.config.test['redis']['host'],
+            port=self.config.test['redis']['port'],
+            db=self.config.test['redis']['db']
+        )
+
+    def dataSetup(self):
+        """Function to setup the sample citation graph used in
+        `compute_transition_matrix_test`, with an additional citation from an
+        ID that is not in SEEN.
+        """
+
+        # Flush db
+        self.redis.flushdb()
+
+        # Setting up sample data
+        inbound_map = {
+            1: [2, 3],
+            2: [3, 4],
+            3: [4, 5],
+            4: []
+        }
+        self.redis.hmset('IN', {i: str(j) for i, j in
+                                inbound_map.items()})
+        outbound_map = {
+            1: [],
+            2: [1],
+            3: [1, 2],
+            4: [2, 3]
+        }
+        self.redis.hmset('OUT', {i: str(j) for i, j in
+                                 outbound_map.items()})
+        self.redis.sadd('SEEN', 1, 2, 3, 4)
+
+    def test_snapshotTransitionMatrix(self):
+        """Test that the transition matrix built from an exported snapshot
+        is identical to the one built from Redis, with and without a cutoff.
+        """
+
+        self.dataSetup()
+
+        path = os.path.join(tempfile.mkdtemp(), 'graph.snapshot')
+        snapshot = PaperRank.compute.util.exportSnapshot(r=self.redis,
+                                                         path=path)
+
+        np.testing.assert_array_equal(snapshot.ids, [4, 3, 2, 1])
+        self.assertEqual(snapshot.nnz, 5)
+
+        for cutoff in [None, 3]:
+            seen = PaperRank.compute.util.buildIdList(r=self.redis,
+                                                      cutoff=cutoff)
+            id_idx_map = PaperRank.compute.util.buildReverseIdxMap(seen=seen)
+
+            matrices = [
+                PaperRank.compute.transition_matrix.MarkovTransitionMatrix(
+                    r=self.redis, seen=seen, id_idx_map=id_idx_map,
+                    snapshot=source).construct()
+                for source in [None, snapshot]
+            ]
+
+            np.testing.assert_array_equal(matrices[0].todense(),
+                                          matrices[1].todense())
+
+        os.remove(path)
+
+    def test_outOfCorePaperRank(self):
+        """Test that out-of-core PaperRanks computed from an exported snapshot
+        in blocks of 3 IDs match the in-memory PaperRanks.
+        """
+
+        self.dataSetup()
+
+        path = os.path.join(tempfile.mkdtemp(), 'graph.snapshot')
+        snapshot = PaperRank.compute.util.exportSnapshot(r=self.redis,
+                                                         path=path)
+
+        seen = PaperRank.compute.util.buildIdList(r=self.redis, cutoff=None)
+        id_idx_map = PaperRank.compute.util.buildReverseIdxMap(seen=seen)
+        M = PaperRank.compute.transition_matrix.MarkovTransitionMatrix(
+            r=self.redis, seen=seen, id_idx_map=id_idx_map).construct()
+        expected = PaperRank.compute.paperrank.StablePaperRank(M, 4) \
+            .calculate()
+
+        block_size = self.config.compute['block_size']
+        self.config.compute['block_size'] = 3
+
+        try:
+            paperrank = PaperRank.compute.out_of_core \
+                .OutOfCorePaperRank(snapshot).calculate()
+        finally:
+            self.config.compute['block_size'] = block_size
+
+        np.testing.assert_allclose(paperrank, expected)
+
+        os.remove(path)
@@ -70,14 +70,16 @@ class TestComputeTransitionMatrix(unittest.TestCase):
             3: [4],
             4: []
         }
-        self.redis.hmset('IN', self.inbound_map)
+        self.redis.hmset('IN', {i: str(j) for i, j in
+                                self.inbound_map.items()})
         outbound_map = {
             1: [],
             2: [1],
             3: [1, 2],
             4: [2, 3]
         }
-        self.redis.hmset('OUT', outbound_map)
+        self.redis.hmset('OUT', {i: str(j) for i, j in
+                                 outbound_map.items()})
         self.old_scores = {
             2: .5,
             3: .25,
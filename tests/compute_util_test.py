@@ -2,6 +2,10 @@ from context import PaperRank
 
 from redis import StrictRedis
 import numpy as np
+import os
+import pandas as pd
+import shutil
+import tempfile
 
 import unittest
 
@@ -53,7 +57,8 @@ class TestComputeUtil(unittest.TestCase):
         }
 
         # Adding outbound citation map, and dummy #5 citation
-        self.redis.hmset('OUT', outbound_map)
+        self.redis.hmset('OUT', {i: str(j) for i, j in
+                                 outbound_map.items()})
         self.redis.hmset('OUT_DEGREE', {5: 42})
 
         # Running util function
@@ -63,3 +68,178 @@ class TestComputeUtil(unittest.TestCase):
         out_degree = self.redis.hgetall('OUT_DEGREE')
 
         self.assertDictEqual(out_degree, expected_out_degree)
+
+    def test_IdIndex(self):
+        """Test the dense and sorted ID -> Index maps of the `IdIndex` class
+        from the `util` submodule, with IDs that are and are not indexed.
+        """
+
+        # Dense IDs (array indexed by ID) and sparse IDs (sorted array)
+        dense_seen = np.array([4, 3, 2, 1])
+        sparse_seen = np.array([10**8, 10**4, 42, 1])
+
+        for seen in [dense_seen, sparse_seen]:
+            id_idx_map = PaperRank.compute.util.IdIndex(seen=seen)
+
+            # Looking up every ID, an unseen ID, and an out of range ID
+            candidates = np.append(seen[::-1], [5, 10**9]).astype(str)
+            expected = np.array([3, 2, 1, 0, -1, -1])
+
+            np.testing.assert_array_equal(id_idx_map.lookup(candidates),
+                                          expected)
+
+        self.assertTrue(PaperRank.compute.util.IdIndex(dense_seen).dense)
+        self.assertFalse(PaperRank.compute.util.IdIndex(sparse_seen).dense)
+
+    def test_buildInitialScores(self):
+        """Test building initial PaperRanks from the PaperRanks of a previous
+        run in Redis and in a pickle file, with missing IDs assigned 1 / N
+        before renormalizing, and the uniform vector without a pickle file.
+        """
+
+        seen = np.array([4, 3, 2, 1])
+
+        # PaperRanks of a previous run, without ID 1, and with an unseen ID
+        previous = {4: 0.4, 3: 0.2, 2: 0.1, 5: 0.3}
+        expected = np.array([0.4, 0.2, 0.1, 0.25]) / 0.95
+
+        self.redis.flushdb()
+        self.redis.hmset('PaperRank', previous)
+
+        np.testing.assert_allclose(
+            PaperRank.compute.util.buildInitialScores(
+                seen=seen, r=self.redis, batch_size=3),
+            expected)
+
+        with tempfile.TemporaryDirectory() as folder:
+            pickle_file = os.path.join(folder, 'PaperRank.pkl')
+
+            # Uniform PaperRanks, without a previous run
+            np.testing.assert_allclose(
+                PaperRank.compute.util.buildInitialScores(
+                    seen=seen, pickle_file=pickle_file),
+                np.repeat(0.25, 4))
+
+            pd.DataFrame({
+                'PubMed ID': list(previous.keys()),
+                'PaperRank': list(previous.values())
+            }).to_pickle(pickle_file)
+
+            np.testing.assert_allclose(
+                PaperRank.compute.util.buildInitialScores(
+                    seen=seen, pickle_file=pickle_file),
+                expected)
+
+        with self.assertRaises(RuntimeError):
+            PaperRank.compute.util.buildInitialScores(seen=seen)
+
+        self.redis.flushdb()
+
+    def test_exportToRedis(self):
+        """Test that `Export.toRedis` replaces the 'PaperRank' database (and
+        writes the 'PaperRank:ZSET' sorted set), without leaving PaperRanks
+        of a previous run or staging keys behind.
+        """
+
+        # Flush db, set up PaperRanks of a previous run
+        self.redis.flushdb()
+        self.redis.hmset('PaperRank', {5: 0.1})
+
+        seen = np.array([4, 3, 2, 1])
+        paperrank = np.array([0.5, 0.25, 0.125, 0.125])
+
+        export_manager = PaperRank.compute.util.Export(
+            r=self.redis, paperrank=paperrank, seen=seen)
+        export_manager.toRedis(zset=True)
+
+        expected = {b'4': b'0.5', b'3': b'0.25', b'2': b'0.125',
+                    b'1': b'0.125'}
+
+        self.assertDictEqual(self.redis.hgetall('PaperRank'), expected)
+        self.assertEqual(self.redis.zrevrange('PaperRank:ZSET', 0, 1),
+                         [b'4', b'3'])
+        self.assertEqual(self.redis.keys('*STAGING*'), [])
+
+        # Sorted set of the previous run is not left behind
+        export_manager.toRedis(zset=False)
+
+        self.assertDictEqual(self.redis.hgetall('PaperRank'), expected)
+        self.assertFalse(self.redis.exists('PaperRank:ZSET'))
+
+    def test_exportTyped(self):
+        """Test the typed PaperRank dataframe of the `Export` class, and its
+        Parquet export (if pyarrow is installed).
+        """
+
+        seen = np.array([4, 3, 2, 1])
+        paperrank = np.array([0.125, 0.5, 0.25, 0.125])
+
+        export_manager = PaperRank.compute.util.Export(
+            r=self.redis, paperrank=paperrank, seen=seen)
+        pr_parsed = export_manager.pr_parsed
+
+        self.assertEqual(list(pr_parsed.dtypes),
+                         [np.int64, np.float64, np.int64, np.float64])
+        np.testing.assert_array_equal(pr_parsed['PubMed ID'], seen)
+        np.testing.assert_array_equal(pr_parsed['PaperRank'], paperrank)
+        np.testing.assert_array_equal(pr_parsed['Rank'], [3, 1, 2, 4])
+        np.testing.assert_array_equal(pr_parsed['Percentile'],
+                                      [50, 100, 75, 25])
+
+        if PaperRank.compute.util.export.pq is not None:
+            output_folder = self.config.compute['output_folder']
+            chunk_size = self.config.compute['columnar_chunk_size']
+            self.config.compute['output_folder'] = tempfile.mkdtemp() + '/'
+            self.config.compute['columnar_chunk_size'] = 3
+
+            try:
+                export_manager.toParquet()
+
+                table = PaperRank.compute.util.export.pq.read_table(
+                    self.config.compute['output_folder'] +
+                    self.config.compute['parquet_file'])
+                self.assertEqual(table.num_rows, 4)
+                self.assertTrue(table.to_pandas().equals(pr_parsed))
+            finally:
+                shutil.rmtree(self.config.compute['output_folder'])
+                self.config.compute['output_folder'] = output_folder
+                self.config.compute['columnar_chunk_size'] = chunk_size
+
+    def test_exportStart(self):
+        """Test that `Export.start` writes the PaperRanks to every selected
+        sink, reports their runtime and bytes written, and rejects invalid
+        sinks.
+        """
+
+        seen = np.array([4, 3, 2, 1])
+        paperrank = np.array([0.125, 0.5, 0.25, 0.125])
+
+        export_manager = PaperRank.compute.util.Export(
+            r=self.redis, paperrank=paperrank, seen=seen)
+
+        output_folder = self.config.compute['output_folder']
+        self.config.compute['output_folder'] = tempfile.mkdtemp() + '/'
+
+        instrumentation = PaperRank.compute.util.Instrumentation()
+
+        try:
+            report = export_manager.start(sinks=['csv', 'serialized'],
+                                          instrumentation=instrumentation)
+
+            self.assertEqual(sorted(report.keys()), ['csv', 'serialized'])
+            self.assertEqual(report['csv']['bytes'], os.path.getsize(
+                self.config.compute['output_folder'] +
+                self.config.compute['csv_file']))
+            self.assertGreater(report['serialized']['bytes'], 0)
+            self.assertGreaterEqual(report['csv']['runtime'], 0)
+
+            # Stages of the sinks run in worker processes are recorded
+            self.assertEqual(sorted(i['stage'] for i in
+                                    instrumentation.stages),
+                             ['export_csv', 'export_serialized'])
+        finally:
+            shutil.rmtree(self.config.compute['output_folder'])
+            self.config.compute['output_folder'] = output_folder
+
+        with self.assertRaises(RuntimeError):
+            export_manager.start(sinks=['csv', 'tape'])
@@ -0,0 +1,203 @@
+from context import PaperRank
+
+from redis import StrictRedis
+import numpy as np
+
+import unittest
+
+
+class TestFrontier(unittest.TestCase):
+    """Test the set and bitmap frontier backends of the `util` module.
+    """
+
+    def __init__(self, *args, **kwargs):
+        # Running superclass initialization
+        super(TestFrontier, self).__init__(*args, **kwargs)
+
+        # Setting up PaperRank
+        PaperRank.util.configSetup()
+        self.config = PaperRank.util.config
+
+        # Connecting to redis
+        self.redis = StrictRedis(
+            host=self.config.test['redis']['host'],
+            port=self.config.test['redis']['port'],
+            db=self.config.test['redis']['db']
+        )
+
+        self.backends = [PaperRank.util.SetFrontier,
+                         PaperRank.util.BitmapFrontier]
+
+    def test_frontier(self):
+        """Test adding, removing, counting and listing IDs with both
+        backends, including through a pipeline.
+        """
+
+        for backend in self.backends:
+            self.redis.flushdb()
+            frontier = backend(self.redis)
+
+            frontier.add('SEEN', ['29044241', '21876761', '1'])
+            frontier.add('SEEN', [])
+
+            pipe = self.redis.pipeline()
+            frontier.add('SEEN', [b'300'], pipe=pipe)
+            frontier.remove('SEEN', ['21876761'], pipe=pipe)
+            pipe.execute()
+
+            self.assertEqual(frontier.count('SEEN'), 3)
+            np.testing.assert_array_equal(
+                np.sort(frontier.members('SEEN')), [1, 300, 29044241])
+
+            # Empty sets
+            self.assertEqual(frontier.count('EXPLORE'), 0)
+            self.assertEqual(frontier.members('EXPLORE').size, 0)
+            self.assertEqual(frontier.sample('EXPLORE', 10), [])
+
+            # Sampling (without removing) IDs
+            sample = frontier.sample('SEEN', 2)
+            self.assertEqual(len(sample), 2)
+            self.assertTrue(set(sample) <= {'1', '300', '29044241'})
+            self.assertEqual(frontier.count('SEEN'), 3)
+
+            self.assertEqual(
+                sorted(frontier.sample('SEEN', 10), key=int),
+                ['1', '300', '29044241'])
+
+    def test_frontierSetOperations(self):
+        """Test the difference and union of sets with both backends, where
+        the removed set is smaller and larger than the set.
+        """
+
+        for backend in self.backends:
+            for other in [['5'], ['5', '100000']]:
+                self.redis.flushdb()
+                frontier = backend(self.redis)
+
+                frontier.add('EXPLORE', ['5', '9', '4000'])
+                frontier.add('SEEN', other)
+
+                frontier.difference('EXPLORE', 'SEEN')
+                np.testing.assert_array_equal(
+                    np.sort(frontier.members('EXPLORE')), [9, 4000])
+
+            frontier.add('INSTANCE', ['7', '9'])
+            frontier.union('EXPLORE', 'INSTANCE')
+            frontier.delete('INSTANCE')
+
+            np.testing.assert_array_equal(
+                np.sort(frontier.members('EXPLORE')), [7, 9, 4000])
+            self.assertEqual(frontier.count('INSTANCE'), 0)
+
+    def test_migrateToBitmap(self):
+        """Test copying the update engine sets to bitmaps.
+        """
+
+        self.redis.flushdb()
+
+        ids = [str(i) for i in range(1, 20000, 3)]
+        self.redis.sadd('SEEN', *ids)
+        self.redis.sadd('EXPLORE', '2', '5')
+
+        PaperRank.util.migrateToBitmap(self.redis, batch_size=1000)
+
+        frontier = PaperRank.util.BitmapFrontier(self.redis)
+
+        self.assertEqual(frontier.count('SEEN'), len(ids))
+        np.testing.assert_array_equal(frontier.members('SEEN'),
+                                      np.arange(1, 20000, 3))
+        np.testing.assert_array_equal(frontier.members('EXPLORE'), [2, 5])
+        self.assertEqual(frontier.count('INSTANCE'), 0)
+
+    def test_claimReclaim(self):
+        """Test claiming IDs with leases, releasing them, and reclaiming
+        stale claims with both backends.
+        """
+
+        ids = ['3', '5', '9', '4000']
+
+        for backend in self.backends:
+            self.redis.flushdb()
+            frontier = backend(self.redis)
+
+            frontier.add('EXPLORE', ids)
+
+            claimed = frontier.claim('EXPLORE', 'INSTANCE', 3)
+            self.assertEqual(len(claimed), 3)
+            self.assertEqual(frontier.count('EXPLORE'), 1)
+            self.assertEqual(frontier.count('INSTANCE'), 3)
+            self.assertEqual(
+                sorted(frontier.members('INSTANCE').tolist()),
+                sorted(int(i) for i in claimed))
+            self.assertEqual(self.redis.zcard('INSTANCE:LEASE'), 3)
+
+            # Claiming more IDs than available
+            claimed += frontier.claim('EXPLORE', 'INSTANCE', 3)
+            self.assertEqual(sorted(claimed, key=int), ids)
+            self.assertEqual(frontier.claim('EXPLORE', 'INSTANCE', 3), [])
+
+            frontier.release('INSTANCE', claimed[:2])
+            self.assertEqual(frontier.count('INSTANCE'), 2)
+            self.assertEqual(self.redis.zcard('INSTANCE:LEASE'), 2)
+
+            # Leases are not stale yet
+            self.assertEqual(frontier.reclaim('INSTANCE', 'EXPLORE', 60), 0)
+
+            self.assertEqual(frontier.reclaim('INSTANCE', 'EXPLORE', -1), 2)
+            self.assertEqual(frontier.count('INSTANCE'), 0)
+            self.assertEqual(self.redis.zcard('INSTANCE:LEASE'), 0)
+            self.assertEqual(
+                sorted(frontier.members('EXPLORE').tolist()),
+                sorted(int(i) for i in claimed[2:]))
+
+            # IDs already seen are removed without being claimed, and count
+            # towards the number of IDs
+            frontier.add('SEEN', claimed[2:3])
+            self.assertEqual(
+                frontier.claim('EXPLORE', 'INSTANCE', 3, exclude='SEEN'),
+                claimed[3:])
+            self.assertEqual(frontier.count('EXPLORE'), 0)
+
+            frontier.add('EXPLORE', ids)
+            frontier.add('SEEN', ids)
+            self.assertEqual(
+                frontier.claim('EXPLORE', 'INSTANCE', 2, exclude='SEEN'), [])
+            self.assertEqual(frontier.count('EXPLORE'), 2)
+
+    def test_claimRotation(self):
+        """Test that the bitmap backend claims IDs from a rotating cursor, so
+        that a failed batch added back to EXPLORE does not starve the other
+        IDs.
+        """
+
+        self.redis.flushdb()
+        frontier = PaperRank.util.BitmapFrontier(self.redis)
+
+        ids = [str(i) for i in range(1, 21)]
+        frontier.add('EXPLORE', ids)
+
+        failed = frontier.claim('EXPLORE', 'INSTANCE', 5, exclude='SEEN')
+        self.assertEqual(failed, ids[:5])
+
+        # Sampling from the cursor, wrapping around
+        frontier.add('EXPLORE', ['2'])
+        self.assertEqual(frontier.sample('EXPLORE', 16), ids[5:] + ['2'])
+        frontier.remove('EXPLORE', ['2'])
+
+        for _ in range(4):
+            # Failed batches are added back to EXPLORE, as by
+            # `failedRequestHandler`, others are seen
+            pmids = frontier.claim('EXPLORE', 'INSTANCE', 5, exclude='SEEN')
+            frontier.release('INSTANCE', pmids)
+            frontier.add('EXPLORE', failed)
+            frontier.add('SEEN', [i for i in pmids if i not in failed])
+
+        self.assertEqual(sorted(frontier.members('SEEN').tolist()),
+                         list(range(6, 21)))
+
+        # Every other ID was claimed, the cursor wraps around
+        self.assertEqual(frontier.claim('EXPLORE', 'INSTANCE', 10,
+                                        exclude='SEEN'), ids[:5])
+
+        self.redis.flushdb()
+
@@ -0,0 +1,159 @@
+from context import PaperRank
+from PaperRank.update import async_manager
+
+from redis import ConnectionPool, StrictRedis
+import asyncio
+
+import unittest
+
+
+# elink response of ID 1, citing IDs 2 and 4
+ELINK_RESPONSE = '<?xml version="1.0" encoding="UTF-8" ?>\n<eLinkResult>\
+<LinkSet><DbFrom>pubmed</DbFrom><IdList><Id>1</Id></IdList><LinkSetDb>\
+<DbTo>pubmed</DbTo><LinkName>pubmed_pubmed_refs</LinkName><Link><Id>2</Id>\
+</Link><Link><Id>4</Id></Link></LinkSetDb></LinkSet></eLinkResult>'
+
+
+class FakeResponse:
+    """Stub of an aiohttp response, with a status and text.
+    """
+
+    def __init__(self, status: int, text: str=''):
+        self.status = status
+        self.body = text
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    async def text(self) -> str:
+        return self.body
+
+
+class FakeSession:
+    """Stub of an aiohttp session, returning (or raising) the given
+    responses in order, and recording the request parameters.
+    """
+
+    def __init__(self, responses: list):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url: str, params: list) -> FakeResponse:
+        self.requests.append(params)
+        response = self.responses.pop(0)
+
+        if isinstance(response, Exception):
+            raise response
+
+        return response
+
+
+@unittest.skipIf(async_manager.aiohttp is None,
+                 'aiohttp and redis.asyncio are not installed')
+class TestUpdateAsync(unittest.TestCase):
+    """Tests for the asyncio engine of the update engine.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Override initialization function to setup PaperRank config.
+        """
+
+        super(TestUpdateAsync, self).__init__(*args, **kwargs)
+        PaperRank.util.configSetup()
+        self.config = PaperRank.util.config
+
+        self.conn_pool = ConnectionPool(
+            host=self.config.test['redis']['host'],
+            port=self.config.test['redis']['port'],
+            db=self.config.test['redis']['db']
+        )
+
+    def setUp(self):
+        self.redis = StrictRedis(connection_pool=self.conn_pool)
+        self.redis.flushdb()
+
+        self.manager = async_manager.AsyncManager(conn_pool=self.conn_pool,
+                                                  recover=False)
+        self.manager.limiter.retry_backoff = 0.01
+
+    def tearDown(self):
+        self.redis.flushdb()
+
+    def query(self, session: FakeSession, pmids: list):
+        """Run `AsyncManager.query` with the session, in a request window of
+        one request, checking that the window is released.
+        """
+
+        async def run():
+            db = async_manager.aioredis.StrictRedis(
+                host=self.config.test['redis']['host'],
+                port=self.config.test['redis']['port'],
+                db=self.config.test['redis']['db'])
+            window = asyncio.Semaphore(1)
+
+            await window.acquire()
+            await self.manager.query(session, db, pmids, window)
+            await db.close()
+
+            self.assertFalse(window.locked())
+
+        asyncio.run(run())
+
+    def test_request(self):
+        """Test successful, throttled then retried, and failed requests.
+        """
+
+        session = FakeSession([FakeResponse(200, ELINK_RESPONSE)])
+        self.assertEqual(
+            asyncio.run(self.manager.request(session, [('id', '1')])),
+            (True, ELINK_RESPONSE))
+        self.assertEqual(session.requests, [[('id', '1')]])
+
+        session = FakeSession([FakeResponse(429),
+                               FakeResponse(200, ELINK_RESPONSE)])
+        self.assertEqual(
+            asyncio.run(self.manager.request(session, [('id', '1')])),
+            (True, ELINK_RESPONSE))
+        self.assertEqual(len(session.requests), 2)
+        self.assertLess(float(self.redis.hget('RATE_LIMIT', 'rate')),
+                        self.manager.limiter.max_rate)
+
+        # Throttled on every attempt
+        session = FakeSession([FakeResponse(503)] *
+                              (self.manager.limiter.max_retries + 1))
+        self.assertFalse(
+            asyncio.run(self.manager.request(session, [('id', '1')]))[0])
+        self.assertEqual(session.responses, [])
+
+        session = FakeSession([async_manager.aiohttp.ClientError()])
+        self.assertEqual(
+            asyncio.run(self.manager.request(session, [('id', '1')])),
+            (False, None))
+
+    def test_query(self):
+        """Test that queries write the citations of a successful request, and
+        move the IDs of a failed request back to EXPLORE.
+        """
+
+        frontier = PaperRank.util.getFrontier(self.redis)
+        frontier.add('INSTANCE', ['1'])
+
+        self.query(FakeSession([FakeResponse(429),
+                                FakeResponse(200, ELINK_RESPONSE)]), ['1'])
+
+        self.assertEqual(frontier.members('SEEN').tolist(), [1])
+        self.assertEqual(sorted(frontier.members('EXPLORE').tolist()), [2, 4])
+        self.assertEqual(frontier.count('INSTANCE'), 0)
+        self.assertEqual(self.redis.hget('OUT_DEGREE', '1'), b'2')
+
+        frontier.add('INSTANCE', ['3'])
+
+        self.query(FakeSession([async_manager.aiohttp.ClientError()]),
+                   ['3'])
+
+        self.assertEqual(sorted(frontier.members('EXPLORE').tolist()),
+                         [2, 3, 4])
+        self.assertEqual(frontier.count('INSTANCE'), 0)
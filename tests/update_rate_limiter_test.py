@@ -0,0 +1,114 @@
+from context import PaperRank
+from PaperRank.update.rate_limiter import RATE_LIMIT_KEY
+
+from redis import StrictRedis
+import time
+
+import unittest
+
+
+class TestRateLimiter(unittest.TestCase):
+    """Tests for the shared rate limiter of the update engine.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Override initialization function to setup PaperRank config.
+        """
+
+        super(TestRateLimiter, self).__init__(*args, **kwargs)
+        PaperRank.util.configSetup()
+        self.config = PaperRank.util.config
+
+        self.redis = StrictRedis(
+            host=self.config.test['redis']['host'],
+            port=self.config.test['redis']['port'],
+            db=self.config.test['redis']['db']
+        )
+
+    def test_tokenBucket(self):
+        """Test taking tokens from the bucket, up to the burst size.
+        """
+
+        self.redis.flushdb()
+
+        limiter = PaperRank.update.RateLimiter(self.redis)
+        limiter.max_rate = 2
+        limiter.burst = 2
+
+        self.assertEqual(limiter.reserve(), 0)
+        self.assertEqual(limiter.reserve(), 0)
+
+        # Bucket is empty, next token in about 1 / rate seconds
+        wait = limiter.reserve()
+        self.assertGreater(wait, 0)
+        self.assertLessEqual(wait, 0.5)
+
+        self.redis.flushdb()
+
+    def test_aimd(self):
+        """Test the multiplicative decrease and additive increase of the
+        rate, and the backoff of retries.
+        """
+
+        self.redis.flushdb()
+
+        limiter = PaperRank.update.RateLimiter(self.redis)
+        limiter.max_rate = 4
+        limiter.min_rate = 0.5
+        limiter.increase = 0.5
+        limiter.decrease = 0.5
+
+        # Rate is decreased once for a burst of throttled requests, and the
+        # bucket is emptied
+        self.assertAlmostEqual(limiter.throttled(), 2)
+        self.assertAlmostEqual(limiter.throttled(), 2)
+        self.assertEqual(float(self.redis.hget(RATE_LIMIT_KEY, 'tokens')), 0)
+        self.assertGreater(limiter.reserve(), 0)
+
+        self.assertAlmostEqual(limiter.success(), 2.5)
+
+        for _ in range(5):
+            rate = limiter.success()
+
+        self.assertAlmostEqual(rate, 4)
+
+        for attempt in range(10):
+            backoff = limiter.backoff(attempt)
+            self.assertGreaterEqual(backoff, 0)
+            self.assertLessEqual(backoff, min(limiter.retry_backoff_max,
+                                              limiter.retry_backoff *
+                                              2**attempt))
+
+        self.redis.flushdb()
+
+    def test_throttledAfterIdle(self):
+        """Test that a throttled request empties the bucket, without tokens
+        being refilled for the time elapsed before it was throttled.
+        """
+
+        self.redis.flushdb()
+
+        limiter = PaperRank.update.RateLimiter(self.redis)
+        limiter.max_rate = 4
+        limiter.burst = 1
+        limiter.decrease = 0.5
+
+        self.assertEqual(limiter.reserve(), 0)
+
+        # More than a token at the decreased rate is refilled while idle
+        time.sleep(0.6)
+
+        self.assertAlmostEqual(limiter.throttled(), 2)
+        self.assertGreater(limiter.reserve(), 0)
+
+        self.redis.flushdb()
+
+    def test_isThrottled(self):
+        """Test the HTTP statuses of throttled requests.
+        """
+
+        for status in [429, 500, 503]:
+            self.assertTrue(PaperRank.update.isThrottled(status))
+
+        for status in [200, 400, 404]:
+            self.assertFalse(PaperRank.update.isThrottled(status))
@@ -0,0 +1,151 @@
+from context import PaperRank
+from PaperRank.update.stream import STREAM_KEY, STREAM_GROUP, \
+    STREAM_FAILED_KEY
+
+from redis import ConnectionPool, StrictRedis
+from threading import Thread
+from unittest import mock
+
+import unittest
+
+
+class TestUpdateStream(unittest.TestCase):
+    """Tests for the distributed crawl stream of the update engine.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Override initialization function to setup PaperRank config.
+        """
+
+        super(TestUpdateStream, self).__init__(*args, **kwargs)
+        PaperRank.util.configSetup()
+        self.config = PaperRank.util.config
+
+        self.conn_pool = ConnectionPool(
+            host=self.config.test['redis']['host'],
+            port=self.config.test['redis']['port'],
+            db=self.config.test['redis']['db']
+        )
+
+    def fakeQuery(self, conn_pool: ConnectionPool, pmids: list, **kwargs):
+        """Query stub, moving PMIDs from INSTANCE to SEEN, and failing for
+        the PMID '13'.
+        """
+
+        if '13' in pmids:
+            raise RuntimeError('Poison batch.')
+
+        frontier = PaperRank.util.getFrontier(StrictRedis(
+            connection_pool=conn_pool))
+        frontier.release('INSTANCE', pmids)
+        frontier.add('SEEN', pmids)
+
+    def test_streamBatches(self):
+        """Test reading, and reclaiming pending batches from the stream.
+        """
+
+        r = StrictRedis(connection_pool=self.conn_pool)
+        r.flushdb()
+
+        worker = PaperRank.update.StreamWorker(conn_pool=self.conn_pool,
+                                               consumer='first')
+        other = PaperRank.update.StreamWorker(conn_pool=self.conn_pool,
+                                              consumer='second')
+
+        # Creating the group again is a no-op
+        PaperRank.update.stream.createStreamGroup(r)
+
+        r.execute_command('XADD', STREAM_KEY, '*', 'pmids', '21876761,1')
+
+        self.assertEqual(worker.claimBatches(), [])
+
+        batches = worker.readBatches()
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(batches[0][1], ['21876761', '1'])
+
+        # Batch is pending for `first`, and not delivered again
+        other.block = 1
+        self.assertEqual(other.readBatches(), [])
+
+        # Claiming the batch, once idle
+        other.claim_idle = 0
+        claimed = other.claimBatches()
+        self.assertEqual(len(claimed), 1)
+        self.assertEqual(claimed[0], batches[0])
+
+        r.execute_command('XACK', STREAM_KEY, STREAM_GROUP, claimed[0][0])
+        self.assertEqual(other.claimBatches(), [])
+
+        r.flushdb()
+
+    @mock.patch('PaperRank.update.stream.Query')
+    def test_streamWorker(self, query):
+        """Test that a worker queries batches, and leaves failed batches
+        pending until they are dropped after `stream_max_deliveries`
+        deliveries.
+        """
+
+        query.side_effect = self.fakeQuery
+
+        r = StrictRedis(connection_pool=self.conn_pool)
+        r.flushdb()
+
+        worker = PaperRank.update.StreamWorker(conn_pool=self.conn_pool,
+                                               consumer='first')
+        worker.claim_idle = 0
+        worker.block = 1
+        worker.max_deliveries = 2
+
+        frontier = PaperRank.util.getFrontier(r)
+        frontier.add('INSTANCE', ['1', '2', '13'])
+
+        r.execute_command('XADD', STREAM_KEY, '*', 'pmids', '13')
+        r.execute_command('XADD', STREAM_KEY, '*', 'pmids', '1,2')
+
+        self.assertEqual(worker.start(max_idle=0.5), 1)
+
+        # Poison batch was queried on each of its deliveries, then dropped
+        self.assertEqual(query.call_count, 3)
+        self.assertEqual(int(r.execute_command('XLEN', STREAM_KEY)), 0)
+        self.assertEqual(r.smembers(STREAM_FAILED_KEY), {b'13'})
+        self.assertEqual(frontier.count('INSTANCE'), 0)
+        self.assertEqual(frontier.count('SEEN'), 2)
+
+        r.flushdb()
+
+    @mock.patch('PaperRank.update.stream.Query')
+    def test_streamManager(self, query):
+        """Test that the manager publishes every PMID of EXPLORE, and returns
+        once the batches were queried by a worker.
+        """
+
+        query.side_effect = self.fakeQuery
+
+        r = StrictRedis(connection_pool=self.conn_pool)
+        r.flushdb()
+
+        ids = [str(i) for i in range(100, 150)]
+
+        frontier = PaperRank.util.getFrontier(r)
+        frontier.add('EXPLORE', ids)
+
+        manager = PaperRank.update.StreamManager(conn_pool=self.conn_pool)
+
+        worker = PaperRank.update.StreamWorker(conn_pool=self.conn_pool)
+        worker.block = 100
+
+        thread = Thread(target=worker.start, kwargs={'max_idle': 2})
+        thread.start()
+
+        try:
+            manager.start()
+        finally:
+            thread.join()
+
+        self.assertEqual(frontier.count('EXPLORE'), 0)
+        self.assertEqual(frontier.count('INSTANCE'), 0)
+        self.assertEqual(sorted(frontier.members('SEEN').tolist()),
+                         sorted(int(i) for i in ids))
+        self.assertEqual(int(r.execute_command('XLEN', STREAM_KEY)), 0)
+
+        r.flushdb()